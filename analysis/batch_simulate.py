@@ -35,6 +35,9 @@ def run_simulation(
     per_process: int,
     log_file: Path,
     rust: bool,
+    resume: bool,
+    lockstep: bool,
+    stats: bool,
 ) -> None:
     instructions: list[InstructionDto] = []
     index = 0
@@ -58,10 +61,16 @@ def run_simulation(
         per_process=per_process,
         log_file=log_file,
         rust=rust,
+        resume=resume,
+        lockstep=lockstep,
+        stats=stats,
     )
     stop = perf_counter()
     time_taken = stop - start
-    log.info(f"Simulation took {time_taken:.2f} seconds")
+    if resume:
+        log.info(f"Simulation took {time_taken:.2f} seconds, excluding any chunks completed before resuming")
+    else:
+        log.info(f"Simulation took {time_taken:.2f} seconds")
     time_taken_txt = run_dir / "time_taken.txt"
     time_taken_txt.write_text(str(time_taken))
 
@@ -164,7 +173,12 @@ def run() -> None:
         type=int,
         help="Number of processes to use. Negative values are deducted from available cores on this machine",
     )
-    parser.add_argument("--per-process", default=100, type=int, help="How many games to run per subprocess")
+    parser.add_argument(
+        "--per-process",
+        default=100,
+        type=int,
+        help="How many games to run per subprocess. Without --no-rust, 0 shares games between threads by work-stealing",
+    )
     parser.add_argument(
         "--strategies",
         nargs="*",
@@ -185,6 +199,22 @@ def run() -> None:
         "--run-dir", default=choose_run_directory(), type=Path, help="Directory with results, logs and analysis"
     )
     parser.add_argument("--no-rust", action="store_true", help="If set, invoke python only implementation")
+    parser.add_argument(
+        "--lockstep",
+        action="store_true",
+        help="With --no-rust, play each chunk of --per-process games at once with the vectorised lockstep engine",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="If set, continue an interrupted simulation in --run-dir. Needs the same --seed-offset and other options",
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="If set, count and time the phases of the simulation in each worker, written to stats.parquet",
+    )
 
     args = parser.parse_args()
     run_dir = args.run_dir.resolve()
@@ -209,6 +239,9 @@ def run() -> None:
             per_process=args.per_process,
             log_file=log_file,
             rust=not args.no_rust,
+            resume=args.resume,
+            lockstep=args.lockstep,
+            stats=args.stats,
         )
 
     run_analysis(strategies=args.strategies, results_parquet=results_parquet)
@@ -0,0 +1,143 @@
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+from copy import deepcopy
+from pathlib import Path
+from time import perf_counter
+from typing import NamedTuple
+
+# TODO 2024-11-13 - work out why the import of ninja_taisen fails. Maturin docs are confusing!
+try:
+    import ninja_taisen  # noqa
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ninja_taisen.algos import board_builder, board_inspector
+from ninja_taisen.algos.card_mover import CardMover
+from ninja_taisen.algos.move_gatherer import gather_all_permitted_moves
+from ninja_taisen.objects.safe_random import SafeRandom
+from ninja_taisen.objects.types import Board, Category, CompletedMoves, Move, Team
+
+
+class Position(NamedTuple):
+    board: Board
+    team: Team
+    dice_rolls: dict[Category, int]
+
+
+def deepcopy_gather_all_permitted_moves(
+    starting_board: Board, team: Team, dice_rolls: dict[Category, int]
+) -> list[CompletedMoves]:
+    """
+    The original move gatherer, which deep-copies the whole CompletedMoves for every candidate.
+    Kept here as the baseline we compare gather_all_permitted_moves against
+    """
+
+    def gather(initial_states: list[CompletedMoves], category: Category, dice_roll: int) -> list[CompletedMoves]:
+        final_states = []
+        for initial_state in initial_states:
+            if board_inspector.victorious_team(initial_state.board) is not None:
+                continue
+            for pile_index, card_index in board_inspector.movable_card_indices(
+                initial_state.board, team, category, initial_state.used_joker()
+            ):
+                copied_state = deepcopy(initial_state)
+                card = initial_state.board.card(team, pile_index, card_index)
+                CardMover(board=copied_state.board).move_card_and_resolve_battles(
+                    team=team, dice_roll=dice_roll, pile_index=pile_index, card_index=card_index
+                )
+                copied_state.moves.append(Move(dice_category=category, dice_roll=dice_roll, card=card))
+                final_states.append(copied_state)
+        return final_states
+
+    moves: list[CompletedMoves] = []
+    initial_state = CompletedMoves(moves=[], team=team, board=starting_board)
+    for dice_type_a, roll_a in dice_rolls.items():
+        new_moves_a = gather([initial_state], dice_type_a, roll_a)
+        moves.extend(new_moves_a)
+        for dice_type_b, roll_b in dice_rolls.items():
+            if dice_type_a == dice_type_b:
+                continue
+            new_moves_b = gather(new_moves_a, dice_type_b, roll_b)
+            moves.extend(new_moves_b)
+            for dice_type_c, roll_c in dice_rolls.items():
+                if dice_type_a == dice_type_c or dice_type_b == dice_type_c:
+                    continue
+                moves.extend(gather(new_moves_b, dice_type_c, roll_c))
+    return moves
+
+
+def collect_positions(game_count: int, seed_offset: int) -> list[Position]:
+    positions: list[Position] = []
+    for seed in range(seed_offset, seed_offset + game_count):
+        random = SafeRandom(seed)
+        board = board_builder.make_board(random=random)
+        team = Team.monkey
+        for _ in range(100):
+            dice_rolls = {
+                Category.rock: random.roll_dice(),
+                Category.paper: random.roll_dice(),
+                Category.scissors: random.roll_dice(),
+            }
+            positions.append(Position(board=deepcopy(board), team=team, dice_rolls=dice_rolls))
+            all_permitted_moves = gather_all_permitted_moves(board, team, dice_rolls)
+            if all_permitted_moves:
+                board = random.choice(all_permitted_moves).board
+            if board_inspector.victorious_team(board) is not None:
+                break
+            team = team.other()
+    return positions
+
+
+Gatherer = Callable[[Board, Team, dict[Category, int]], list[CompletedMoves]]
+
+
+def benchmark(name: str, gatherer: Gatherer, positions: list[Position]) -> list[list[CompletedMoves]]:
+    all_results = []
+    start = perf_counter()
+    for position in positions:
+        all_results.append(gatherer(deepcopy(position.board), position.team, position.dice_rolls))
+    time_taken = perf_counter() - start
+
+    tracemalloc.start()
+    peaks = []
+    for position in positions:
+        board = deepcopy(position.board)
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        results = gatherer(board, position.team, position.dice_rolls)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+        del results
+    tracemalloc.stop()
+
+    candidates = sum(len(r) for r in all_results)
+    print(f"{name}:")
+    print(
+        f"  {1000 * time_taken / len(positions):.3f} ms per turn, {candidates / len(positions):.1f} candidates per turn"
+    )
+    print(f"  {sum(peaks) / len(peaks) / 1024:.1f} KiB mean peak allocation per turn, {max(peaks) / 1024:.1f} KiB max")
+    return all_results
+
+
+def run() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--games", default=20, type=int, help="How many random games to collect positions from")
+    parser.add_argument("--seed-offset", default=0, type=int, help="Seed of the first game")
+    args = parser.parse_args()
+
+    positions = collect_positions(args.games, args.seed_offset)
+    print(f"Collected {len(positions)} positions from {args.games} games")
+
+    baseline_results = benchmark("deepcopy (baseline)", deepcopy_gather_all_permitted_moves, positions)
+    results = benchmark("gather_all_permitted_moves", gather_all_permitted_moves, positions)
+
+    for baseline_moves, moves in zip(baseline_results, results, strict=True):
+        assert [m.moves for m in baseline_moves] == [m.moves for m in moves]
+        assert [m.board for m in baseline_moves] == [m.board for m in moves]
+    print("Both move gatherers produced identical candidates")
+
+
+if __name__ == "__main__":
+    run()
@@ -3,8 +3,8 @@ import json
 import os
 import subprocess
 import sys
+from argparse import ArgumentParser
 from collections import defaultdict
-from math import ceil
 from pathlib import Path
 from typing import Any
 
@@ -27,6 +27,8 @@ COMMAND_PREFIX = [
     "--strategies",
 ] + STRATEGIES
 MAX_TIME_S = 400.0
+# The Rust engine shares games out between threads by work-stealing, so it has no chunk size to tune
+RUST_WORK_STEALING = 0
 
 
 def launch_benchmark_process(
@@ -38,7 +40,14 @@ def launch_benchmark_process(
 ) -> float:
     name = "rust" if rust else "python"
     run_dir = overall_run_dir / f"{name}_{16 * multiplier}"
-    run_dir.mkdir(parents=True)
+    time_taken_txt = run_dir / "time_taken.txt"
+    if time_taken_txt.exists():
+        print(f"Skipping {name} benchmark with {16 * multiplier} simulations, already completed in {run_dir}")
+        return float(time_taken_txt.read_text())
+
+    # If an earlier attempt was interrupted, pick up from the chunks it completed. The fixed seed offset means the
+    # instructions match those of the earlier attempt
+    run_dir.mkdir(parents=True, exist_ok=True)
     command = COMMAND_PREFIX + [
         "--run-dir",
         str(run_dir),
@@ -48,18 +57,20 @@ def launch_benchmark_process(
         str(parallelism),
         "--per-process",
         str(chunk_size),
+        "--seed-offset",
+        "0",
+        "--resume",
     ]
-    if rust:
-        command.append("--rust")
+    if not rust:
+        command.append("--no-rust")
 
     print(f"Launching {name} benchmark with {16 * multiplier} simulations")
     subprocess.check_output(command)
     print("Benchmark subprocess complete")
-    time_taken_txt = run_dir / "time_taken.txt"
     return float(time_taken_txt.read_text())
 
 
-def choose_chunk_sizes(overall_run_dir: Path) -> tuple[int, int]:
+def choose_python_chunk_size(overall_run_dir: Path) -> int:
     multiplier = 10
     python_dry_run_time = launch_benchmark_process(
         multiplier=multiplier,
@@ -68,34 +79,31 @@ def choose_chunk_sizes(overall_run_dir: Path) -> tuple[int, int]:
         rust=False,
         overall_run_dir=overall_run_dir,
     )
-    rust_dry_run_time = launch_benchmark_process(
-        multiplier=multiplier,
-        parallelism=1,
-        chunk_size=multiplier * 16,
-        rust=True,
-        overall_run_dir=overall_run_dir,
-    )
 
     python_s_per_run = python_dry_run_time / (16 * multiplier)
-    rust_s_per_run = rust_dry_run_time / (16 * multiplier)
-
     python_chunk_size = int(10 / python_s_per_run)
-    rust_chunk_size = int(10 / rust_s_per_run)
-    print("Choosing chunk sizes to aim for about 10s per chunk")
-    print(f"Python: {python_chunk_size}, Rust: {rust_chunk_size}")
-    return python_chunk_size, rust_chunk_size
+    print(f"Choosing Python chunk size to aim for about 10s per chunk: {python_chunk_size}")
+    return python_chunk_size
 
 
 def run() -> None:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--resume-dir",
+        type=Path,
+        help="The overall run directory of an interrupted benchmark, to continue from where it stopped",
+    )
+    args = parser.parse_args()
+
     logical_cpus = psutil.cpu_count(logical=True)
     assert logical_cpus is not None, "Could not determine logical_cpus"
 
     total_ram_gb = psutil.virtual_memory().total / (1024**3)
     cpu_freq_mhz = psutil.cpu_freq().max
 
-    overall_run_dir = setup_run_directory()
+    overall_run_dir = args.resume_dir.resolve() if args.resume_dir else setup_run_directory()
     print(f"overall_run_dir={overall_run_dir}")
-    python_chunk_size, rust_chunk_size = choose_chunk_sizes(overall_run_dir)
+    python_chunk_size = choose_python_chunk_size(overall_run_dir)
     run_python, run_rust = True, True
 
     simulation_counts = [
@@ -144,7 +152,7 @@ def run() -> None:
             rust_s = launch_benchmark_process(
                 multiplier=multiplier,
                 parallelism=logical_cpus - 1,
-                chunk_size=min(rust_chunk_size, ceil(multiplier * 16 / (logical_cpus - 1))),
+                chunk_size=RUST_WORK_STEALING,
                 rust=True,
                 overall_run_dir=overall_run_dir,
             )
@@ -162,7 +170,6 @@ def run() -> None:
         "total_ram_gb": round(total_ram_gb, 3),
         "cpu_freq_mhz": cpu_freq_mhz,
         "python_chunk_size": python_chunk_size,
-        "rust_chunk_size": rust_chunk_size,
     }
     metadata_json = overall_run_dir / "benchmark_metadata.json"
     metadata_json.write_text(json.dumps(metadata, indent=2))
@@ -1,4 +1,12 @@
-from ninja_taisen.api import choose_move, execute_move, simulate
+from ninja_taisen.api import (
+    choose_move,
+    choose_move_binary,
+    choose_moves,
+    execute_move,
+    execute_moves,
+    simulate,
+    simulate_in_memory,
+)
 from ninja_taisen.dtos import (
     ChooseRequest,
     ChooseResponse,
@@ -10,8 +18,12 @@ from ninja_taisen.dtos import (
 
 __all__ = [
     "choose_move",
+    "choose_move_binary",
+    "choose_moves",
     "execute_move",
+    "execute_moves",
     "simulate",
+    "simulate_in_memory",
     "ChooseRequest",
     "ChooseResponse",
     "ExecuteRequest",
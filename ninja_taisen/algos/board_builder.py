@@ -27,7 +27,9 @@ from ninja_taisen.objects.types import Board, Card
 
 
 def make_board(random: SafeRandom, shuffle_cards: bool = True) -> Board:
-    return Board(monkey_cards=__monkey_cards(random, shuffle_cards), wolf_cards=__wolf_cards(random, shuffle_cards))
+    return Board.from_piles(
+        monkey_cards=__monkey_cards(random, shuffle_cards), wolf_cards=__wolf_cards(random, shuffle_cards)
+    )
 
 
 def __monkey_cards(random: SafeRandom, shuffle_cards: bool) -> defaultdict[int, list[Card]]:
@@ -1,17 +1,24 @@
-from collections import defaultdict
-
-from ninja_taisen.objects.types import Board, Card, Category, CompletedMoves, Team
+from ninja_taisen.objects.types import (
+    BOARD_LENGTH,
+    CHECK_CATEGORY,
+    PILE_CAPACITY,
+    TEAM_CARDS_LENGTH,
+    Board,
+    Category,
+    CompletedMoves,
+    Team,
+)
 
 
 def victorious_team(board: Board) -> Team | None:
-    if board.monkey_cards[10]:
-        assert not board.wolf_cards[0]
+    if board.height(Team.monkey, BOARD_LENGTH - 1):
+        assert not board.height(Team.wolf, 0)
         return Team.monkey
-    if board.wolf_cards[0]:
+    if board.height(Team.wolf, 0):
         return Team.wolf
 
-    monkeys_remain = any(len(p) > 0 for p in board.monkey_cards.values())
-    wolves_remain = any(len(p) > 0 for p in board.wolf_cards.values())
+    monkeys_remain = board.count(Team.monkey) > 0
+    wolves_remain = board.count(Team.wolf) > 0
     if monkeys_remain:
         if wolves_remain:
             return None
@@ -26,22 +33,25 @@ def victorious_team(board: Board) -> Team | None:
 
 def find_first_winning_move(all_completed_moves: list[CompletedMoves]) -> CompletedMoves | None:
     for completed_moves in all_completed_moves:
-        if victorious_team(completed_moves.board) == completed_moves.team:
+        if is_winning_move(completed_moves):
             return completed_moves
     return None
 
 
-def movable_card_indices(
-    cards: defaultdict[int, list[Card]], category: Category, used_joker: bool
-) -> list[tuple[int, int]]:
+def is_winning_move(completed_moves: CompletedMoves) -> bool:
+    return victorious_team(completed_moves.board) == completed_moves.team
+
+
+def movable_card_indices(board: Board, team: Team, category: Category, used_joker: bool) -> list[tuple[int, int]]:
     indices = []
-    for pile_index, pile_cards in cards.items():
-        height_of_pile = len(pile_cards)
+    data = board.data
+    for pile_index, height_of_pile in enumerate(board.heights(team)):
         accessible_start = max(0, height_of_pile - 3)
+        pile_offset = team * TEAM_CARDS_LENGTH + pile_index * PILE_CAPACITY
 
         for card_index in range(accessible_start, height_of_pile):
-            card_category = pile_cards[card_index].category
+            card_category = (data[pile_offset + card_index] & CHECK_CATEGORY) >> 4
             if card_category == category or (not used_joker and card_category == Category.joker):
                 indices.append((pile_index, card_index))
 
-    return sorted(indices)
+    return indices
@@ -0,0 +1,89 @@
+import numpy as np
+import numpy.typing as npt
+
+from ninja_taisen.objects.types import (
+    BOARD_BYTES,
+    BOARD_LENGTH,
+    CHECK_STRENGTH,
+    HEIGHTS_OFFSET,
+    MONKEY_PILE_WEIGHTS,
+    PILE_CAPACITY,
+    STRENGTH_WEIGHTS,
+    WOLF_PILE_WEIGHTS,
+    CompletedMoves,
+    Team,
+)
+
+# victorious_teams() uses this where board_inspector.victorious_team() would return None
+NO_VICTOR = -1
+
+PILE_WEIGHTS_ARRAY = np.array([MONKEY_PILE_WEIGHTS, WOLF_PILE_WEIGHTS], dtype=np.int64)
+# Indexed by card code rather than strength, which saves masking every code before the lookup. NULL_CODE has weight 0
+STRENGTH_WEIGHT_BY_CODE = np.array(
+    [
+        STRENGTH_WEIGHTS[code & CHECK_STRENGTH] if code & CHECK_STRENGTH < len(STRENGTH_WEIGHTS) else 0
+        for code in range(256)
+    ],
+    dtype=np.uint8,
+)
+
+
+class CandidateBatch:
+    """
+    The boards of a set of candidate moves, packed into arrays so that they can all be scored with vectorised ops:
+    - cards: (n_candidates, 2, BOARD_LENGTH, PILE_CAPACITY) card codes, indexed by team, pile and card. Slots above the
+      pile height are NULL_CODE
+    - heights: (n_candidates, 2, BOARD_LENGTH) pile heights, indexed by team and pile
+    Each Board is already laid out this way in its bytearray, so packing is a single join followed by reshapes
+    """
+
+    def __init__(self, data: npt.NDArray[np.uint8]) -> None:
+        """
+        :param data: (n_candidates, BOARD_BYTES) the data of each candidate board, laid out as in Board.data
+        """
+        self.cards = data[:, :HEIGHTS_OFFSET].reshape(-1, 2, BOARD_LENGTH, PILE_CAPACITY)
+        self.heights = data[:, HEIGHTS_OFFSET:].reshape(-1, 2, BOARD_LENGTH)
+
+    @classmethod
+    def from_moves(cls, all_completed_moves: list[CompletedMoves]) -> CandidateBatch:
+        joined = b"".join(m.board.data for m in all_completed_moves)
+        return CandidateBatch(np.frombuffer(joined, dtype=np.uint8).reshape(len(all_completed_moves), BOARD_BYTES))
+
+    def __len__(self) -> int:
+        return self.heights.shape[0]
+
+    def counts(self) -> npt.NDArray[np.int64]:
+        """
+        :return: (n_candidates, 2) the number of cards each team has left
+        """
+        return self.heights.sum(axis=2, dtype=np.int64)
+
+    def position_totals(self) -> npt.NDArray[np.int64]:
+        """
+        :return: (n_candidates, 2) as Board.position_total, for each team
+        """
+        return (self.heights * PILE_WEIGHTS_ARRAY).sum(axis=2)
+
+    def strength_totals(self) -> npt.NDArray[np.int64]:
+        """
+        :return: (n_candidates, 2) as Board.strength_total, for each team. Empty slots have weight 0
+        """
+        # np.take is markedly faster than fancy indexing for a lookup table this small
+        weights = np.take(STRENGTH_WEIGHT_BY_CODE, self.cards).reshape(len(self), 2, BOARD_LENGTH * PILE_CAPACITY)
+        return weights.sum(axis=2, dtype=np.int64)
+
+    def victorious_teams(self) -> npt.NDArray[np.int8]:
+        """
+        :return: (n_candidates,) as board_inspector.victorious_team, with NO_VICTOR in place of None
+        """
+        counts = self.counts()
+        monkeys_remain = counts[:, Team.monkey] > 0
+        wolves_remain = counts[:, Team.wolf] > 0
+
+        # Later assignments take precedence, so these run in reverse order of the checks in victorious_team()
+        winners = np.full(len(self), NO_VICTOR, dtype=np.int8)
+        winners[wolves_remain & ~monkeys_remain] = Team.wolf
+        winners[monkeys_remain & ~wolves_remain] = Team.monkey
+        winners[self.heights[:, Team.wolf, 0] > 0] = Team.wolf
+        winners[self.heights[:, Team.monkey, BOARD_LENGTH - 1] > 0] = Team.monkey
+        return winners
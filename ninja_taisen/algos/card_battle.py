@@ -1,68 +1,106 @@
-from ninja_taisen.objects.types import BattleResult, BattleStatus, Card, Category, Team
+from typing import NamedTuple
 
+from ninja_taisen.objects.types import (
+    CHECK_CATEGORY,
+    CHECK_STRENGTH,
+    BattleResult,
+    BattleStatus,
+    Card,
+    Category,
+    Team,
+)
 
-def battle_winner(card_a: Card, card_b: Card, joker_strengths: dict[Team, int]) -> BattleResult:
-    if card_a.category == Category.joker:
-        if card_b.category == Category.joker:
-            return _joker_versus_joker(card_a, card_b, joker_strengths)
-        else:
-            return _joker_versus_non_joker(card_a, card_b, joker_strengths)
-    elif card_b.category == Category.joker:
-        result = _joker_versus_non_joker(card_b, card_a, joker_strengths)
-        return BattleResult(status=result.status.other(), winner=result.winner)
-    elif card_a.category == card_b.category:
-        return _strength_winner(card_a, card_b, joker_strengths)
-    else:
-        return _rock_paper_scissors_winner(card_a, card_b)
+JOKER_BITS = Category.joker << 4
 
 
-def _joker_versus_joker(joker_a: Card, joker_b: Card, joker_strengths: dict[Team, int]) -> BattleResult:
-    assert joker_a.category == Category.joker, f"Expected {joker_a} to be a joker"
-    assert joker_b.category == Category.joker, f"Expected {joker_b} to be a joker"
+class BattleOutcome(NamedTuple):
+    status: BattleStatus
+    # Amounts to add to the joker strengths of card_a's and card_b's teams. Zero unless that card is a joker
+    joker_delta_a: int
+    joker_delta_b: int
 
-    result = _strength_winner(joker_a, joker_b, joker_strengths)
-    if result.winner is None:
-        joker_strengths[Team.monkey] = 0
-        joker_strengths[Team.wolf] = 0
+
+def battle_winner(card_a: Card, card_b: Card, joker_strengths: dict[Team, int]) -> BattleResult:
+    outcome = battle_outcome(
+        card_a.to_code(), card_b.to_code(), joker_strengths[card_a.team], joker_strengths[card_b.team]
+    )
+    joker_strengths[card_a.team] += outcome.joker_delta_a
+    joker_strengths[card_b.team] += outcome.joker_delta_b
+
+    if outcome.status == BattleStatus.card_a_wins:
+        return BattleResult(status=outcome.status, winner=card_a)
+    elif outcome.status == BattleStatus.card_b_wins:
+        return BattleResult(status=outcome.status, winner=card_b)
     else:
-        joker_strengths[result.winner.team] -= min(joker_strengths.values())
+        return BattleResult(status=outcome.status, winner=None)
+
 
-    return result
+def battle_outcome(card_a: int, card_b: int, joker_strength_a: int, joker_strength_b: int) -> BattleOutcome:
+    """
+    Look up the outcome of a battle between two cards in BATTLE_OUTCOMES
+    :param card_a: the code of card_a
+    :param card_b: the code of card_b
+    :param joker_strength_a: the current joker strength of card_a's team, used in place of card_a's strength if it is
+        a joker
+    :param joker_strength_b: as joker_strength_a, for card_b
+    """
+    if card_a & CHECK_CATEGORY == JOKER_BITS:
+        card_a = (card_a & ~CHECK_STRENGTH) | joker_strength_a
+    if card_b & CHECK_CATEGORY == JOKER_BITS:
+        card_b = (card_b & ~CHECK_STRENGTH) | joker_strength_b
+    return BATTLE_OUTCOMES[(__card_index(card_a) << CARD_INDEX_BITS) | __card_index(card_b)]
 
 
-def _joker_versus_non_joker(joker: Card, non_joker: Card, joker_strengths: dict[Team, int]) -> BattleResult:
-    assert joker.category == Category.joker, f"Expected {joker} to be a joker"
+# As in src/battle.rs, every card fits in 6 bits once the non-null bit and the (always zero) top strength bit are
+# dropped. With a joker's current strength substituted for its printed strength, the outcome of a battle depends only on
+# the two cards, so every outcome fits in a 64 x 64 table
+CARD_INDEX_BITS = 6
 
-    result = _strength_winner(joker, non_joker, joker_strengths)
 
-    if result.winner is None:
-        joker_strengths[joker.team] = 0
-    elif result.winner.category == Category.joker:
-        joker_strengths[joker.team] -= non_joker.strength
+def __card_index(code: int) -> int:
+    return ((code >> 1) & 0b0_0_11_1000) | (code & 0b0_0_00_0111)
 
-    return result
 
+def __card_from_index(index: int) -> Card:
+    return Card(team=Team(index >> 5), category=Category((index >> 3) & 0b11), strength=index & 0b111)
 
-def _strength_winner(card_a: Card, card_b: Card, joker_strengths: dict[Team, int]) -> BattleResult:
-    card_a_strength = card_a.strength if card_a.category != Category.joker else joker_strengths[card_a.team]
-    card_b_strength = card_b.strength if card_b.category != Category.joker else joker_strengths[card_b.team]
 
-    if card_a_strength > card_b_strength:
-        return BattleResult(status=BattleStatus.card_a_wins, winner=card_a)
-    if card_a_strength < card_b_strength:
-        return BattleResult(status=BattleStatus.card_b_wins, winner=card_b)
+def __compute_outcome(card_a: Card, card_b: Card) -> BattleOutcome:
+    """
+    Work out the outcome of a battle from first principles, where each joker's strength is its current strength
+    """
+    a_is_joker = card_a.category == Category.joker
+    b_is_joker = card_b.category == Category.joker
+
+    if a_is_joker or b_is_joker or card_a.category == card_b.category:
+        if card_a.strength > card_b.strength:
+            status = BattleStatus.card_a_wins
+        elif card_a.strength < card_b.strength:
+            status = BattleStatus.card_b_wins
+        else:
+            status = BattleStatus.draw
+    elif (card_a.category - card_b.category) % 3 == 1:
+        status = BattleStatus.card_a_wins
     else:
-        return BattleResult(status=BattleStatus.draw, winner=None)
+        status = BattleStatus.card_b_wins
 
+    # A joker which wins loses the strength of the card it beat; a joker which draws loses all its strength
+    joker_delta_a, joker_delta_b = 0, 0
+    if a_is_joker and status == BattleStatus.card_a_wins:
+        joker_delta_a = -card_b.strength
+    elif b_is_joker and status == BattleStatus.card_b_wins:
+        joker_delta_b = -card_a.strength
+    elif status == BattleStatus.draw:
+        joker_delta_a = -card_a.strength if a_is_joker else 0
+        joker_delta_b = -card_b.strength if b_is_joker else 0
 
-# Assumes the cards have different combat categories and neither is a joker
-def _rock_paper_scissors_winner(card_a: Card, card_b: Card) -> BattleResult:
-    assert card_a.category != Category.joker, f"Expected {card_a} to not be a joker"
-    assert card_b.category != Category.joker, f"Expected {card_b} to not be a joker"
-    assert card_a.category != card_b.category, f"Expected {card_a},{card_b} to have different categories"
+    return BattleOutcome(status=status, joker_delta_a=joker_delta_a, joker_delta_b=joker_delta_b)
 
-    card_a_wins = (card_a.category.value - card_b.category.value) % 3 == 1
-    if card_a_wins:
-        return BattleResult(status=BattleStatus.card_a_wins, winner=card_a)
-    else:
-        return BattleResult(status=BattleStatus.card_b_wins, winner=card_b)
+
+def __battle_outcomes() -> list[BattleOutcome]:
+    cards = [__card_from_index(index) for index in range(1 << CARD_INDEX_BITS)]
+    return [__compute_outcome(card_a, card_b) for card_a in cards for card_b in cards]
+
+
+# The outcome of every battle, indexed by the 6-bit card indices of card_a and card_b
+BATTLE_OUTCOMES = __battle_outcomes()
@@ -1,15 +1,16 @@
 import logging
-from collections import defaultdict
+from time import perf_counter
 
 from ninja_taisen.algos import card_battle
 from ninja_taisen.objects.types import (
     BOARD_LENGTH,
+    CARD_BY_CODE,
     DTO_BY_TEAM,
     BattleStatus,
     Board,
-    Card,
     Team,
 )
+from ninja_taisen.utils.phase_stats import Phase, phase_stats
 
 log = logging.getLogger(__name__)
 
@@ -22,18 +23,29 @@ class CardMover:
         """
         self.board = board
         self.remaining_battles: list[int] = []
-        self.joker_strengths = {Team.monkey: 4, Team.wolf: 4}
+        # Indexed by Team
+        self.joker_strengths = [4, 4]
+        # The number of card battles fought so far
+        self.battle_count = 0
 
     def move_card_and_resolve_battles(self, team: Team, dice_roll: int, pile_index: int, card_index: int) -> None:
         log.debug("Starting board\n%s", self.board)
         self.__move_card(team=team, dice_roll=dice_roll, pile_index=pile_index, card_index=card_index)
 
+        stats = phase_stats()
+        if stats is not None:
+            start = perf_counter()
+            battle_count = self.battle_count
+
         while self.remaining_battles:
             log.debug("remaining_battles=%s", self.remaining_battles)
             self.__resolve_battle(pile_index=self.remaining_battles[-1], team=team)
 
-        self.__remove_empty_piles(self.board.monkey_cards)
-        self.__remove_empty_piles(self.board.wolf_cards)
+        if stats is not None:
+            stats.seconds[Phase.battle_resolution] += perf_counter() - start
+            stats.card_moves += 1
+            stats.battles += self.battle_count - battle_count
+
         self.joker_strengths[Team.monkey] = 4
         self.joker_strengths[Team.wolf] = 4
 
@@ -58,21 +70,13 @@ class CardMover:
             card_index,
         )
 
-        team_cards = self.board.cards(team)
         new_pile_index = pile_index + dice_roll if team == Team.monkey else pile_index - dice_roll
         new_pile_index = max(0, min(new_pile_index, BOARD_LENGTH - 1))
 
-        cards_moved = 0
-        for index_in_pile in range(card_index, len(team_cards[pile_index])):
-            card_to_move = team_cards[pile_index][index_in_pile]
-            team_cards[new_pile_index].append(card_to_move)
-            cards_moved += 1
-
-        for _ in range(cards_moved):
-            team_cards[pile_index].pop()
+        self.board.move_cards(team=team, pile_index=pile_index, card_index=card_index, new_pile_index=new_pile_index)
 
         self.remaining_battles.append(new_pile_index)
-        log.debug(f"Board after card move, pre-battles\n{self.board}")
+        log.debug("Board after card move, pre-battles\n%s", self.board)
 
     def __resolve_battle(self, pile_index: int, team: Team) -> None:
         """
@@ -81,69 +85,70 @@ class CardMover:
         :param team: The team whose turn it is. This affects how a draw is resolved
         :return:
         """
-        monkey_pile = self.board.monkey_cards[pile_index]
-        wolf_pile = self.board.wolf_cards[pile_index]
-
-        while monkey_pile and wolf_pile:
-            log.debug("Battle between M%s and W%s in pile %s", monkey_pile[-1], wolf_pile[-1], pile_index)
-            battle_result = card_battle.battle_winner(monkey_pile[-1], wolf_pile[-1], self.joker_strengths)
+        board = self.board
+        monkey_height = board.height(Team.monkey, pile_index)
+        wolf_height = board.height(Team.wolf, pile_index)
+
+        while monkey_height and wolf_height:
+            monkey_code = board.card_code(Team.monkey, pile_index, monkey_height - 1)
+            wolf_code = board.card_code(Team.wolf, pile_index, wolf_height - 1)
+            monkey_card, wolf_card = CARD_BY_CODE[monkey_code], CARD_BY_CODE[wolf_code]
+            log.debug("Battle between M%s and W%s in pile %s", monkey_card, wolf_card, pile_index)
+            battle_result = card_battle.battle_outcome(
+                monkey_code, wolf_code, self.joker_strengths[Team.monkey], self.joker_strengths[Team.wolf]
+            )
+            self.battle_count += 1
+            self.joker_strengths[Team.monkey] += battle_result.joker_delta_a
+            self.joker_strengths[Team.wolf] += battle_result.joker_delta_b
 
             if battle_result.status == BattleStatus.card_a_wins:
-                log.debug("Removing W%s on top of pile %s", wolf_pile[-1], pile_index)
-                wolf_pile.pop()
+                log.debug("Removing W%s on top of pile %s", wolf_card, pile_index)
+                board.remove_top_card(Team.wolf, pile_index)
 
             elif battle_result.status == BattleStatus.card_b_wins:
-                log.debug("Removing M%s on top of pile %s", monkey_pile[-1], pile_index)
-                monkey_pile.pop()
+                log.debug("Removing M%s on top of pile %s", monkey_card, pile_index)
+                board.remove_top_card(Team.monkey, pile_index)
 
             elif battle_result.status == BattleStatus.draw:
                 #  If the result is a draw, both cards move one space back (unless the battle takes place on a home)
                 #  Any future battles are resolved starting with those closest to the team's home
                 if team == Team.monkey:
                     if pile_index == BOARD_LENGTH - 1:
-                        log.debug("Draw in wolf home - removing W%s", wolf_pile[-1])
-                        wolf_pile.pop()
+                        log.debug("Draw in wolf home - removing W%s", wolf_card)
+                        board.remove_top_card(Team.wolf, pile_index)
                     else:
                         log.debug(
                             "Draw - both cards retreat, schedule adjacent battles\n%s",
                             self.board,
                         )
                         self.__move_card(
-                            team=Team.wolf, pile_index=pile_index, card_index=len(wolf_pile) - 1, dice_roll=-1
+                            team=Team.wolf, pile_index=pile_index, card_index=wolf_height - 1, dice_roll=-1
                         )
                         self.__move_card(
-                            team=Team.monkey, pile_index=pile_index, card_index=len(monkey_pile) - 1, dice_roll=-1
+                            team=Team.monkey, pile_index=pile_index, card_index=monkey_height - 1, dice_roll=-1
                         )
                 elif team == Team.wolf:
                     if pile_index == 0:
-                        log.debug("Draw in monkey home - removing M%s", monkey_pile[-1])
-                        monkey_pile.pop()
+                        log.debug("Draw in monkey home - removing M%s", monkey_card)
+                        board.remove_top_card(Team.monkey, pile_index)
                     else:
                         log.debug(
                             "Draw - both cards retreat, schedule adjacent battles\n%s",
                             self.board,
                         )
                         self.__move_card(
-                            team=Team.monkey, pile_index=pile_index, card_index=len(monkey_pile) - 1, dice_roll=-1
+                            team=Team.monkey, pile_index=pile_index, card_index=monkey_height - 1, dice_roll=-1
                         )
                         self.__move_card(
-                            team=Team.wolf, pile_index=pile_index, card_index=len(wolf_pile) - 1, dice_roll=-1
+                            team=Team.wolf, pile_index=pile_index, card_index=wolf_height - 1, dice_roll=-1
                         )
                 else:
                     raise ValueError(f"Unexpected team: {team}")
             else:
                 raise ValueError(f"Unexpected battle_result.status: {battle_result.status}")
 
+            monkey_height = board.height(Team.monkey, pile_index)
+            wolf_height = board.height(Team.wolf, pile_index)
+
         log.debug("All battles at pile_index %s resolved - board\n%s", pile_index, self.board)
         self.remaining_battles = [i for i in self.remaining_battles if i != pile_index]
-
-    @staticmethod
-    def __remove_empty_piles(card_piles: defaultdict[int, list[Card]]) -> None:
-        """
-        Save memory by removing empty card piles from the final board
-        :param card_piles: Remaining cards for a team
-        :return:
-        """
-        empty_pile_indices = [i for i in card_piles if len(card_piles[i]) == 0]
-        for index in empty_pile_indices:
-            card_piles.pop(index)
@@ -1,15 +1,21 @@
 import datetime
 import logging
-import math
 import multiprocessing
+import threading
+from collections.abc import Iterable, Iterator
+from functools import partial
+from itertools import batched
 from logging import getLogger
 from pathlib import Path
 from time import perf_counter
+from typing import Any, NamedTuple
 
 import polars as pl
-from pydantic import BaseModel
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
 
 from ninja_taisen.algos import board_builder, board_inspector, move_gatherer
+from ninja_taisen.algos.candidate_batch import NO_VICTOR
+from ninja_taisen.algos.lockstep_runner import LockstepRunner
 from ninja_taisen.dtos import (
     ChooseRequest,
     ChooseResponse,
@@ -24,6 +30,9 @@ from ninja_taisen.objects.types import DTO_BY_TEAM, Category, Move, Team
 from ninja_taisen.strategy.strategy import IStrategy
 from ninja_taisen.strategy.strategy_lookup import lookup_strategy
 from ninja_taisen.utils.logging_setup import setup_logging
+from ninja_taisen.utils.phase_stats import Phase, PhaseStats, collect_phase_stats, phase_stats, timed
+from ninja_taisen.utils.results_manifest import ManifestEntry, ResultsManifest, id_ranges
+from ninja_taisen.utils.shared_results import SharedResultColumns
 
 log = getLogger(__name__)
 
@@ -45,21 +54,9 @@ class GameRunner:
 
     def execute(self, instruction: InstructionDto) -> ResultDto:
         start_time = datetime.datetime.now(datetime.UTC)
-
-        team = self.starting_team
-        victorious_team: Team | None = None
-        turn_count = 0
-        while victorious_team is None and turn_count < 100:
-            self.__execute_turn(turn_count, team)
-
-            victorious_team = board_inspector.victorious_team(self.board)
-            team = team.other()
-            turn_count += 1
-
-        if self.serialisation_dir:
-            self.board.to_dto().to_json_file(self.serialisation_dir / "final_board.json")
-
+        victorious_team, turn_count = self.play()
         end_time = datetime.datetime.now(datetime.UTC)
+
         result = ResultDto(
             id=instruction.id,
             seed=instruction.seed,
@@ -67,8 +64,8 @@ class GameRunner:
             wolf_strategy=instruction.wolf_strategy,
             winner=DTO_BY_TEAM[victorious_team].value if victorious_team is not None else "none",
             turn_count=turn_count,
-            monkey_cards_left=sum(len(pile) for pile in self.board.monkey_cards.values()),
-            wolf_cards_left=sum(len(pile) for pile in self.board.wolf_cards.values()),
+            monkey_cards_left=self.board.count(Team.monkey),
+            wolf_cards_left=self.board.count(Team.wolf),
             start_time=start_time,
             end_time=end_time,
             process_name=multiprocessing.current_process().name,
@@ -80,6 +77,29 @@ class GameRunner:
 
         return result
 
+    def play(self) -> tuple[Team | None, int]:
+        """
+        :return: the victorious team, if any, and the number of turns taken
+        """
+        team = self.starting_team
+        victorious_team: Team | None = None
+        turn_count = 0
+        while victorious_team is None and turn_count < 100:
+            self.__execute_turn(turn_count, team)
+
+            victorious_team = board_inspector.victorious_team(self.board)
+            team = team.other()
+            turn_count += 1
+
+        stats = phase_stats()
+        if stats is not None:
+            stats.games += 1
+
+        if self.serialisation_dir:
+            self.board.to_dto().to_json_file(self.serialisation_dir / "final_board.json")
+
+        return victorious_team, turn_count
+
     def __execute_turn(self, turn_index: int, team: Team) -> None:
         dice_rolls = {
             Category.rock: self.random.roll_dice(),
@@ -90,11 +110,15 @@ class GameRunner:
         if self.serialisation_dir:
             self.__serialise_request(turn_index, team, dice_rolls)
 
-        all_permitted_moves = move_gatherer.gather_all_permitted_moves(
+        permitted_moves = move_gatherer.iter_permitted_moves(
             starting_board=self.board, team=team, dice_rolls=dice_rolls
         )
-        if all_permitted_moves:
-            chosen_moves = self.strategies[team].choose_moves(all_permitted_moves)
+        choose_moves = self.strategies[team].choose_moves_streaming
+        stats = phase_stats()
+        chosen_moves = (
+            choose_moves(permitted_moves) if stats is None else stats.time_turn(choose_moves, permitted_moves)
+        )
+        if chosen_moves is not None:
             self.board = chosen_moves.board
             if self.serialisation_dir:
                 self.__serialise_response(turn_index, chosen_moves.moves)
@@ -122,56 +146,340 @@ class GameRunner:
 
 
 def simulate_one(instruction: InstructionDto, serialisation_dir: Path | None) -> ResultDto:
-    random = SafeRandom(instruction.seed)
+    game_runner = __make_game_runner(
+        instruction.seed, instruction.monkey_strategy, instruction.wolf_strategy, serialisation_dir
+    )
+    return game_runner.execute(instruction)
 
-    monkey_strategy = lookup_strategy(instruction.monkey_strategy, random)
-    wolf_strategy = lookup_strategy(instruction.wolf_strategy, random)
 
-    game_runner = GameRunner(
-        monkey_strategy=monkey_strategy,
-        wolf_strategy=wolf_strategy,
+def __make_game_runner(
+    seed: int, monkey_strategy: str, wolf_strategy: str, serialisation_dir: Path | None
+) -> GameRunner:
+    random = SafeRandom(seed)
+    return GameRunner(
+        monkey_strategy=lookup_strategy(monkey_strategy, random),
+        wolf_strategy=lookup_strategy(wolf_strategy, random),
         starting_team=Team.monkey,
         random=random,
         serialisation_dir=serialisation_dir,
     )
-    return game_runner.execute(instruction)
+
+
+# Bulk simulation passes instructions and results around as DataFrames with these schemas, one column per field of
+# InstructionDto and ResultDto, rather than as lists of pydantic objects
+INSTRUCTIONS_SCHEMA = pl.Schema(
+    {"id": pl.Int64(), "seed": pl.Int64(), "monkey_strategy": pl.String(), "wolf_strategy": pl.String()}
+)
+RESULTS_SCHEMA = pl.Schema(
+    {
+        **INSTRUCTIONS_SCHEMA,
+        "winner": pl.String(),
+        "turn_count": pl.Int64(),
+        "monkey_cards_left": pl.Int64(),
+        "wolf_cards_left": pl.Int64(),
+        "start_time": pl.Datetime("us"),
+        "end_time": pl.Datetime("us"),
+        "process_name": pl.String(),
+    }
+)
+# simulate(stats=True) writes a table of PhaseStats beside the results, with a row per worker
+STATS_SCHEMA = pl.Schema(
+    {
+        "worker": pl.String(),
+        "games": pl.Int64(),
+        "turns": pl.Int64(),
+        "candidates": pl.Int64(),
+        "card_moves": pl.Int64(),
+        "battles": pl.Int64(),
+        "turns_per_game": pl.Float64(),
+        "candidates_per_turn": pl.Float64(),
+        "battles_per_move": pl.Float64(),
+        "move_generation_s": pl.Float64(),
+        "battle_resolution_s": pl.Float64(),
+        "strategy_scoring_s": pl.Float64(),
+        "dto_conversion_s": pl.Float64(),
+        "result_writing_s": pl.Float64(),
+    }
+)
+
+
+def instructions_to_df(instructions: Iterable[InstructionDto]) -> pl.DataFrame:
+    columns: dict[str, list[Any]] = {name: [] for name in INSTRUCTIONS_SCHEMA}
+    for instruction in instructions:
+        columns["id"].append(instruction.id)
+        columns["seed"].append(instruction.seed)
+        columns["monkey_strategy"].append(instruction.monkey_strategy)
+        columns["wolf_strategy"].append(instruction.wolf_strategy)
+    return pl.DataFrame(columns, schema=INSTRUCTIONS_SCHEMA)
+
+
+def instruction_batches(
+    instructions: Iterable[InstructionDto] | pl.DataFrame, per_process: int
+) -> Iterator[pl.DataFrame]:
+    """
+    Lazily split the instructions into DataFrames of at most per_process rows
+    """
+    if isinstance(instructions, pl.DataFrame):
+        yield from instructions.select(INSTRUCTIONS_SCHEMA.keys()).cast(INSTRUCTIONS_SCHEMA).iter_slices(per_process)
+    else:
+        for chunk in batched(instructions, per_process, strict=False):
+            yield instructions_to_df(chunk)
+
+
+class BatchResult(NamedTuple):
+    id: int
+    seed: int
+    monkey_strategy: str
+    wolf_strategy: str
+    winner: str
+    turn_count: int
+    monkey_cards_left: int
+    wolf_cards_left: int
+    start_time: datetime.datetime
+    end_time: datetime.datetime
+
+
+def play_batch(
+    instructions: pl.DataFrame, serialisation_dir: Path | None, lockstep: bool = False
+) -> Iterator[BatchResult]:
+    """
+    Lazily play each game in a batch of instructions, logging the progress of the batch as a whole
+    :param instructions: a DataFrame with INSTRUCTIONS_SCHEMA
+    :param lockstep: play the whole batch at once with the LockstepRunner, rather than one game at a time. The results
+        are the same, but all of them arrive once the batch's longest game is complete
+    """
+    process_name = multiprocessing.current_process().name
+    log_suffix = f"chunk with ids {instructions['id'][0]}-{instructions['id'][-1]} in process {process_name}"
+    log.info(f"Starting {log_suffix}")
+    start = perf_counter()
+
+    if lockstep:
+        if serialisation_dir:
+            raise ValueError("Cannot serialise games played in lockstep")
+        yield from __play_lockstep(instructions)
+    else:
+        yield from __play_one_at_a_time(instructions, serialisation_dir)
+
+    stop = perf_counter()
+    log.info(f"Completed {log_suffix} in {stop - start:0.1f} seconds")
+
+
+def __play_one_at_a_time(instructions: pl.DataFrame, serialisation_dir: Path | None) -> Iterator[BatchResult]:
+    for id_, seed, monkey_strategy, wolf_strategy in instructions.iter_rows():
+        start_time = datetime.datetime.now(datetime.UTC)
+        game_runner = __make_game_runner(seed, monkey_strategy, wolf_strategy, serialisation_dir)
+        victorious_team, turn_count = game_runner.play()
+        end_time = datetime.datetime.now(datetime.UTC)
+
+        yield BatchResult(
+            id=id_,
+            seed=seed,
+            monkey_strategy=monkey_strategy,
+            wolf_strategy=wolf_strategy,
+            winner=DTO_BY_TEAM[victorious_team].value if victorious_team is not None else "none",
+            turn_count=turn_count,
+            monkey_cards_left=game_runner.board.count(Team.monkey),
+            wolf_cards_left=game_runner.board.count(Team.wolf),
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+
+def __play_lockstep(instructions: pl.DataFrame) -> Iterator[BatchResult]:
+    start_time = datetime.datetime.now(datetime.UTC)
+    runner = LockstepRunner(
+        seeds=instructions["seed"].to_list(),
+        monkey_strategies=instructions["monkey_strategy"].to_list(),
+        wolf_strategies=instructions["wolf_strategy"].to_list(),
+    )
+    runner.play()
+
+    victorious_teams = runner.victorious_teams.tolist()
+    turn_counts = runner.turn_counts.tolist()
+    monkey_cards_left = runner.cards_left(Team.monkey).tolist()
+    wolf_cards_left = runner.cards_left(Team.wolf).tolist()
+    for row, (id_, seed, monkey_strategy, wolf_strategy) in enumerate(instructions.iter_rows()):
+        end_time = runner.end_times[row]
+        assert end_time is not None
+        yield BatchResult(
+            id=id_,
+            seed=seed,
+            monkey_strategy=monkey_strategy,
+            wolf_strategy=wolf_strategy,
+            winner=DTO_BY_TEAM[Team(victorious_teams[row])].value if victorious_teams[row] != NO_VICTOR else "none",
+            turn_count=turn_counts[row],
+            monkey_cards_left=monkey_cards_left[row],
+            wolf_cards_left=wolf_cards_left[row],
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+
+def simulate_batch(instructions: pl.DataFrame, serialisation_dir: Path | None, lockstep: bool = False) -> pl.DataFrame:
+    """
+    Simulate a batch of instructions, accumulating the results column by column
+    :param instructions: a DataFrame with INSTRUCTIONS_SCHEMA
+    :param lockstep: as in play_batch
+    :return: a DataFrame with RESULTS_SCHEMA
+    """
+    process_name = multiprocessing.current_process().name
+    results: dict[str, list[Any]] = {name: [] for name in RESULTS_SCHEMA}
+    for result in play_batch(instructions, serialisation_dir, lockstep):
+        with timed(Phase.dto_conversion):
+            for name, value in zip(BatchResult._fields, result, strict=True):
+                results[name].append(value)
+            results["process_name"].append(process_name)
+    with timed(Phase.dto_conversion):
+        return pl.DataFrame(results, schema=RESULTS_SCHEMA)
+
+
+class WorkerStats(NamedTuple):
+    worker: str
+    stats: PhaseStats
+
+
+def worker_stats(stats: PhaseStats | None) -> WorkerStats | None:
+    """
+    :return: the stats collected in this process, if any, labelled with the name of the process
+    """
+    return None if stats is None else WorkerStats(worker=multiprocessing.current_process().name, stats=stats)
+
+
+def stats_to_df(all_worker_stats: Iterable[WorkerStats | None]) -> pl.DataFrame:
+    """
+    Aggregate the stats of each worker, which may have collected stats for several chunks. None is skipped
+    :return: a DataFrame with STATS_SCHEMA, with a row per worker in the order they were first seen
+    """
+    stats_by_worker: dict[str, PhaseStats] = {}
+    for worker_stats_ in all_worker_stats:
+        if worker_stats_ is not None:
+            stats_by_worker.setdefault(worker_stats_.worker, PhaseStats()).merge(worker_stats_.stats)
+    rows = [{"worker": worker, **stats.to_row()} for worker, stats in stats_by_worker.items()]
+    return pl.DataFrame(rows, schema=STATS_SCHEMA)
+
+
+def write_stats(df: pl.DataFrame, results_dir: Path, results_format: ResultsFormat) -> None:
+    stats_file = results_dir / f"stats.{results_format}"
+    if results_format == "parquet":
+        df.write_parquet(stats_file)
+    elif results_format == "csv":
+        df.write_csv(stats_file)
+    else:
+        raise ValueError(f"Unexpected results_format '{results_format}'")
+    log.info(f"Stats available: {stats_file}")
+
+
+def simulate_batch_with_stats(
+    instructions: pl.DataFrame, serialisation_dir: Path | None, lockstep: bool, stats: bool
+) -> tuple[pl.DataFrame, WorkerStats | None]:
+    """
+    As simulate_batch, collecting PhaseStats while doing so if stats is True
+    """
+    with collect_phase_stats(stats) as collected:
+        df = simulate_batch(instructions, serialisation_dir, lockstep)
+    return df, worker_stats(collected)
 
 
 # We have to put all arguments for the multiprocessing subprocess into a class which can be pickled
-class SubprocessArgs(BaseModel):
-    instructions: list[InstructionDto]
+class SubprocessArgs(NamedTuple):
+    instructions: pl.DataFrame
     results_dir: Path
     results_format: ResultsFormat
     verbosity: int
     log_file: Path | None
     serialisation_dir: Path | None
+    lockstep: bool
+    stats: bool
 
 
-def simulate_many_subprocess(args: SubprocessArgs) -> bool:
+def simulate_many_subprocess(args: SubprocessArgs) -> tuple[ManifestEntry, WorkerStats | None]:
     setup_logging(verbosity=args.verbosity, log_file=args.log_file)
 
-    chunk_name = f"{args.instructions[0].id}-{args.instructions[-1].id}"
-    log_suffix = f"chunk with ids {chunk_name} in process {multiprocessing.current_process().name}"
-    log.info(f"Starting {log_suffix}")
+    with collect_phase_stats(args.stats) as collected:
+        df = simulate_batch(args.instructions, args.serialisation_dir, args.lockstep)
+        entry = write_chunk_results(df, args.results_dir, args.results_format)
+    return entry, worker_stats(collected)
+
+
+def write_chunk_results(df: pl.DataFrame, chunk_results_dir: Path, results_format: ResultsFormat) -> ManifestEntry:
+    """
+    Write one chunk of results, via a temporary file so that an interruption never leaves a truncated chunk behind
+    :return: the entry to record in the ResultsManifest once the chunk is safely on disk
+    """
+    results_file = chunk_results_dir / f"results_{df['id'][0]}-{df['id'][-1]}.{results_format}"
+    partial_file = results_file.with_suffix(f".{results_format}.partial")
+    with timed(Phase.result_writing):
+        if results_format == "parquet":
+            df.write_parquet(partial_file)
+        elif results_format == "csv":
+            df.write_csv(partial_file)
+        else:
+            raise ValueError(f"Unexpected results_format '{results_format}'")
+        partial_file.replace(results_file)
+    return ManifestEntry(results_file=results_file.name, id_ranges=id_ranges(df["id"]))
+
+
+def concatenate_chunk_results(chunk_files: list[Path], results_dir: Path, results_format: ResultsFormat) -> None:
+    with timed(Phase.result_writing):
+        if results_format == "parquet":
+            results_parquet = results_dir / "results.parquet"
+            chunk_lazy_dfs = [pl.scan_parquet(p) for p in chunk_files]
+            pl.concat(chunk_lazy_dfs).sort(by="id").collect().write_parquet(results_parquet)
+            log.info(f"Final results available: {results_parquet}")
+        elif results_format == "csv":
+            results_csv = results_dir / "results.csv"
+            # Only the id needs parsing, to sort by; every other column is copied through verbatim
+            chunk_lazy_dfs = [
+                pl.scan_csv(p, infer_schema=False, schema_overrides={"id": pl.Int64}) for p in chunk_files
+            ]
+            pl.concat(chunk_lazy_dfs).sort(by="id").collect().write_csv(results_csv)
+            log.info(f"Final results available: {results_csv}")
+        else:
+            raise ValueError(f"Unexpected results_format '{results_format}'")
+
+
+class SharedMemorySubprocessArgs(NamedTuple):
+    instructions: pl.DataFrame
+    first_row: int
+    shared_memory_name: str
+    row_count: int
+    verbosity: int
+    log_file: Path | None
+    serialisation_dir: Path | None
+    lockstep: bool
+    stats: bool
 
-    start = perf_counter()
-    results = [simulate_one(i, args.serialisation_dir) for i in args.instructions]
-    df = pl.DataFrame(data=results, orient="row")
 
-    if args.results_format == "parquet":
-        df.write_parquet(args.results_dir / f"results_{chunk_name}.parquet")
-    elif args.results_format == "csv":
-        df.write_csv(args.results_dir / f"results_{chunk_name}.csv")
-    else:
-        raise ValueError(f"Unexpected results_format '{args.results_format}'")
+def simulate_many_shared_memory_subprocess(args: SharedMemorySubprocessArgs) -> tuple[str, WorkerStats | None]:
+    """
+    Simulate a chunk of instructions, writing the results straight into the rows of the shared memory block which
+    correspond to those instructions
+    :return: the name of this process, which is the same for the whole chunk, and the stats it collected if any
+    """
+    setup_logging(verbosity=args.verbosity, log_file=args.log_file)
 
-    stop = perf_counter()
-    log.info(f"Completed {log_suffix} in {stop - start:0.1f} seconds")
-    return True
+    with (
+        collect_phase_stats(args.stats) as collected,
+        SharedResultColumns(args.row_count, name=args.shared_memory_name) as shared_results,
+    ):
+        for row, result in enumerate(
+            play_batch(args.instructions, args.serialisation_dir, args.lockstep), start=args.first_row
+        ):
+            with timed(Phase.dto_conversion):
+                shared_results.write(
+                    row,
+                    winner=result.winner,
+                    turn_count=result.turn_count,
+                    monkey_cards_left=result.monkey_cards_left,
+                    wolf_cards_left=result.wolf_cards_left,
+                    start_time=result.start_time,
+                    end_time=result.end_time,
+                )
+    return multiprocessing.current_process().name, worker_stats(collected)
 
 
 def simulate_many_multi_process(
-    instructions: list[InstructionDto],
+    instructions: pl.DataFrame,
     results_dir: Path,
     results_format: ResultsFormat,
     max_processes: int,
@@ -179,19 +487,108 @@ def simulate_many_multi_process(
     verbosity: int,
     log_file: Path | None,
     serialisation_dir: Path | None,
-) -> None:
+    resume: bool = False,
+    lockstep: bool = False,
+    stats: bool = False,
+) -> list[WorkerStats]:
+    """
+    :param instructions: a DataFrame with INSTRUCTIONS_SCHEMA
+    :param resume: skip the instructions already completed according to the manifest in results_dir/chunk_results,
+        and include their chunks in the final results. A resumable run checkpoints each chunk to disk; otherwise the
+        processes share their results in memory
+    :param lockstep: play each chunk with the LockstepRunner, as in play_batch
+    :param stats: collect PhaseStats in each process
+    :return: the stats collected by each process for each chunk, if any
+    """
     assert max_processes > 0
     assert per_process > 0
+    if resume:
+        return __simulate_many_checkpointed(
+            instructions,
+            results_dir,
+            results_format,
+            max_processes,
+            per_process,
+            verbosity,
+            log_file,
+            serialisation_dir,
+            lockstep,
+            stats,
+        )
+
+    instructions = instructions.select(INSTRUCTIONS_SCHEMA.keys()).cast(INSTRUCTIONS_SCHEMA)
+    log.info(
+        f"Will assign {instructions.height} instructions in chunks of {per_process} between {max_processes} processes"
+    )
+
+    with SharedResultColumns(instructions.height) as shared_results:
+        subprocess_args = [
+            SharedMemorySubprocessArgs(
+                instructions=i_block,
+                first_row=index * per_process,
+                shared_memory_name=shared_results.name,
+                row_count=instructions.height,
+                verbosity=verbosity,
+                log_file=log_file,
+                serialisation_dir=serialisation_dir,
+                lockstep=lockstep,
+                stats=stats,
+            )
+            for index, i_block in enumerate(instructions.iter_slices(per_process))
+        ]
+
+        with multiprocessing.Pool(processes=max_processes) as pool:
+            chunk_outputs = pool.map(simulate_many_shared_memory_subprocess, subprocess_args)
+        process_names = [process_name for process_name, _ in chunk_outputs]
+
+        with timed(Phase.dto_conversion):
+            chunk_indices = pl.int_range(instructions.height, dtype=pl.Int64, eager=True) // per_process
+            results_df = pl.concat(
+                [
+                    instructions,
+                    shared_results.to_df(),
+                    pl.DataFrame({"process_name": pl.Series(process_names, dtype=pl.String).gather(chunk_indices)}),
+                ],
+                how="horizontal",
+            )
+
+    # Each row is already in the position of its instruction, so we only need to sort if the instructions weren't
+    if not results_df["id"].is_sorted():
+        results_df = results_df.sort(by="id")
+
+    results_file = results_dir / f"results.{results_format}"
+    with timed(Phase.result_writing):
+        if results_format == "parquet":
+            results_df.write_parquet(results_file)
+        elif results_format == "csv":
+            results_df.write_csv(results_file)
+        else:
+            raise ValueError(f"Unexpected results_format '{results_format}'")
+    log.info(f"Final results available: {results_file}")
+    return [chunk_stats for _, chunk_stats in chunk_outputs if chunk_stats is not None]
+
+
+def __simulate_many_checkpointed(
+    instructions: pl.DataFrame,
+    results_dir: Path,
+    results_format: ResultsFormat,
+    max_processes: int,
+    per_process: int,
+    verbosity: int,
+    log_file: Path | None,
+    serialisation_dir: Path | None,
+    lockstep: bool,
+    stats: bool,
+) -> list[WorkerStats]:
     chunk_results = results_dir / "chunk_results"
-    chunk_results.mkdir(exist_ok=True, parents=True)
+    manifest = ResultsManifest(chunk_results, resume=True)
+    instructions = manifest.remaining(instructions)
 
     log.info(
-        f"Will assign {len(instructions)} instructions in chunks of {per_process} between {max_processes} processes"
+        f"Will assign {instructions.height} instructions in chunks of {per_process} between {max_processes} processes"
     )
     log.info(f"Per-chunk results in {chunk_results}")
 
-    chunks_count = int(math.ceil(len(instructions) / per_process))
-    i_blocks = [instructions[i * per_process : (i + 1) * per_process] for i in range(chunks_count)]
     subprocess_args = [
         SubprocessArgs(
             instructions=i_block,
@@ -200,32 +597,128 @@ def simulate_many_multi_process(
             verbosity=verbosity,
             log_file=log_file,
             serialisation_dir=serialisation_dir,
+            lockstep=lockstep,
+            stats=stats,
         )
-        for i_block in i_blocks
+        for i_block in instruction_batches(instructions, per_process)
     ]
 
+    all_worker_stats = []
     with multiprocessing.Pool(processes=max_processes) as pool:
-        chunks_succeeded = list(pool.map(simulate_many_subprocess, subprocess_args))
-
-    if not all(chunks_succeeded):
-        failed = sum(0 if c else 1 for c in chunks_succeeded)
-        total = len(chunks_succeeded)
-        raise RuntimeError(f"{failed} out of {total} chunks failed when simulating game")
+        # Record each chunk as soon as it lands, so that an interrupted run can pick up from here
+        for entry, chunk_stats in pool.imap_unordered(simulate_many_subprocess, subprocess_args):
+            manifest.record(entry)
+            if chunk_stats is not None:
+                all_worker_stats.append(chunk_stats)
 
     log.info(f"All chunks completed; concatenating {results_format} results from {chunk_results}")
-    if results_format == "parquet":
-        chunk_parquets = sorted(chunk_results.glob("results_*.parquet"))
-        results_parquet = results_dir / "results.parquet"
-        chunk_lazy_dfs = [pl.scan_parquet(p) for p in chunk_parquets]
-        pl.concat(chunk_lazy_dfs).sort(by="id").collect().write_parquet(results_parquet)
-        log.info(f"Final results available: {results_parquet}")
-    elif results_format == "csv":
-        chunk_csvs = sorted(chunk_results.glob("results_*.csv"))
-        results_csv = results_dir / "results.csv"
-        chunk_lazy_dfs = [
-            pl.scan_csv(p, schema_overrides={"start_time": pl.Datetime, "end_time": pl.Datetime}) for p in chunk_csvs
-        ]
-        pl.concat(chunk_lazy_dfs).sort(by="id").collect().write_csv(results_csv)
-        log.info(f"Final results available: {results_csv}")
-    else:
-        raise ValueError(f"Unexpected results_format '{results_format}'")
+    concatenate_chunk_results(manifest.results_files(), results_dir, results_format)
+    return all_worker_stats
+
+
+class StreamingResultsWriter:
+    """
+    Appends DataFrames of results to a single file: a row group per DataFrame for parquet, or appended rows for csv
+    """
+
+    def __init__(self, results_file: Path, results_format: ResultsFormat) -> None:
+        if results_format not in ("parquet", "csv"):
+            raise ValueError(f"Unexpected results_format '{results_format}'")
+        self.results_file = results_file
+        self.results_format = results_format
+        self.parquet_writer: pq.ParquetWriter | None = None
+        self.rows_written = 0
+
+    def __enter__(self) -> StreamingResultsWriter:
+        if self.results_format == "csv":
+            self.results_file.write_text("")
+        return self
+
+    def write(self, df: pl.DataFrame) -> None:
+        if self.results_format == "parquet":
+            table = df.to_arrow()
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.results_file, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            with self.results_file.open("a") as f:
+                df.write_csv(f, include_header=self.rows_written == 0)
+        self.rows_written += df.height
+
+    def __exit__(self, *args: object) -> None:
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        elif self.results_format == "parquet":
+            log.warning(f"No results were written, so {self.results_file} was not created")
+        log.info(f"Wrote {self.rows_written} results to {self.results_file}")
+
+
+def simulate_many_streaming(
+    instructions: Iterable[InstructionDto] | pl.DataFrame,
+    results_dir: Path,
+    results_format: ResultsFormat,
+    max_processes: int,
+    per_process: int,
+    verbosity: int,
+    log_file: Path | None,
+    serialisation_dir: Path | None,
+    max_chunks_in_flight: int | None = None,
+    lockstep: bool = False,
+    stats: bool = False,
+) -> list[WorkerStats]:
+    """
+    Simulate the instructions, which are consumed lazily, streaming each chunk's results into a single results file
+    as soon as it completes. Memory use in the parent process is bounded by max_chunks_in_flight, regardless of how
+    many instructions there are. Results are written in completion order rather than sorted by id
+    :param max_chunks_in_flight: the maximum number of chunks handed out but not yet written. Defaults to twice
+        max_processes, which keeps every process busy
+    :param lockstep: play each chunk with the LockstepRunner, as in play_batch
+    :param stats: collect PhaseStats in each process
+    :return: the stats collected by each process for each chunk, if any
+    """
+    assert max_processes > 0
+    assert per_process > 0
+    if max_chunks_in_flight is None:
+        max_chunks_in_flight = 2 * max_processes
+    assert max_chunks_in_flight > 0
+
+    results_file = results_dir / f"results.{results_format}"
+    log.info(
+        f"Will stream instructions in chunks of {per_process} to {max_processes} processes, "
+        f"with at most {max_chunks_in_flight} chunks in flight"
+    )
+
+    # The pool pulls tasks from a background thread as fast as it can - make it wait until a chunk has been written.
+    # If we stop early, the thread must give up waiting, otherwise the pool would hang while terminating
+    in_flight = threading.BoundedSemaphore(max_chunks_in_flight)
+    stopping = threading.Event()
+
+    def bounded_chunks() -> Iterator[pl.DataFrame]:
+        for chunk in instruction_batches(instructions, per_process):
+            while not in_flight.acquire(timeout=0.1):
+                if stopping.is_set():
+                    return
+            yield chunk
+
+    all_worker_stats = []
+    with (
+        multiprocessing.Pool(
+            processes=max_processes, initializer=setup_logging, initargs=(verbosity, log_file)
+        ) as pool,
+        StreamingResultsWriter(results_file, results_format) as writer,
+    ):
+        try:
+            for df, chunk_stats in pool.imap_unordered(
+                partial(simulate_batch_with_stats, serialisation_dir=serialisation_dir, lockstep=lockstep, stats=stats),
+                bounded_chunks(),
+            ):
+                with timed(Phase.result_writing):
+                    writer.write(df)
+                in_flight.release()
+                if chunk_stats is not None:
+                    all_worker_stats.append(chunk_stats)
+        finally:
+            stopping.set()
+
+    log.info(f"Final results available: {results_file}")
+    return all_worker_stats
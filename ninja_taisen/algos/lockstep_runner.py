@@ -0,0 +1,441 @@
+import datetime
+from time import perf_counter
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from ninja_taisen.algos import board_builder
+from ninja_taisen.algos.candidate_batch import NO_VICTOR, CandidateBatch
+from ninja_taisen.algos.card_battle import BATTLE_OUTCOMES, CARD_INDEX_BITS, JOKER_BITS
+from ninja_taisen.objects.safe_random import SafeRandom
+from ninja_taisen.objects.types import (
+    BOARD_BYTES,
+    BOARD_LENGTH,
+    CHECK_CATEGORY,
+    CHECK_STRENGTH,
+    HEIGHTS_OFFSET,
+    PILE_CAPACITY,
+    TEAM_CARDS_LENGTH,
+    BattleStatus,
+    Category,
+    Team,
+)
+from ninja_taisen.strategy.metric import IMetric
+from ninja_taisen.strategy.strategy import IStrategy
+from ninja_taisen.strategy.strategy_impl import MetricStrategy, RandomSpotWinStrategy, RandomStrategy
+from ninja_taisen.strategy.strategy_lookup import lookup_strategy
+from ninja_taisen.utils.phase_stats import Phase, phase_stats
+
+MAX_TURNS = 100
+# The dice are rolled, and their moves gathered, in this order - as in GameRunner and move_gatherer
+DICE_CATEGORIES = (Category.rock, Category.paper, Category.scissors)
+
+# BATTLE_OUTCOMES as arrays, indexed in the same way
+BATTLE_STATUSES = np.array([o.status for o in BATTLE_OUTCOMES], dtype=np.int8)
+JOKER_DELTAS = np.array([(o.joker_delta_a, o.joker_delta_b) for o in BATTLE_OUTCOMES], dtype=np.int8)
+# A battle can schedule further battles; this is how many each board can have outstanding before the stack grows
+BATTLE_STACK_DEPTH = 8
+
+
+class StrategyScoring(NamedTuple):
+    """
+    How a strategy chooses between candidate moves, in terms which can be applied to many games at once
+    """
+
+    # Take the first candidate which wins the game outright, if there is one
+    spot_win: bool
+    # Otherwise, choose at random between the candidates with the highest metric - or between all candidates if None
+    metric: IMetric | None
+
+
+def strategy_scoring(strategy: IStrategy) -> StrategyScoring:
+    if isinstance(strategy, MetricStrategy):
+        return StrategyScoring(spot_win=True, metric=strategy.metric)
+    if isinstance(strategy, RandomSpotWinStrategy):
+        return StrategyScoring(spot_win=True, metric=None)
+    if isinstance(strategy, RandomStrategy):
+        return StrategyScoring(spot_win=False, metric=None)
+    raise ValueError(f"The lockstep engine cannot play strategy {type(strategy).__name__}")
+
+
+class BoardRows(NamedTuple):
+    # (n_rows, BOARD_BYTES) board data, laid out as in Board.data
+    data: npt.NDArray[np.uint8]
+    # (n_rows,) the index of the game, among the active games, which each board belongs to
+    game: npt.NDArray[np.int64]
+    # (n_rows,) whether the moves which reached each board have used the joker
+    used_joker: npt.NDArray[np.bool_]
+
+
+class LockstepRunner:
+    """
+    Plays many games at once, advancing them all a turn at a time. The boards of the games, and of every candidate
+    move, are held as rows of a single array, so that gathering moves, resolving battles and scoring candidates are
+    each a handful of NumPy operations across the whole batch. Games are retired as they finish.
+
+    Each game consumes its own SafeRandom exactly as GameRunner does, so the results are identical to playing the
+    games one at a time
+    """
+
+    def __init__(self, seeds: list[int], monkey_strategies: list[str], wolf_strategies: list[str]) -> None:
+        self.randoms = [SafeRandom(seed) for seed in seeds]
+        boards = [board_builder.make_board(random=random) for random in self.randoms]
+        self.data = np.frombuffer(b"".join(b.data for b in boards), dtype=np.uint8).reshape(len(seeds), BOARD_BYTES)
+        self.data = self.data.copy()
+
+        self.strategies = {Team.monkey: monkey_strategies, Team.wolf: wolf_strategies}
+        scorings = {s: strategy_scoring(lookup_strategy(s, SafeRandom(0))) for s in monkey_strategies + wolf_strategies}
+        self.scorings = {team: [scorings[s] for s in strategies] for team, strategies in self.strategies.items()}
+
+        self.victorious_teams = np.full(len(seeds), NO_VICTOR, dtype=np.int8)
+        self.turn_counts = np.zeros(len(seeds), dtype=np.int64)
+        self.end_times: list[datetime.datetime | None] = [None] * len(seeds)
+
+    def play(self) -> None:
+        active = np.arange(len(self.randoms))
+        team = Team.monkey
+        turn_count = 0
+        while active.size:
+            self.__execute_turn(active, team)
+            turn_count += 1
+
+            winners = CandidateBatch(self.data[active]).victorious_teams()
+            self.victorious_teams[active] = winners
+            self.turn_counts[active] = turn_count
+            if turn_count < MAX_TURNS:
+                finished = active[winners != NO_VICTOR]
+                active = active[winners == NO_VICTOR]
+            else:
+                finished, active = active, active[:0]
+
+            end_time = datetime.datetime.now(datetime.UTC)
+            for game in finished.tolist():
+                self.end_times[game] = end_time
+            team = team.other()
+
+        stats = phase_stats()
+        if stats is not None:
+            stats.games += len(self.randoms)
+
+    def cards_left(self, team: Team) -> npt.NDArray[np.int64]:
+        heights_offset = HEIGHTS_OFFSET + team * BOARD_LENGTH
+        return self.data[:, heights_offset : heights_offset + BOARD_LENGTH].sum(axis=1, dtype=np.int64)
+
+    def __execute_turn(self, active: npt.NDArray[np.int64], team: Team) -> None:
+        dice_rolls = np.array(
+            [[self.randoms[game].roll_dice() for _ in DICE_CATEGORIES] for game in active.tolist()], dtype=np.int64
+        ).reshape(active.size, len(DICE_CATEGORIES))
+        start = perf_counter()
+        candidates = gather_all_candidates(self.data[active], team, dice_rolls)
+        generated = perf_counter()
+
+        candidate_counts = np.bincount(candidates.game, minlength=active.size)
+        starts = np.cumsum(candidate_counts) - candidate_counts
+        chosen = np.full(active.size, -1, dtype=np.int64)
+
+        randoms = [self.randoms[game] for game in active.tolist()]
+        scorings = [self.scorings[team][game] for game in active.tolist()]
+        winners = CandidateBatch(candidates.data).victorious_teams() == team
+        for scoring in set(scorings):
+            games = np.array([s == scoring for s in scorings], dtype=np.bool_) & (candidate_counts > 0)
+            choose_candidates(
+                np.flatnonzero(games), scoring, randoms, candidates, team, winners, starts, candidate_counts, chosen
+            )
+
+        moved = np.flatnonzero(chosen >= 0)
+        self.data[active[moved]] = candidates.data[chosen[moved]]
+
+        stats = phase_stats()
+        if stats is not None:
+            stats.record_turns(active.size, candidates.game.size, generated - start, perf_counter() - generated)
+
+
+def choose_candidates(
+    games: npt.NDArray[np.int64],
+    scoring: StrategyScoring,
+    randoms: list[SafeRandom],
+    candidates: BoardRows,
+    team: Team,
+    winners: npt.NDArray[np.bool_],
+    starts: npt.NDArray[np.int64],
+    candidate_counts: npt.NDArray[np.int64],
+    chosen: npt.NDArray[np.int64],
+) -> None:
+    """
+    Choose a candidate, as an index into candidates, for each of the games (indices among the active games) which
+    share a scoring. Every game has at least one candidate; the candidates of each game are contiguous and in the
+    order gather_all_permitted_moves would return them
+    """
+    if not games.size:
+        return
+    if scoring.spot_win:
+        in_games = np.isin(candidates.game, games)
+        winning = np.flatnonzero(winners & in_games)
+        winning_games, first_winning = np.unique(candidates.game[winning], return_index=True)
+        chosen[winning_games] = winning[first_winning]
+        games = games[chosen[games] < 0]
+        if not games.size:
+            return
+
+    if scoring.metric is None:
+        # Draw through each game's own random, exactly as SafeRandom.choice(all_permitted_moves) would
+        for game in games.tolist():
+            chosen[game] = starts[game] + randoms[game].choice(range(candidate_counts[game]))
+        return
+
+    rows = np.concatenate([np.arange(starts[g], starts[g] + candidate_counts[g]) for g in games.tolist()])
+    metrics = scoring.metric.calculate_batch(CandidateBatch(candidates.data[rows]), team)
+    group_starts = np.cumsum(candidate_counts[games]) - candidate_counts[games]
+    max_metrics = np.maximum.reduceat(metrics, group_starts)
+    is_max = metrics == np.repeat(max_metrics, candidate_counts[games])
+    max_rows = rows[is_max]
+    max_counts = np.add.reduceat(is_max.astype(np.int64), group_starts)
+    max_starts = np.cumsum(max_counts) - max_counts
+    for game, max_start, max_count in zip(games.tolist(), max_starts.tolist(), max_counts.tolist(), strict=True):
+        chosen[game] = max_rows[max_start + randoms[game].choice(range(max_count))]
+
+
+def gather_all_candidates(data: npt.NDArray[np.uint8], team: Team, dice_rolls: npt.NDArray[np.int64]) -> BoardRows:
+    """
+    As move_gatherer.gather_all_permitted_moves, for many games at once
+    :param data: (n_games, BOARD_BYTES) the board of each game
+    :param dice_rolls: (n_games, 3) each game's dice rolls, in the order of DICE_CATEGORIES
+    :return: the board reached by every candidate move, grouped by game, with each game's candidates in the same order
+        as gather_all_permitted_moves would return them
+    """
+    initial_rows = BoardRows(
+        data=data, game=np.arange(data.shape[0], dtype=np.int64), used_joker=np.zeros(data.shape[0], dtype=np.bool_)
+    )
+    blocks: list[BoardRows] = []
+    for index_a, category_a in enumerate(DICE_CATEGORIES):
+        rows_a = __gather_moves_for_dice_roll(initial_rows, category_a, dice_rolls[:, index_a], team)
+        blocks.append(rows_a)
+        for index_b, category_b in enumerate(DICE_CATEGORIES):
+            if category_b == category_a:
+                continue
+            rows_b = __gather_moves_for_dice_roll(rows_a, category_b, dice_rolls[:, index_b], team)
+            blocks.append(rows_b)
+            for index_c, category_c in enumerate(DICE_CATEGORIES):
+                if category_c in (category_a, category_b):
+                    continue
+                blocks.append(__gather_moves_for_dice_roll(rows_b, category_c, dice_rolls[:, index_c], team))
+
+    # Each block is ordered by game already, so a stable sort by game keeps each game's candidates in block order
+    game = np.concatenate([b.game for b in blocks])
+    order = np.argsort(game, kind="stable")
+    return BoardRows(
+        data=np.concatenate([b.data for b in blocks])[order],
+        game=game[order],
+        used_joker=np.concatenate([b.used_joker for b in blocks])[order],
+    )
+
+
+def __gather_moves_for_dice_roll(
+    initial_rows: BoardRows, category: Category, dice_rolls: npt.NDArray[np.int64], team: Team
+) -> BoardRows:
+    """
+    Make every permitted move of a card of the given category (or the joker, if not yet used) from each initial board
+    which has not already been won, resolving battles
+    :param dice_rolls: (n_games,) the roll of the category's dice for each game
+    """
+    live = np.flatnonzero(CandidateBatch(initial_rows.data).victorious_teams() == NO_VICTOR)
+    cards_offset = team * TEAM_CARDS_LENGTH
+    heights_offset = HEIGHTS_OFFSET + team * BOARD_LENGTH
+    cards = initial_rows.data[live, cards_offset : cards_offset + TEAM_CARDS_LENGTH]
+    cards = cards.reshape(-1, BOARD_LENGTH, PILE_CAPACITY)
+    heights = initial_rows.data[live, heights_offset : heights_offset + BOARD_LENGTH].astype(np.int64)[:, :, None]
+
+    # As board_inspector.movable_card_indices: one of the top three cards of a pile, of the category or the joker
+    slots = np.arange(PILE_CAPACITY)
+    accessible = (slots >= heights - 3) & (slots < heights)
+    categories = (cards & CHECK_CATEGORY) >> 4
+    jokers = (categories == Category.joker) & ~initial_rows.used_joker[live][:, None, None]
+    states, pile_indices, card_indices = np.nonzero(accessible & ((categories == category) | jokers))
+
+    parents = live[states]
+    game = initial_rows.game[parents]
+    moved_jokers = categories[states, pile_indices, card_indices] == Category.joker
+    rows = BoardRows(
+        data=initial_rows.data[parents], game=game, used_joker=initial_rows.used_joker[parents] | moved_jokers
+    )
+    move_cards_and_resolve_battles(rows.data, team, dice_rolls[game], pile_indices, card_indices)
+    return rows
+
+
+def move_cards_and_resolve_battles(
+    data: npt.NDArray[np.uint8],
+    team: Team,
+    dice_rolls: npt.NDArray[np.int64],
+    pile_indices: npt.NDArray[np.int64],
+    card_indices: npt.NDArray[np.int64],
+) -> None:
+    """
+    As CardMover.move_card_and_resolve_battles, applied to every board in place. Each board is advanced through its
+    battles one step at a time, all boards together, until none has a battle outstanding
+    :param data: (n_boards, BOARD_BYTES)
+    """
+    board_count = data.shape[0]
+    boards = np.arange(board_count)
+    teams = np.full(board_count, team, dtype=np.int64)
+    new_pile_indices = np.clip(pile_indices + (dice_rolls if team == Team.monkey else -dice_rolls), 0, BOARD_LENGTH - 1)
+
+    battles = BattleStacks(board_count)
+    joker_strengths = np.full((board_count, 2), 4, dtype=np.int64)
+    # The pile whose battle each board is resolving, or -1. Once started, a pile's battle is fought to the end, even if
+    # draws schedule further battles meanwhile
+    battle_piles = np.full(board_count, -1, dtype=np.int64)
+    battle_count = 0
+
+    move_cards(data, boards, teams, pile_indices, card_indices, new_pile_indices, battles)
+    start = perf_counter()
+    while True:
+        starting = np.flatnonzero((battle_piles < 0) & (battles.depth > 0))
+        battle_piles[starting] = battles.top(starting)
+        fighting = np.flatnonzero(battle_piles >= 0)
+        if not fighting.size:
+            break
+
+        piles = battle_piles[fighting]
+        monkey_heights = data[fighting, HEIGHTS_OFFSET + piles].astype(np.int64)
+        wolf_heights = data[fighting, HEIGHTS_OFFSET + BOARD_LENGTH + piles].astype(np.int64)
+        resolved = (monkey_heights == 0) | (wolf_heights == 0)
+        battles.remove(fighting[resolved], piles[resolved])
+        battle_piles[fighting[resolved]] = -1
+
+        fighting, piles = fighting[~resolved], piles[~resolved]
+        monkey_heights, wolf_heights = monkey_heights[~resolved], wolf_heights[~resolved]
+        __fight(data, team, fighting, piles, monkey_heights, wolf_heights, joker_strengths, battles)
+        battle_count += fighting.size
+
+    stats = phase_stats()
+    if stats is not None:
+        stats.seconds[Phase.battle_resolution] += perf_counter() - start
+        stats.card_moves += board_count
+        stats.battles += battle_count
+
+
+def __fight(
+    data: npt.NDArray[np.uint8],
+    team: Team,
+    boards: npt.NDArray[np.int64],
+    piles: npt.NDArray[np.int64],
+    monkey_heights: npt.NDArray[np.int64],
+    wolf_heights: npt.NDArray[np.int64],
+    joker_strengths: npt.NDArray[np.int64],
+    battles: BattleStacks,
+) -> None:
+    """
+    Fight the top monkey card against the top wolf card in a pile of each board, as in CardMover.__resolve_battle
+    """
+    monkey_codes = data[boards, piles * PILE_CAPACITY + monkey_heights - 1].astype(np.int64)
+    wolf_codes = data[boards, TEAM_CARDS_LENGTH + piles * PILE_CAPACITY + wolf_heights - 1].astype(np.int64)
+    outcomes = (__card_indices(monkey_codes, joker_strengths[boards, Team.monkey]) << CARD_INDEX_BITS) | __card_indices(
+        wolf_codes, joker_strengths[boards, Team.wolf]
+    )
+    joker_strengths[boards] += JOKER_DELTAS[outcomes]
+    statuses = BATTLE_STATUSES[outcomes]
+
+    monkey_wins = statuses == BattleStatus.card_a_wins
+    remove_top_cards(data, boards[monkey_wins], Team.wolf, piles[monkey_wins])
+    wolf_wins = statuses == BattleStatus.card_b_wins
+    remove_top_cards(data, boards[wolf_wins], Team.monkey, piles[wolf_wins])
+
+    # A draw on the other team's home removes the other team's card; anywhere else, both cards retreat one space, the
+    # other team's first
+    draws = statuses == BattleStatus.draw
+    other_home = BOARD_LENGTH - 1 if team == Team.monkey else 0
+    home_draws = draws & (piles == other_home)
+    remove_top_cards(data, boards[home_draws], team.other(), piles[home_draws])
+
+    retreats = draws & (piles != other_home)
+    boards, piles = boards[retreats], piles[retreats]
+    heights = {Team.monkey: monkey_heights[retreats], Team.wolf: wolf_heights[retreats]}
+    for retreating_team in (team.other(), team):
+        new_piles = np.clip(piles + (-1 if retreating_team == Team.monkey else 1), 0, BOARD_LENGTH - 1)
+        teams = np.full(boards.size, retreating_team, dtype=np.int64)
+        move_cards(data, boards, teams, piles, heights[retreating_team] - 1, new_piles, battles)
+
+
+def __card_indices(codes: npt.NDArray[np.int64], joker_strengths: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+    """
+    As card_battle.__card_index, after substituting each joker's current strength for its printed strength
+    """
+    codes = np.where((codes & CHECK_CATEGORY) == JOKER_BITS, (codes & ~CHECK_STRENGTH) | joker_strengths, codes)
+    return ((codes >> 1) & 0b0_0_11_1000) | (codes & 0b0_0_00_0111)
+
+
+def move_cards(
+    data: npt.NDArray[np.uint8],
+    boards: npt.NDArray[np.int64],
+    teams: npt.NDArray[np.int64],
+    pile_indices: npt.NDArray[np.int64],
+    card_indices: npt.NDArray[np.int64],
+    new_pile_indices: npt.NDArray[np.int64],
+    battles: BattleStacks,
+) -> None:
+    """
+    As Board.move_cards on each of the boards, which must be distinct, scheduling a battle at each new pile as in
+    CardMover.__move_card
+    """
+    battles.push(boards, new_pile_indices)
+    moving = pile_indices != new_pile_indices
+    boards, teams = boards[moving], teams[moving]
+    pile_indices, card_indices, new_pile_indices = pile_indices[moving], card_indices[moving], new_pile_indices[moving]
+
+    height_indices = HEIGHTS_OFFSET + teams * BOARD_LENGTH + pile_indices
+    new_height_indices = HEIGHTS_OFFSET + teams * BOARD_LENGTH + new_pile_indices
+    new_heights = data[boards, new_height_indices].astype(np.int64)
+    moved_counts = data[boards, height_indices] - card_indices
+
+    offsets = np.arange(PILE_CAPACITY)
+    moved = offsets < moved_counts[:, None]
+    slots = (teams * TEAM_CARDS_LENGTH + pile_indices * PILE_CAPACITY + card_indices)[:, None] + offsets
+    new_slots = (teams * TEAM_CARDS_LENGTH + new_pile_indices * PILE_CAPACITY + new_heights)[:, None] + offsets
+    moved_boards = np.broadcast_to(boards[:, None], moved.shape)[moved]
+    data[moved_boards, new_slots[moved]] = data[moved_boards, slots[moved]]
+    data[moved_boards, slots[moved]] = 0
+
+    data[boards, height_indices] = card_indices
+    data[boards, new_height_indices] = new_heights + moved_counts
+
+
+def remove_top_cards(
+    data: npt.NDArray[np.uint8], boards: npt.NDArray[np.int64], team: Team, pile_indices: npt.NDArray[np.int64]
+) -> None:
+    """
+    As Board.remove_top_card on each of the boards, which must be distinct
+    """
+    height_indices = HEIGHTS_OFFSET + team * BOARD_LENGTH + pile_indices
+    heights = data[boards, height_indices].astype(np.int64) - 1
+    data[boards, team * TEAM_CARDS_LENGTH + pile_indices * PILE_CAPACITY + heights] = 0
+    data[boards, height_indices] = heights
+
+
+class BattleStacks:
+    """
+    CardMover.remaining_battles for many boards: a stack of pile indices per board, with its depth
+    """
+
+    def __init__(self, board_count: int) -> None:
+        self.piles = np.zeros((board_count, BATTLE_STACK_DEPTH), dtype=np.int64)
+        self.depth = np.zeros(board_count, dtype=np.int64)
+
+    def push(self, boards: npt.NDArray[np.int64], piles: npt.NDArray[np.int64]) -> None:
+        if boards.size and self.depth[boards].max() == self.piles.shape[1]:
+            self.piles = np.concatenate([self.piles, np.zeros_like(self.piles)], axis=1)
+        self.piles[boards, self.depth[boards]] = piles
+        self.depth[boards] += 1
+
+    def top(self, boards: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+        return self.piles[boards, self.depth[boards] - 1]
+
+    def remove(self, boards: npt.NDArray[np.int64], piles: npt.NDArray[np.int64]) -> None:
+        """
+        Remove every occurrence of the given pile from each board's stack, keeping the remaining piles in order
+        """
+        stacks = self.piles[boards]
+        keep = (stacks != piles[:, None]) & (np.arange(stacks.shape[1]) < self.depth[boards][:, None])
+        order = np.argsort(~keep, axis=1, kind="stable")
+        self.piles[boards] = np.take_along_axis(stacks, order, axis=1)
+        self.depth[boards] = keep.sum(axis=1)
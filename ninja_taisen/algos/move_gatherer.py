@@ -1,4 +1,4 @@
-from copy import deepcopy
+from collections.abc import Iterator
 from logging import getLogger
 
 from ninja_taisen.algos import board_inspector
@@ -9,53 +9,99 @@ log = getLogger(__name__)
 
 
 def gather_all_permitted_moves(
-    starting_board: Board, team: Team, dice_rolls: dict[Category, int]
+    starting_board: Board, team: Team, dice_rolls: dict[Category, int], deduplicate: bool = False
 ) -> list[CompletedMoves]:
-    moves: list[CompletedMoves] = []
+    """
+    :param deduplicate: Many different orderings of the dice reach the same final board. If True, only the first
+        CompletedMoves found for each distinct board is returned, and states already expanded via another ordering
+        of the same dice are not expanded again
+    """
+    return list(iter_permitted_moves(starting_board, team, dice_rolls, deduplicate))
+
+
+def iter_permitted_moves(
+    starting_board: Board, team: Team, dice_rolls: dict[Category, int], deduplicate: bool = False
+) -> Iterator[CompletedMoves]:
+    """
+    As gather_all_permitted_moves, but yielding each CompletedMoves as soon as it is generated, in the same order.
+    Only the states after one and two dice are held, to be expanded further, so a consumer which stops early (e.g. on
+    finding a winning move) skips the rest of the generation
+    """
     initial_state = CompletedMoves(moves=[], team=team, board=starting_board)
+    expanded_states: set[tuple[bytes, bool, frozenset[Category]]] = set()
+    distinct_boards: set[bytes] = set()
+
+    def is_new(completed_moves: CompletedMoves) -> bool:
+        if not deduplicate:
+            return True
+        data = bytes(completed_moves.board.data)
+        if data in distinct_boards:
+            return False
+        distinct_boards.add(data)
+        return True
 
     for dice_type_a, roll_a in dice_rolls.items():
-        new_moves_a = __gather_moves_for_dice_roll([initial_state], dice_type_a, roll_a, team)
-        moves.extend(new_moves_a)
+        new_moves_a = []
+        for state_a in __iter_moves_for_dice_roll([initial_state], dice_type_a, roll_a, team):
+            if deduplicate and not __is_unexpanded(state_a, expanded_states):
+                continue
+            new_moves_a.append(state_a)
+            if is_new(state_a):
+                yield state_a
 
         for dice_type_b, roll_b in dice_rolls.items():
             if dice_type_a == dice_type_b:
                 continue
 
-            new_moves_b = __gather_moves_for_dice_roll(new_moves_a, dice_type_b, roll_b, team)
-            moves.extend(new_moves_b)
+            new_moves_b = []
+            for state_b in __iter_moves_for_dice_roll(new_moves_a, dice_type_b, roll_b, team):
+                if deduplicate and not __is_unexpanded(state_b, expanded_states):
+                    continue
+                new_moves_b.append(state_b)
+                if is_new(state_b):
+                    yield state_b
 
             for dice_type_c, roll_c in dice_rolls.items():
                 if dice_type_a == dice_type_c or dice_type_b == dice_type_c:
                     continue
 
-                new_moves_c = __gather_moves_for_dice_roll(new_moves_b, dice_type_c, roll_c, team)
-                moves.extend(new_moves_c)
+                for state_c in __iter_moves_for_dice_roll(new_moves_b, dice_type_c, roll_c, team):
+                    if is_new(state_c):
+                        yield state_c
+
 
-    return moves
+def __is_unexpanded(state: CompletedMoves, expanded_states: set[tuple[bytes, bool, frozenset[Category]]]) -> bool:
+    """
+    Whether no state seen before reaches the same board with the same dice and joker already used, and if so, record
+    this one. Expanding a state which is not new would only yield duplicates of boards which are already gathered
+    """
+    key = (bytes(state.board.data), state.used_joker(), frozenset(m.dice_category for m in state.moves))
+    if key in expanded_states:
+        return False
+    expanded_states.add(key)
+    return True
 
 
-def __gather_moves_for_dice_roll(
+def __iter_moves_for_dice_roll(
     initial_states: list[CompletedMoves],
     category: Category,
     dice_roll: int,
     team: Team,
-) -> list[CompletedMoves]:
-    final_states = []
-
+) -> Iterator[CompletedMoves]:
     for initial_state in initial_states:
         if board_inspector.victorious_team(initial_state.board) is not None:
             continue
 
-        cards = initial_state.board.cards(team)
-        movable_card_indices = board_inspector.movable_card_indices(cards, category, initial_state.used_joker())
+        movable_card_indices = board_inspector.movable_card_indices(
+            initial_state.board, team, category, initial_state.used_joker()
+        )
 
         for pile_index, card_index in movable_card_indices:
-            copied_state = deepcopy(initial_state)
-            card = cards[pile_index][card_index]
+            board = initial_state.board.copy()
+            card = initial_state.board.card(team, pile_index, card_index)
 
             try:
-                card_mover = CardMover(board=copied_state.board)
+                card_mover = CardMover(board=board)
                 card_mover.move_card_and_resolve_battles(
                     team=team, dice_roll=dice_roll, pile_index=pile_index, card_index=card_index
                 )
@@ -71,7 +117,5 @@ def __gather_moves_for_dice_roll(
                 log.error(f"pile_index={pile_index}, card_index={card_index}")
                 raise
 
-            copied_state.moves.append(Move(dice_category=category, dice_roll=dice_roll, card=card))
-            final_states.append(copied_state)
-
-    return final_states
+            moves = initial_state.moves + [Move(dice_category=category, dice_roll=dice_roll, card=card)]
+            yield CompletedMoves(moves=moves, team=team, board=board)
@@ -1,15 +1,14 @@
-import multiprocessing
-from cProfile import Profile
+import os
+from collections.abc import Iterable
+from functools import partial
 from logging import getLogger
 from pathlib import Path
-from pstats import SortKey
+from typing import TYPE_CHECKING
 
-import polars as pl
-from ninja_taisen_rust import simulate_instructions_from_csv_file
+from pydantic import TypeAdapter
 
 from ninja_taisen.algos.card_mover import CardMover
-from ninja_taisen.algos.game_runner import simulate_many_multi_process
-from ninja_taisen.algos.move_gatherer import gather_all_permitted_moves
+from ninja_taisen.algos.move_gatherer import iter_permitted_moves
 from ninja_taisen.dtos import (
     ChooseRequest,
     ChooseResponse,
@@ -20,15 +19,33 @@ from ninja_taisen.dtos import (
 )
 from ninja_taisen.objects.constants import DEFAULT_LOGGING
 from ninja_taisen.objects.safe_random import SafeRandom
-from ninja_taisen.objects.types import CATEGORY_BY_DTO, TEAM_BY_DTO, Board, Card, Category
+from ninja_taisen.objects.types import CATEGORY_BY_DTO, TEAM_BY_DTO, Board, Card, Category, Move, Team
+from ninja_taisen.objects.wire_format import decode_choose_request, encode_choose_response
 from ninja_taisen.strategy.strategy_lookup import lookup_strategy
+from ninja_taisen.utils.batch_requests import handle_each
+from ninja_taisen.utils.choose_cache import ChooseCache
 from ninja_taisen.utils.logging_setup import setup_logging
+from ninja_taisen.utils.phase_stats import Phase, PhaseStats, collect_phase_stats, timed
+
+# polars, the simulation machinery built on it, the profiler and the Rust extension are slow to import, and are only
+# needed to simulate or to use the Rust engine. They are imported where they are used, so that importing this module
+# (and choosing or executing moves with the Python engine) stays quick
+if TYPE_CHECKING:
+    import polars as pl
+
+    from ninja_taisen.algos.game_runner import WorkerStats
 
 log = getLogger(__name__)
 
+CHOOSE_RESPONSES = TypeAdapter(list[ChooseResponse])
+EXECUTE_RESPONSES = TypeAdapter(list[ExecuteResponse])
+
+# When the Rust engine shares games out by work-stealing, a resumable run checkpoints after this many instructions
+RUST_WORK_STEALING_CHECKPOINT = 10_000
+
 
 def simulate(
-    instructions: list[InstructionDto],
+    instructions: Iterable[InstructionDto] | pl.DataFrame,
     results_dir: Path,
     results_format: ResultsFormat = "parquet",
     max_processes: int = 1,
@@ -38,34 +55,75 @@ def simulate(
     profile: bool = False,
     serialisation_dir: Path | None = None,
     rust: bool = False,
+    stream: bool = False,
+    resume: bool = False,
+    lockstep: bool = False,
+    stats: bool = False,
 ) -> None:
+    """
+    :param instructions: the games to simulate, as InstructionDtos or as a DataFrame with columns id, seed,
+        monkey_strategy, wolf_strategy. Unless stream=True, these are collected into a DataFrame up front
+    :param per_process: the number of instructions handed to a process (or with rust=True, a thread) at a time. With
+        rust=True, 0 shares the games out between threads by work-stealing instead - see simulate_in_memory
+    :param stream: consume the instructions lazily and write results as chunks complete, so memory use stays flat
+        however many instructions there are. The results are not sorted by id. Not supported with rust=True
+    :param resume: continue an interrupted run into the same results_dir, skipping the instructions recorded as
+        completed in results_dir/chunk_results/manifest.jsonl. The instructions must be the same as the original run
+    :param lockstep: play each chunk of per_process games at once, in lockstep, with vectorised move gathering and
+        scoring. The results are identical to the default Python engine; throughput improves with larger chunks
+    :param stats: count the turns, candidate moves, card moves and battles played by each process (or with rust=True,
+        each thread), and time the phases of the simulation, writing them to a stats table beside the results. Unlike
+        profile, this covers every worker, and costs little enough to leave on for a long run
+    """
+    import polars as pl
+
+    from ninja_taisen.algos.game_runner import (
+        instructions_to_df,
+        simulate_many_multi_process,
+        simulate_many_streaming,
+        stats_to_df,
+        worker_stats,
+        write_stats,
+    )
+
     setup_logging(verbosity, log_file)
 
     results_dir.mkdir(parents=True, exist_ok=True)
     if serialisation_dir:
         serialisation_dir.mkdir(parents=True, exist_ok=True)
 
-    if max_processes <= 0:
-        cpu_count = multiprocessing.cpu_count()
-        if cpu_count is None:
-            raise OSError("Unable to deduce CPU count from os.cpu_count(). Please manually specify max_processes >= 1")
-        log.info(f"User provided max_processes={max_processes}; found cpu_count={cpu_count}")
-        max_processes = max(cpu_count + max_processes, 1)
-        log.info(f"Will use max_processes={max_processes}")
+    max_processes = __resolve_max_processes(max_processes)
+    if stream and resume:
+        raise ValueError("Cannot resume a streamed simulation; its results are not chunked by instruction id")
+    if stream and rust:
+        raise ValueError("Cannot stream a simulation with rust=True; streaming is only supported by the Python engine")
+    if lockstep and rust:
+        raise ValueError("Cannot use the lockstep engine with rust=True; it is an alternative Python engine")
+    if lockstep and serialisation_dir:
+        raise ValueError("Cannot serialise games played in lockstep")
+    if per_process == 0 and not rust:
+        raise ValueError("per_process=0 selects work-stealing, which only the Rust engine supports")
 
-    if rust:
-        log.info("Specified rust=True, here we go...")
-        instructions_filename = results_dir / "instructions.csv"
-        pl.DataFrame(data=instructions, orient="row").write_csv(instructions_filename)
-        log.info(f"Wrote instructions to {instructions_filename}")
-        simulate_instructions_from_csv_file(str(instructions_filename), max_processes, per_process)
-        log.info(f"Completed rust simulation - results in {results_dir}")
-        return
-
-    if profile:
-        with Profile() as profiler:
-            simulate_many_multi_process(
-                instructions=instructions,
+    with collect_phase_stats(stats) as main_stats:
+        if rust:
+            log.info("Specified rust=True, here we go...")
+            if not isinstance(instructions, pl.DataFrame):
+                instructions = instructions_to_df(instructions)
+            all_worker_stats = __simulate_rust(
+                instructions, results_dir, results_format, max_processes, per_process, resume, stats
+            )
+        else:
+            if stream:
+                simulate_many = partial(simulate_many_streaming, instructions=instructions, lockstep=lockstep)
+            else:
+                instructions_df = (
+                    instructions if isinstance(instructions, pl.DataFrame) else instructions_to_df(instructions)
+                )
+                simulate_many = partial(
+                    simulate_many_multi_process, instructions=instructions_df, resume=resume, lockstep=lockstep
+                )
+            simulate_many = partial(
+                simulate_many,
                 results_dir=results_dir,
                 results_format=results_format,
                 max_processes=max_processes,
@@ -73,41 +131,257 @@ def simulate(
                 verbosity=verbosity,
                 log_file=log_file,
                 serialisation_dir=serialisation_dir,
+                stats=stats,
             )
-        profiler.print_stats(SortKey.TIME)
+
+            if profile:
+                from cProfile import Profile
+                from pstats import SortKey
+
+                with Profile() as profiler:
+                    all_worker_stats = simulate_many()
+                profiler.print_stats(SortKey.TIME)
+            else:
+                all_worker_stats = simulate_many()
+
+    if main_stats is not None:
+        write_stats(stats_to_df([*all_worker_stats, worker_stats(main_stats)]), results_dir, results_format)
+
+
+def __simulate_rust(
+    instructions: pl.DataFrame,
+    results_dir: Path,
+    results_format: ResultsFormat,
+    max_processes: int,
+    per_process: int,
+    resume: bool,
+    stats: bool,
+) -> list[WorkerStats]:
+    if resume:
+        return __simulate_in_memory_checkpointed(
+            instructions, results_dir, results_format, max_processes, per_process, stats
+        )
+
+    results_df, all_worker_stats = __simulate_in_memory(instructions, max_processes, per_process, stats)
+    results_file = results_dir / f"results.{results_format}"
+    with timed(Phase.result_writing):
+        if results_format == "parquet":
+            results_df.write_parquet(results_file)
+        elif results_format == "csv":
+            results_df.write_csv(results_file)
+        else:
+            raise ValueError(f"Unexpected results_format '{results_format}'")
+    log.info(f"Completed rust simulation - results in {results_file}")
+    return all_worker_stats
+
+
+def simulate_in_memory(
+    instructions: list[InstructionDto] | pl.DataFrame,
+    max_processes: int = 1,
+    per_process: int = 0,
+) -> pl.DataFrame:
+    """
+    Simulate the instructions using the Rust engine, returning the results as a DataFrame without touching the disk
+    :param instructions: InstructionDtos, or a DataFrame with columns id, seed, monkey_strategy, wolf_strategy
+    :param max_processes: the number of threads to use. If <= 0, this is added to the number of CPUs
+    :param per_process: the number of instructions handed to a thread at a time. If 0, idle threads steal games from
+        busy ones instead, which needs no tuning and keeps every thread busy however uneven the game lengths
+    """
+    return __simulate_in_memory(instructions, max_processes, per_process, stats=False)[0]
+
+
+def __simulate_in_memory(
+    instructions: list[InstructionDto] | pl.DataFrame, max_processes: int, per_process: int, stats: bool
+) -> tuple[pl.DataFrame, list[WorkerStats]]:
+    """
+    :return: the results, as simulate_in_memory, and the stats collected by each thread if stats is True
+    """
+    import ninja_taisen_rust
+    import polars as pl
+
+    from ninja_taisen.algos.game_runner import WorkerStats
+
+    if isinstance(instructions, pl.DataFrame):
+        ids = instructions["id"].to_list()
+        seeds = instructions["seed"].to_list()
+        monkey_strategies = instructions["monkey_strategy"].to_list()
+        wolf_strategies = instructions["wolf_strategy"].to_list()
     else:
-        simulate_many_multi_process(
-            instructions=instructions,
-            results_dir=results_dir,
-            results_format=results_format,
-            max_processes=max_processes,
-            per_process=per_process,
-            verbosity=verbosity,
-            log_file=log_file,
-            serialisation_dir=serialisation_dir,
+        ids = [i.id for i in instructions]
+        seeds = [i.seed for i in instructions]
+        monkey_strategies = [i.monkey_strategy for i in instructions]
+        wolf_strategies = [i.wolf_strategy for i in instructions]
+
+    columns, stats_columns = ninja_taisen_rust.simulate_instructions(
+        ids, seeds, monkey_strategies, wolf_strategies, __resolve_max_processes(max_processes), per_process, stats
+    )
+    # The schema of the results produced by the Rust engine, matching src/lib.rs::ResultColumns
+    schema = {
+        "id": pl.UInt64,
+        "seed": pl.UInt64,
+        "monkey_strategy": pl.String,
+        "wolf_strategy": pl.String,
+        "winner": pl.String,
+        "turn_count": pl.UInt8,
+        "monkey_cards_left": pl.UInt8,
+        "wolf_cards_left": pl.UInt8,
+        "start_time": pl.String,
+        "end_time": pl.String,
+        "process_name": pl.String,
+    }
+    with timed(Phase.dto_conversion):
+        results_df = pl.DataFrame({name: list(getattr(columns, name)) for name in schema}, schema=schema)
+
+    all_worker_stats = [
+        WorkerStats(worker=worker, stats=PhaseStats.from_counts(*counts))
+        for worker, *counts in zip(
+            stats_columns.worker,
+            stats_columns.games,
+            stats_columns.turns,
+            stats_columns.candidates,
+            stats_columns.card_moves,
+            stats_columns.battles,
+            stats_columns.seconds,
+            strict=True,
         )
+    ]
+    return results_df, all_worker_stats
+
+
+def __simulate_in_memory_checkpointed(
+    instructions: pl.DataFrame,
+    results_dir: Path,
+    results_format: ResultsFormat,
+    max_processes: int,
+    per_process: int,
+    stats: bool,
+) -> list[WorkerStats]:
+    """
+    Hand the Rust engine one round of chunks at a time, writing each round to chunk_results and recording it in the
+    manifest before starting the next, so that an interrupted run loses at most one round
+    """
+    from ninja_taisen.algos.game_runner import concatenate_chunk_results, instruction_batches, write_chunk_results
+    from ninja_taisen.utils.results_manifest import ResultsManifest
+
+    chunk_results = results_dir / "chunk_results"
+    manifest = ResultsManifest(chunk_results, resume=True)
+    remaining = manifest.remaining(instructions)
 
+    round_size = max_processes * per_process if per_process > 0 else RUST_WORK_STEALING_CHECKPOINT
+    all_worker_stats = []
+    for i_block in instruction_batches(remaining, round_size):
+        results_df, round_stats = __simulate_in_memory(i_block, max_processes, per_process, stats)
+        manifest.record(write_chunk_results(results_df, chunk_results, results_format))
+        all_worker_stats.extend(round_stats)
 
-def choose_move(request: ChooseRequest) -> ChooseResponse:
-    all_permitted_moves = gather_all_permitted_moves(
-        starting_board=Board.from_dto(request.board),
+    log.info(f"All chunks completed; concatenating {results_format} results from {chunk_results}")
+    concatenate_chunk_results(manifest.results_files(), results_dir, results_format)
+    return all_worker_stats
+
+
+def __resolve_max_processes(max_processes: int) -> int:
+    if max_processes <= 0:
+        cpu_count = os.cpu_count()
+        if cpu_count is None:
+            raise OSError("Unable to deduce CPU count from os.cpu_count(). Please manually specify max_processes >= 1")
+        log.info(f"User provided max_processes={max_processes}; found cpu_count={cpu_count}")
+        max_processes = max(cpu_count + max_processes, 1)
+        log.info(f"Will use max_processes={max_processes}")
+    return max_processes
+
+
+def choose_move(request: ChooseRequest, rust: bool = False, cache: ChooseCache | None = None) -> ChooseResponse:
+    """
+    :param cache: if given, the response to a seeded request is looked up in (or else added to) this cache
+    """
+    key = None if cache is None else ChooseCache.key(request, rust)
+    if cache is None or key is None:
+        return __choose_move_uncached(request, rust)
+
+    response = cache.get(key)
+    if response is None:
+        response = __choose_move_uncached(request, rust)
+        cache.put(key, response)
+    return response
+
+
+def __choose_move_uncached(request: ChooseRequest, rust: bool) -> ChooseResponse:
+    if rust:
+        import ninja_taisen_rust
+
+        response_json = ninja_taisen_rust.choose_move(request.model_dump_json(by_alias=True, exclude_none=True))
+        return ChooseResponse.model_validate_json(response_json)
+
+    chosen_moves = __choose_moves(
+        board=Board.from_dto(request.board),
         team=TEAM_BY_DTO[request.team],
         dice_rolls={
             Category.rock: request.dice.rock,
             Category.paper: request.dice.paper,
             Category.scissors: request.dice.scissors,
         },
+        strategy=request.strategy,
+        seed=request.seed,
+        deduplicate=bool(request.deduplicate),
     )
-    if len(all_permitted_moves) == 0:
-        return ChooseResponse(moves=[])
+    return ChooseResponse(moves=[m.to_dto() for m in chosen_moves])
+
 
-    random = SafeRandom(request.seed)
-    strategy = lookup_strategy(strategy=request.strategy, random=random)
-    chosen_moves = strategy.choose_moves(all_permitted_moves)
-    return ChooseResponse(moves=[m.to_dto() for m in chosen_moves.moves])
+def choose_move_binary(request: bytes, rust: bool = False) -> bytes:
+    """
+    As choose_move, for a request and response in the compact binary wire format of objects/wire_format.py
+    """
+    if rust:
+        import ninja_taisen_rust
 
+        return ninja_taisen_rust.choose_move_binary(request)
+
+    binary_request = decode_choose_request(request)
+    chosen_moves = __choose_moves(
+        board=binary_request.board,
+        team=binary_request.team,
+        dice_rolls=binary_request.dice_rolls,
+        strategy=binary_request.strategy,
+        seed=binary_request.seed,
+        deduplicate=binary_request.deduplicate,
+    )
+    return encode_choose_response(chosen_moves)
+
+
+def __choose_moves(
+    board: Board, team: Team, dice_rolls: dict[Category, int], strategy: str, seed: int | None, deduplicate: bool
+) -> list[Move]:
+    permitted_moves = iter_permitted_moves(
+        starting_board=board, team=team, dice_rolls=dice_rolls, deduplicate=deduplicate
+    )
+    chosen_moves = lookup_strategy(strategy=strategy, random=SafeRandom(seed)).choose_moves_streaming(permitted_moves)
+    return [] if chosen_moves is None else chosen_moves.moves
+
+
+def choose_moves(
+    requests: list[ChooseRequest], rust: bool = False, indices: list[int] | None = None
+) -> list[ChooseResponse]:
+    """
+    :param indices: the index of each request within a larger batch, used to name an invalid request
+    :return: the response to each request, as choose_move, in the same order. With rust=True, the requests are shared
+    between threads with the GIL released, so other Python threads keep running meanwhile. The first invalid request
+    raises ValueError, naming its index
+    """
+    if rust:
+        import ninja_taisen_rust
+
+        responses_json = ninja_taisen_rust.choose_moves(__json_array(requests), indices)
+        return CHOOSE_RESPONSES.validate_json(responses_json)
+    return handle_each(choose_move, requests, indices)
+
+
+def execute_move(request: ExecuteRequest, rust: bool = False) -> ExecuteResponse:
+    if rust:
+        import ninja_taisen_rust
+
+        response_json = ninja_taisen_rust.execute_move(request.model_dump_json(by_alias=True, exclude_none=True))
+        return ExecuteResponse.model_validate_json(response_json)
 
-def execute_move(request: ExecuteRequest) -> ExecuteResponse:
     board = Board.from_dto(request.board)
     dice_by_category = {
         Category.rock: request.dice.rock,
@@ -128,3 +402,24 @@ def execute_move(request: ExecuteRequest) -> ExecuteResponse:
         )
 
     return ExecuteResponse(board=board.to_dto())
+
+
+def execute_moves(
+    requests: list[ExecuteRequest], rust: bool = False, indices: list[int] | None = None
+) -> list[ExecuteResponse]:
+    """
+    :param indices: the index of each request within a larger batch, used to name an invalid request
+    :return: the response to each request, as execute_move, in the same order. With rust=True, the requests are shared
+    between threads with the GIL released, so other Python threads keep running meanwhile. The first invalid request
+    raises ValueError, naming its index
+    """
+    if rust:
+        import ninja_taisen_rust
+
+        responses_json = ninja_taisen_rust.execute_moves(__json_array(requests), indices)
+        return EXECUTE_RESPONSES.validate_json(responses_json)
+    return handle_each(execute_move, requests, indices)
+
+
+def __json_array(requests: Iterable[ChooseRequest | ExecuteRequest]) -> str:
+    return "[" + ",".join(r.model_dump_json(by_alias=True, exclude_none=True) for r in requests) + "]"
@@ -1,9 +1,20 @@
+import asyncio
+import multiprocessing
+import os
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import cache, partial
 from logging import getLogger
+from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 
-from ninja_taisen import choose_move, execute_move
-from ninja_taisen.dtos import ChooseRequest, ExecuteRequest
+from ninja_taisen import choose_move, choose_move_binary, choose_moves, execute_move, execute_moves
+from ninja_taisen.dtos import ChooseRequest, ChooseResponse, ExecuteRequest
+from ninja_taisen.objects.wire_format import BINARY_MEDIA_TYPE
+from ninja_taisen.utils.batch_requests import handle_each
+from ninja_taisen.utils.choose_cache import ChooseCache
 from ninja_taisen.utils.logging_setup import setup_logging
 from ninja_taisen.utils.run_directory import setup_run_directory
 
@@ -13,19 +24,145 @@ setup_logging(log_file=run_directory / "log.txt")
 log = getLogger(__name__)
 
 
-app = FastAPI()
+# Choosing and executing moves is CPU-bound, so it never runs on the event loop, where it would hold up every other
+# client. The Python engine holds the GIL throughout, so it runs on a pool of worker processes. The Rust engine
+# releases the GIL, so it runs on a thread of the event loop's default executor instead
+MAX_WORKER_PROCESSES = multiprocessing.cpu_count()
+
+
+@cache
+def process_pool() -> ProcessPoolExecutor:
+    log.info(f"Starting a pool of {MAX_WORKER_PROCESSES} worker processes")
+    return ProcessPoolExecutor(max_workers=MAX_WORKER_PROCESSES)
+
+
+# Seeded choose requests are deterministic, so their responses are cached here in the server process, in front of the
+# worker processes. Set this environment variable to a file path to keep the cache between runs of the server
+CHOOSE_CACHE_PATH_VARIABLE = "NINJA_TAISEN_CHOOSE_CACHE"
+choose_cache_path = os.environ.get(CHOOSE_CACHE_PATH_VARIABLE)
+choose_cache = ChooseCache(path=Path(choose_cache_path) if choose_cache_path else None)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    if choose_cache.path is not None:
+        choose_cache.save()
+    if process_pool.cache_info().currsize > 0:
+        process_pool().shutdown()
+        process_pool.cache_clear()
+
+
+app = FastAPI(lifespan=lifespan)
 log.info(f"Setting up FastAPI server '{__name__}'")
 
 
+async def __handle_one[Req, Resp](handle: Callable[..., Resp], request: Req, rust: bool) -> Resp:
+    if rust:
+        return await asyncio.to_thread(handle, request, rust=True)
+    return await asyncio.get_running_loop().run_in_executor(process_pool(), handle, request)
+
+
+async def __handle_many[Req, Resp](
+    handle: Callable[..., Resp],
+    handle_many: Callable[..., list[Resp]],
+    requests: list[Req],
+    rust: bool,
+    indices: list[int] | None = None,
+) -> list[Resp]:
+    """
+    :param indices: the index of each request within the whole batch, used to name an invalid request
+    """
+    if rust:
+        return await asyncio.to_thread(handle_many, requests, rust=True, indices=indices)
+
+    # Hand each worker process an equal share of the requests, in order, so the responses can be joined back up. Each
+    # share carries its requests' indices, so that an invalid request is named by its index in the whole batch
+    indices = list(range(len(requests))) if indices is None else indices
+    share = max(-(-len(requests) // MAX_WORKER_PROCESSES), 1)
+    loop = asyncio.get_running_loop()
+    shares = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                process_pool(), partial(handle_each, handle, requests[i : i + share], indices[i : i + share])
+            )
+            for i in range(0, len(requests), share)
+        )
+    )
+    return [response for responses in shares for response in responses]
+
+
+async def __choose_with_cache(requests: list[ChooseRequest], rust: bool) -> list[ChooseResponse]:
+    # Each key needs the request's board to be built and hashed, so this is kept off the event loop too. It is cheaper
+    # than pickling the requests, so a thread is used for both engines rather than the pool of worker processes
+    keys = await asyncio.to_thread(handle_each, partial(ChooseCache.key, rust=rust), requests)
+    cached = {i: r for i, key in enumerate(keys) if key is not None and (r := choose_cache.get(key)) is not None}
+
+    misses = [i for i in range(len(requests)) if i not in cached]
+    computed: dict[int, ChooseResponse] = {}
+    if misses:
+        # Invalid requests are never cached, so they are all among the misses, and are named by their index in the
+        # whole batch
+        responses = await __handle_many(choose_move, choose_moves, [requests[i] for i in misses], rust, misses)
+        computed = dict(zip(misses, responses, strict=True))
+    for i, response in computed.items():
+        key = keys[i]
+        if key is not None:
+            choose_cache.put(key, response)
+    return [cached[i] if i in cached else computed[i] for i in range(len(requests))]
+
+
 @app.post("/choose")
-async def handle_choose(request_body: ChooseRequest) -> dict:
+async def handle_choose(request_body: ChooseRequest, rust: bool = False) -> dict:
     log.info("Added /choose POST endpoint")
-    response_body = choose_move(request=request_body)
+    try:
+        [response_body] = await __choose_with_cache([request_body], rust)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
     return response_body.model_dump(round_trip=True, by_alias=True)
 
 
+@app.post("/choose/batch")
+async def handle_choose_batch(request_bodies: list[ChooseRequest], rust: bool = False) -> list[dict]:
+    log.info(f"Added /choose/batch POST endpoint with {len(request_bodies)} requests")
+    try:
+        response_bodies = await __choose_with_cache(request_bodies, rust)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    return [r.model_dump(round_trip=True, by_alias=True) for r in response_bodies]
+
+
+@app.get("/cache/stats")
+async def handle_cache_stats() -> dict:
+    stats = choose_cache.stats()
+    return {"hits": stats.hits, "misses": stats.misses, "size": stats.size, "hitRate": stats.hit_rate}
+
+
+@app.post("/choose/binary", response_class=Response)
+async def handle_choose_binary(request: Request, rust: bool = False) -> Response:
+    log.info("Added /choose/binary POST endpoint")
+    try:
+        response_body = await __handle_one(choose_move_binary, await request.body(), rust)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    return Response(content=response_body, media_type=BINARY_MEDIA_TYPE)
+
+
 @app.post("/execute")
-async def handle_execute(request_body: ExecuteRequest) -> dict:
+async def handle_execute(request_body: ExecuteRequest, rust: bool = False) -> dict:
     log.info("Added /execute POST endpoint")
-    response_body = execute_move(request=request_body)
+    try:
+        response_body = await __handle_one(execute_move, request_body, rust)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
     return response_body.model_dump(round_trip=True, by_alias=True)
+
+
+@app.post("/execute/batch")
+async def handle_execute_batch(request_bodies: list[ExecuteRequest], rust: bool = False) -> list[dict]:
+    log.info(f"Added /execute/batch POST endpoint with {len(request_bodies)} requests")
+    try:
+        response_bodies = await __handle_many(execute_move, execute_moves, request_bodies, rust)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    return [r.model_dump(round_trip=True, by_alias=True) for r in response_bodies]
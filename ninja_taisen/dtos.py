@@ -83,6 +83,9 @@ class ChooseRequest(NinjaTaisenModel):
     # If a seed is provided, psuedo-random numbers will be deterministic
     seed: int | None = None
 
+    # If true, only one sequence of moves is considered for each distinct resulting board
+    deduplicate: bool | None = None
+
 
 class MoveDto(NinjaTaisenModel):
     dice_category: CategoryDto
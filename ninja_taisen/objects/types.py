@@ -1,5 +1,6 @@
-from collections import defaultdict
+from collections.abc import Mapping
 from enum import IntEnum
+from random import Random
 from typing import NamedTuple
 
 from ninja_taisen.dtos import BoardDto, CategoryDto, MoveDto, TeamDto
@@ -48,6 +49,18 @@ TEAM_BY_SHORTHAND = {"M": Team.monkey, "W": Team.wolf}
 SHORTHAND_BY_TEAM = {v: k for k, v in TEAM_BY_SHORTHAND.items()}
 
 
+# On the Board, each card is stored as a single byte using the same bit layout as src/card.rs
+# 7:        0=null, 1=non-null
+# 6:        0=monkey, 1=wolf
+# 5,4:      [0,0]=rock, [0,1]=paper, [1,0]=scissors, [1,1]=joker (i.e. the Category value)
+# 3,2,1,0:  strength
+NULL_CODE = 0b0_0_00_0000
+BIT_NON_NULL = 0b1_0_00_0000
+CHECK_TEAM = 0b0_1_00_0000
+CHECK_CATEGORY = 0b0_0_11_0000
+CHECK_STRENGTH = 0b0_0_00_1111
+
+
 class Card(NamedTuple):
     team: Team
     category: Category
@@ -58,104 +71,303 @@ class Card(NamedTuple):
 
     @classmethod
     def from_dto(cls, dto: str) -> Card:
-        assert len(dto) == 3
-        return Card(team=TEAM_BY_SHORTHAND[dto[0]], category=CATEGORY_BY_SHORTHAND[dto[1]], strength=int(dto[2]))
+        code = CODE_BY_DTO.get(dto)
+        if code is None:
+            raise ValueError(f"Unexpected card {dto}")
+        return Card.from_code(code)
 
     def to_dto(self) -> str:
-        return str(self)
+        return DTO_BY_CODE[self.to_code()]
+
+    @classmethod
+    def from_code(cls, code: int) -> Card:
+        card = CARD_BY_CODE[code]
+        if card is None:
+            raise ValueError(f"Unexpected card code {code:#010b}")
+        return card
+
+    def to_code(self) -> int:
+        return BIT_NON_NULL | (self.team << 6) | (self.category << 4) | self.strength
+
+
+def __cards_by_code() -> list[Card | None]:
+    cards_by_code: list[Card | None] = [None] * 256
+    for team in Team:
+        for category in Category:
+            for strength in range(5):
+                card = Card(team=team, category=category, strength=strength)
+                cards_by_code[card.to_code()] = card
+    return cards_by_code
+
+
+# Every card which can appear on a board, including jokers with reduced strength, indexed by code
+CARD_BY_CODE = __cards_by_code()
+
+# Interning tables between the DTO string of every card above and its code, so that converting a board to or from its
+# DTO is a lookup per card rather than parsing or building each string
+CODE_BY_DTO = {str(card): code for code, card in enumerate(CARD_BY_CODE) if card is not None}
+DTO_BY_CODE = {code: dto for dto, code in CODE_BY_DTO.items()}
 
 
 BOARD_LENGTH = 11
 
+# Each team has 10 cards, so no pile can ever be taller than this
+PILE_CAPACITY = 10
+TEAM_CARDS_LENGTH = BOARD_LENGTH * PILE_CAPACITY
+HEIGHTS_OFFSET = 2 * TEAM_CARDS_LENGTH
+BOARD_BYTES = HEIGHTS_OFFSET + 2 * BOARD_LENGTH
+
+
+# Zobrist hashing: a random 64-bit key for every card code in every card slot, indexed by slot * 256 + code. A board's
+# hash is the XOR of the keys of its cards, so moving or removing a card updates the hash with a couple of XORs.
+# Empty slots have key 0, so the empty board hashes to 0
+ZOBRIST_SEED = 20241113
+
+
+def __zobrist_keys() -> list[int]:
+    keys = memoryview(Random(ZOBRIST_SEED).randbytes(8 * HEIGHTS_OFFSET * 256)).cast("Q").tolist()
+    for slot in range(HEIGHTS_OFFSET):
+        keys[slot * 256 + NULL_CODE] = 0
+    return keys
+
+
+ZOBRIST_KEYS = __zobrist_keys()
 
-class Board(NamedTuple):
-    monkey_cards: defaultdict[int, list[Card]]
-    wolf_cards: defaultdict[int, list[Card]]
+
+def compute_zobrist_hash(data: bytearray) -> int:
+    result = 0
+    for slot, code in enumerate(data[:HEIGHTS_OFFSET]):
+        result ^= ZOBRIST_KEYS[slot * 256 + code]
+    return result
+
+
+# The weights which strategy/metric.py gives to each team's cards by pile position, and by strength (how many other
+# cards the card can beat). Cards on the board always carry their printed strength
+MONKEY_PILE_WEIGHTS = [4, 4, 4, 4, 5, 6, 7, 8, 9, 10, 100]
+WOLF_PILE_WEIGHTS = list(reversed(MONKEY_PILE_WEIGHTS))
+PILE_WEIGHTS = {Team.monkey: MONKEY_PILE_WEIGHTS, Team.wolf: WOLF_PILE_WEIGHTS}
+STRENGTH_WEIGHTS = [0, 3, 4, 5, 9]
+
+# The running totals which a board keeps for each team, so that metrics and victory checks never scan the piles. Each
+# total is stored at its offset + team
+TOTAL_COUNT = 0
+TOTAL_POSITION = 2
+TOTAL_STRENGTH = 4
+# Indexed by team * BOARD_LENGTH + pile_index, in the same way as the pile heights
+_PILE_WEIGHT_BY_HEIGHT_INDEX = MONKEY_PILE_WEIGHTS + WOLF_PILE_WEIGHTS
+
+
+def compute_totals(data: bytearray) -> list[int]:
+    totals = [0] * 6
+    for team in Team:
+        for pile_index in range(BOARD_LENGTH):
+            height = data[HEIGHTS_OFFSET + team * BOARD_LENGTH + pile_index]
+            pile_offset = team * TEAM_CARDS_LENGTH + pile_index * PILE_CAPACITY
+            totals[TOTAL_COUNT + team] += height
+            totals[TOTAL_POSITION + team] += height * PILE_WEIGHTS[team][pile_index]
+            totals[TOTAL_STRENGTH + team] += sum(
+                STRENGTH_WEIGHTS[code & CHECK_STRENGTH] for code in data[pile_offset : pile_offset + height]
+            )
+    return totals
+
+
+class Board:
+    """
+    The board, laid out in a single bytearray in the same way as src/board.rs:
+    - [0, 110): monkey cards, 10 slots per pile, bottom card first. Slots above the pile height are NULL_CODE
+    - [110, 220): wolf cards, laid out as above
+    - [220, 231): monkey pile heights
+    - [231, 242): wolf pile heights
+    Copying a board is a single buffer copy. The board's Zobrist hash and per-team totals are kept up to date as cards
+    move
+    """
+
+    __slots__ = ("data", "zobrist_hash", "totals")
+
+    def __init__(
+        self, data: bytearray | None = None, zobrist_hash: int | None = None, totals: list[int] | None = None
+    ) -> None:
+        self.data = bytearray(BOARD_BYTES) if data is None else data
+        assert len(self.data) == BOARD_BYTES
+        self.zobrist_hash = compute_zobrist_hash(self.data) if zobrist_hash is None else zobrist_hash
+        self.totals = compute_totals(self.data) if totals is None else totals
 
     @classmethod
-    def from_dto(cls, dto: BoardDto) -> Board:
-        return Board(
-            monkey_cards=defaultdict(
-                list, {i: [Card.from_dto(c) for c in cs] for i, cs in sorted(dto.monkey.items(), key=lambda t: t[0])}
-            ),
-            wolf_cards=defaultdict(
-                list, {i: [Card.from_dto(c) for c in cs] for i, cs in sorted(dto.wolf.items(), key=lambda t: t[0])}
-            ),
+    def from_piles(cls, monkey_cards: Mapping[int, list[Card]], wolf_cards: Mapping[int, list[Card]]) -> Board:
+        return Board.from_pile_codes(
+            monkey_codes={i: bytes(c.to_code() for c in cs) for i, cs in monkey_cards.items()},
+            wolf_codes={i: bytes(c.to_code() for c in cs) for i, cs in wolf_cards.items()},
         )
 
+    @classmethod
+    def from_pile_codes(cls, monkey_codes: Mapping[int, bytes], wolf_codes: Mapping[int, bytes]) -> Board:
+        """
+        :param monkey_codes: the card codes of each non-empty monkey pile, from the bottom of the pile up
+        :param wolf_codes: as monkey_codes, for the wolf piles
+        """
+        board = Board()
+        for team, piles in ((Team.monkey, monkey_codes), (Team.wolf, wolf_codes)):
+            cards_offset = team * TEAM_CARDS_LENGTH
+            for pile_index, pile in piles.items():
+                # Checked here, since an out of range pile would otherwise overwrite the neighbouring piles' slots
+                if not 0 <= pile_index < BOARD_LENGTH:
+                    raise ValueError(f"Unexpected pile index {pile_index}")
+                if len(pile) > PILE_CAPACITY:
+                    raise ValueError(f"Unexpected pile of {len(pile)} cards at pile index {pile_index}")
+                pile_offset = cards_offset + pile_index * PILE_CAPACITY
+                board.data[pile_offset : pile_offset + len(pile)] = pile
+                board.data[HEIGHTS_OFFSET + team * BOARD_LENGTH + pile_index] = len(pile)
+        board.zobrist_hash = compute_zobrist_hash(board.data)
+        board.totals = compute_totals(board.data)
+        return board
+
+    @classmethod
+    def from_dto(cls, dto: BoardDto) -> Board:
+        try:
+            return Board.from_pile_codes(
+                monkey_codes={i: bytes([CODE_BY_DTO[c] for c in cs]) for i, cs in dto.monkey.items()},
+                wolf_codes={i: bytes([CODE_BY_DTO[c] for c in cs]) for i, cs in dto.wolf.items()},
+            )
+        except KeyError as e:
+            raise ValueError(f"Unexpected card {e.args[0]}") from e
+
     def to_dto(self) -> BoardDto:
-        return BoardDto(
-            monkey={
-                i: [c.to_dto() for c in cs]
-                for i, cs in sorted(self.monkey_cards.items(), key=lambda t: t[0])
-                if len(cs) > 0
-            },
-            wolf={
-                i: [c.to_dto() for c in cs]
-                for i, cs in sorted(self.wolf_cards.items(), key=lambda t: t[0])
-                if len(cs) > 0
-            },
+        return BoardDto(monkey=self.__pile_dtos(Team.monkey), wolf=self.__pile_dtos(Team.wolf))
+
+    def __pile_dtos(self, team: Team) -> dict[int, list[str]]:
+        data = self.data
+        pile_dtos = {}
+        for pile_index, height in enumerate(self.heights(team)):
+            if height > 0:
+                pile_offset = team * TEAM_CARDS_LENGTH + pile_index * PILE_CAPACITY
+                pile_dtos[pile_index] = [DTO_BY_CODE[c] for c in data[pile_offset : pile_offset + height]]
+        return pile_dtos
+
+    def copy(self) -> Board:
+        return Board(bytearray(self.data), self.zobrist_hash, self.totals.copy())
+
+    def height(self, team: Team, pile_index: int) -> int:
+        return self.data[HEIGHTS_OFFSET + team * BOARD_LENGTH + pile_index]
+
+    def heights(self, team: Team) -> bytearray:
+        heights_offset = HEIGHTS_OFFSET + team * BOARD_LENGTH
+        return self.data[heights_offset : heights_offset + BOARD_LENGTH]
+
+    def count(self, team: Team) -> int:
+        return self.totals[TOTAL_COUNT + team]
+
+    def position_total(self, team: Team) -> int:
+        """
+        :return: the sum over the team's cards of the PILE_WEIGHTS of the piles they are in
+        """
+        return self.totals[TOTAL_POSITION + team]
+
+    def strength_total(self, team: Team) -> int:
+        """
+        :return: the sum over the team's cards of their STRENGTH_WEIGHTS
+        """
+        return self.totals[TOTAL_STRENGTH + team]
+
+    def card_code(self, team: Team, pile_index: int, card_index: int) -> int:
+        return self.data[team * TEAM_CARDS_LENGTH + pile_index * PILE_CAPACITY + card_index]
+
+    def card(self, team: Team, pile_index: int, card_index: int) -> Card:
+        return Card.from_code(self.card_code(team, pile_index, card_index))
+
+    def pile(self, team: Team, pile_index: int) -> list[Card]:
+        pile_offset = team * TEAM_CARDS_LENGTH + pile_index * PILE_CAPACITY
+        return [Card.from_code(c) for c in self.data[pile_offset : pile_offset + self.height(team, pile_index)]]
+
+    def piles(self, team: Team) -> dict[int, list[Card]]:
+        """
+        :return: A copy of the non-empty piles for the team, keyed by pile index in ascending order
+        """
+        return {i: self.pile(team, i) for i in range(BOARD_LENGTH) if self.height(team, i) > 0}
+
+    def move_cards(self, team: Team, pile_index: int, card_index: int, new_pile_index: int) -> None:
+        """
+        Move the card at card_index, and all cards on top of it, onto the top of another pile
+        """
+        if new_pile_index == pile_index:
+            return
+
+        data = self.data
+        height_index = HEIGHTS_OFFSET + team * BOARD_LENGTH + pile_index
+        new_height_index = HEIGHTS_OFFSET + team * BOARD_LENGTH + new_pile_index
+        old_height = data[height_index]
+        new_height = data[new_height_index]
+        moved_count = old_height - card_index
+
+        start = team * TEAM_CARDS_LENGTH + pile_index * PILE_CAPACITY + card_index
+        new_start = team * TEAM_CARDS_LENGTH + new_pile_index * PILE_CAPACITY + new_height
+        zobrist_hash = self.zobrist_hash
+        for offset, code in enumerate(data[start : start + moved_count]):
+            zobrist_hash ^= (
+                ZOBRIST_KEYS[(start + offset) * 256 + code] ^ ZOBRIST_KEYS[(new_start + offset) * 256 + code]
+            )
+        self.zobrist_hash = zobrist_hash
+        data[new_start : new_start + moved_count] = data[start : start + moved_count]
+        data[start : start + moved_count] = bytes(moved_count)
+
+        data[height_index] = card_index
+        data[new_height_index] = new_height + moved_count
+        self.totals[TOTAL_POSITION + team] += moved_count * (
+            _PILE_WEIGHT_BY_HEIGHT_INDEX[new_height_index - HEIGHTS_OFFSET]
+            - _PILE_WEIGHT_BY_HEIGHT_INDEX[height_index - HEIGHTS_OFFSET]
         )
 
-    def cards(self, team: Team) -> defaultdict[int, list[Card]]:
-        if team == Team.monkey:
-            return self.monkey_cards
-        if team == Team.wolf:
-            return self.wolf_cards
-        raise ValueError(f"Unsupported team {team}")
+    def remove_top_card(self, team: Team, pile_index: int) -> None:
+        height_index = HEIGHTS_OFFSET + team * BOARD_LENGTH + pile_index
+        height = self.data[height_index] - 1
+        slot = team * TEAM_CARDS_LENGTH + pile_index * PILE_CAPACITY + height
+        code = self.data[slot]
+        self.zobrist_hash ^= ZOBRIST_KEYS[slot * 256 + code]
+        self.data[slot] = NULL_CODE
+        self.data[height_index] = height
+
+        totals = self.totals
+        totals[TOTAL_COUNT + team] -= 1
+        totals[TOTAL_POSITION + team] -= _PILE_WEIGHT_BY_HEIGHT_INDEX[height_index - HEIGHTS_OFFSET]
+        totals[TOTAL_STRENGTH + team] -= STRENGTH_WEIGHTS[code & CHECK_STRENGTH]
 
     def locate_card(self, card: Card, team: Team) -> tuple[int, int]:
-        team_cards = self.cards(team)
+        code = card.to_code()
         for pile_index in range(BOARD_LENGTH):
-            for card_index in range(len(team_cards[pile_index])):
-                if team_cards[pile_index][card_index] == card:
+            for card_index in range(self.height(team, pile_index)):
+                if self.card_code(team, pile_index, card_index) == code:
                     return pile_index, card_index
         raise ValueError(f"Unable to find card {card} in board")
 
     def __str__(self) -> str:
         self_str = ""
 
-        max_monkey_height = (
-            max([len(pile_cards) for pile_cards in self.monkey_cards.values()]) if self.monkey_cards else 0
-        )
+        max_monkey_height = max(self.heights(Team.monkey))
         for row_index in range(max_monkey_height - 1, -1, -1):
-            self_str += self.__row_str(self.monkey_cards, row_index, Team.monkey) + "\n"
+            self_str += self.__row_str(row_index, Team.monkey) + "\n"
 
         self_str += "--- " * 11 + "\n"
 
-        max_wolf_height = max([len(pile_cards) for pile_cards in self.wolf_cards.values()]) if self.wolf_cards else 0
+        max_wolf_height = max(self.heights(Team.wolf))
         for row_index in range(max_wolf_height):
-            self_str += self.__row_str(self.wolf_cards, row_index, Team.wolf) + "\n"
+            self_str += self.__row_str(row_index, Team.wolf) + "\n"
 
         return self_str
 
-    @staticmethod
-    def __row_str(cards: defaultdict[int, list[Card]], row_index: int, team: Team) -> str:
+    def __row_str(self, row_index: int, team: Team) -> str:
         row_str = ""
 
         for pile_index in range(11):
-            if len(cards[pile_index]) <= row_index:
+            if self.height(team, pile_index) <= row_index:
                 row_str += "    "
             else:
-                row_str += str(cards[pile_index][row_index]) + " "
+                row_str += str(self.card(team, pile_index, row_index)) + " "
 
         return row_str
 
     def __eq__(self, other):
         if not isinstance(other, Board):
             raise TypeError(f"Unexpected type {type(other)}")
-        for i in range(BOARD_LENGTH):
-            if len(self.monkey_cards[i]) != len(other.monkey_cards[i]):
-                return False
-            if len(self.wolf_cards[i]) != len(other.wolf_cards[i]):
-                return False
-            for self_monkey, other_monkey in zip(self.monkey_cards[i], other.monkey_cards[i], strict=True):
-                if self_monkey != other_monkey:
-                    return False
-            for self_wolf, other_wolf in zip(self.wolf_cards[i], other.wolf_cards[i], strict=True):
-                if self_wolf != other_wolf:
-                    return False
-        return True
+        return self.data == other.data
 
 
 class BattleStatus(IntEnum):
@@ -0,0 +1,132 @@
+import struct
+from typing import NamedTuple
+
+from ninja_taisen.dtos import ChooseRequest, ChooseResponse, MoveDto
+from ninja_taisen.objects.types import (
+    BOARD_BYTES,
+    BOARD_LENGTH,
+    CARD_BY_CODE,
+    DTO_BY_CATEGORY,
+    HEIGHTS_OFFSET,
+    NULL_CODE,
+    PILE_CAPACITY,
+    TEAM_BY_DTO,
+    TEAM_CARDS_LENGTH,
+    Board,
+    Card,
+    Category,
+    Move,
+    Team,
+)
+
+# A compact binary alternative to the JSON ChooseRequest and ChooseResponse, for clients which send a high volume of
+# requests. Both engines decode it directly, without building a BoardDto along the way. A request is laid out as:
+# - the board, as the Rust Board holds it: the card codes of each team's PILE_CAPACITY cards, from the bottom of the
+#   first pile to the top of the last and padded with NULL_CODE, followed by the heights of each team's piles
+# - REQUEST_FOOTER: the rock, paper and scissors dice rolls, the team, the flags below, the seed as an unsigned 64-bit
+#   integer (0 without FLAG_SEED) and the length of the strategy name
+# - the strategy name, in UTF-8
+# A response is the number of moves, followed by the dice category and card code of each move, one byte each
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+WIRE_BOARD_BYTES = 2 * PILE_CAPACITY + 2 * BOARD_LENGTH
+REQUEST_FOOTER = struct.Struct("<BBBBBQB")
+REQUEST_HEADER_BYTES = WIRE_BOARD_BYTES + REQUEST_FOOTER.size
+FLAG_SEED = 0b01
+FLAG_DEDUPLICATE = 0b10
+
+CODES_BY_TEAM = {
+    team: frozenset(code for code, card in enumerate(CARD_BY_CODE) if card is not None and card.team == team)
+    for team in Team
+}
+
+
+class BinaryChooseRequest(NamedTuple):
+    board: Board
+    team: Team
+    dice_rolls: dict[Category, int]
+    strategy: str
+    seed: int | None
+    deduplicate: bool
+
+
+def encode_choose_request(request: ChooseRequest) -> bytes:
+    if request.seed is not None and not 0 <= request.seed < 2**64:
+        raise ValueError(f"Seed {request.seed} does not fit in the binary wire format")
+    strategy = request.strategy.encode()
+    flags = (FLAG_SEED if request.seed is not None else 0) | (FLAG_DEDUPLICATE if request.deduplicate else 0)
+    footer = REQUEST_FOOTER.pack(
+        request.dice.rock,
+        request.dice.paper,
+        request.dice.scissors,
+        TEAM_BY_DTO[request.team],
+        flags,
+        request.seed or 0,
+        len(strategy),
+    )
+    return __encode_board(Board.from_dto(request.board)) + footer + strategy
+
+
+def decode_choose_request(data: bytes) -> BinaryChooseRequest:
+    if len(data) < REQUEST_HEADER_BYTES:
+        raise ValueError(f"Expected a binary ChooseRequest of at least {REQUEST_HEADER_BYTES} bytes, got {len(data)}")
+    rock, paper, scissors, team, flags, seed, strategy_length = REQUEST_FOOTER.unpack_from(data, WIRE_BOARD_BYTES)
+    if len(data) != REQUEST_HEADER_BYTES + strategy_length:
+        raise ValueError(f"Expected a strategy name of {strategy_length} bytes, got {len(data) - REQUEST_HEADER_BYTES}")
+
+    return BinaryChooseRequest(
+        board=__decode_board(data[:WIRE_BOARD_BYTES]),
+        team=Team(team),
+        dice_rolls={Category.rock: rock, Category.paper: paper, Category.scissors: scissors},
+        strategy=data[REQUEST_HEADER_BYTES:].decode(),
+        seed=seed if flags & FLAG_SEED else None,
+        deduplicate=bool(flags & FLAG_DEDUPLICATE),
+    )
+
+
+def __encode_board(board: Board) -> bytes:
+    team_cards = (
+        b"".join(board.data[o : o + h] for o, h in zip(__pile_offsets(team), board.heights(team), strict=True))
+        for team in Team
+    )
+    return (
+        b"".join(cards.ljust(PILE_CAPACITY, bytes([NULL_CODE])) for cards in team_cards) + board.data[HEIGHTS_OFFSET:]
+    )
+
+
+def __decode_board(wire_board: bytes) -> Board:
+    data = bytearray(BOARD_BYTES)
+    data[HEIGHTS_OFFSET:] = wire_board[2 * PILE_CAPACITY :]
+    for team in Team:
+        cards = wire_board[team * PILE_CAPACITY : (team + 1) * PILE_CAPACITY]
+        heights = data[HEIGHTS_OFFSET + team * BOARD_LENGTH : HEIGHTS_OFFSET + (team + 1) * BOARD_LENGTH]
+        count = sum(heights)
+        if count > PILE_CAPACITY:
+            raise ValueError(f"Expected at most {PILE_CAPACITY} {team.name} cards, got {count}")
+        if not CODES_BY_TEAM[team].issuperset(cards[:count]) or any(cards[count:]):
+            raise ValueError(f"Unexpected {team.name} card codes {cards.hex()}")
+
+        position = 0
+        for pile_offset, height in zip(__pile_offsets(team), heights, strict=True):
+            data[pile_offset : pile_offset + height] = cards[position : position + height]
+            position += height
+    return Board(data)
+
+
+def __pile_offsets(team: Team) -> range:
+    return range(team * TEAM_CARDS_LENGTH, (team + 1) * TEAM_CARDS_LENGTH, PILE_CAPACITY)
+
+
+def encode_choose_response(moves: list[Move]) -> bytes:
+    return bytes([len(moves), *(code for m in moves for code in (m.dice_category, m.card.to_code()))])
+
+
+def decode_choose_response(data: bytes) -> ChooseResponse:
+    if len(data) == 0 or len(data) != 1 + 2 * data[0]:
+        raise ValueError(f"Unexpected binary ChooseResponse {data.hex()}")
+    return ChooseResponse(
+        moves=[
+            MoveDto(dice_category=DTO_BY_CATEGORY[Category(data[i])], card=Card.from_code(data[i + 1]).to_dto())
+            for i in range(1, len(data), 2)
+        ]
+    )
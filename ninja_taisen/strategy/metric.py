@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
-from collections import defaultdict
 
-from ninja_taisen.objects.types import Board, Card, Team
+import numpy as np
+import numpy.typing as npt
+
+from ninja_taisen.algos.candidate_batch import CandidateBatch
+from ninja_taisen.objects.types import Board, Team
 
 
 class IMetric(ABC):
@@ -9,57 +12,57 @@ class IMetric(ABC):
     def calculate(self, board: Board, team: Team) -> float:
         pass
 
+    @abstractmethod
+    def calculate_batch(self, batch: CandidateBatch, team: Team) -> npt.NDArray[np.float64]:
+        """
+        :return: (n_candidates,) the metric of every board in the batch, equal to calculate() on each board
+        """
+        pass
+
     @staticmethod
     def _normalise(team_metric: float, other_team_metric: float) -> float:
         assert team_metric >= 0.0
         assert other_team_metric >= 0.0
         return team_metric / other_team_metric if other_team_metric != 0.0 else team_metric
 
-
+    @staticmethod
+    def _normalise_batch(team_totals: npt.NDArray[np.int64], team: Team) -> npt.NDArray[np.float64]:
+        """
+        As _normalise, for (n_candidates, 2) per-team totals
+        """
+        team_metric = team_totals[:, team].astype(np.float64)
+        other_team_metric = team_totals[:, team.other()].astype(np.float64)
+        nonzero = other_team_metric != 0.0
+        return np.where(nonzero, team_metric / np.where(nonzero, other_team_metric, 1.0), team_metric)
+
+
+# Each metric reads running totals which the board keeps up to date as cards move, so scoring a board is constant time.
+# The weights behind the totals are PILE_WEIGHTS and STRENGTH_WEIGHTS in objects/types.py
 class CountMetric(IMetric):
     def calculate(self, board: Board, team: Team) -> float:
-        team_metric = self.__count_cards(board.cards(team))
-        other_team_metric = self.__count_cards(board.cards(team.other()))
+        team_metric = float(board.count(team))
+        other_team_metric = float(board.count(team.other()))
         return self._normalise(team_metric, other_team_metric)
 
-    @staticmethod
-    def __count_cards(cards: defaultdict[int, list[Card]]) -> float:
-        return float(sum(len(pile) for pile in cards.values()))
-
-
-MONKEY_PILE_WEIGHTS = [4, 4, 4, 4, 5, 6, 7, 8, 9, 10, 100]
-WOLF_PILE_WEIGHTS = list(reversed(MONKEY_PILE_WEIGHTS))
-PILE_WEIGHTS = {Team.monkey: MONKEY_PILE_WEIGHTS, Team.wolf: WOLF_PILE_WEIGHTS}
+    def calculate_batch(self, batch: CandidateBatch, team: Team) -> npt.NDArray[np.float64]:
+        return self._normalise_batch(batch.counts(), team)
 
 
 class PositionMetric(IMetric):
     def calculate(self, board: Board, team: Team) -> float:
-        team_metric = self.__calculate_team_metric(board.cards(team), PILE_WEIGHTS[team])
-        other_team_metric = self.__calculate_team_metric(board.cards(team.other()), PILE_WEIGHTS[team.other()])
+        team_metric = float(board.position_total(team))
+        other_team_metric = float(board.position_total(team.other()))
         return self._normalise(team_metric, other_team_metric)
 
-    @staticmethod
-    def __calculate_team_metric(piles: defaultdict[int, list[Card]], pile_weights: list[int]) -> float:
-        metric = 0.0
-        for index, pile in piles.items():
-            metric += len(pile) * pile_weights[index]
-        return metric
-
-
-# Strength = how many other cards this card can beat
-STRENGTHS_TO_WEIGHTS = {1: 3.0, 2: 4.0, 3: 5.0, 4: 9.0}
+    def calculate_batch(self, batch: CandidateBatch, team: Team) -> npt.NDArray[np.float64]:
+        return self._normalise_batch(batch.position_totals(), team)
 
 
 class StrengthMetric(IMetric):
     def calculate(self, board: Board, team: Team) -> float:
-        team_metric = self.__calculate_team_metric(board.cards(team))
-        other_metric = self.__calculate_team_metric(board.cards(team.other()))
+        team_metric = float(board.strength_total(team))
+        other_metric = float(board.strength_total(team.other()))
         return self._normalise(team_metric, other_metric)
 
-    @staticmethod
-    def __calculate_team_metric(piles: defaultdict[int, list[Card]]) -> float:
-        metric = 0.0
-        for pile in piles.values():
-            for card in pile:
-                metric += STRENGTHS_TO_WEIGHTS[card.strength]
-        return metric
+    def calculate_batch(self, batch: CandidateBatch, team: Team) -> npt.NDArray[np.float64]:
+        return self._normalise_batch(batch.strength_totals(), team)
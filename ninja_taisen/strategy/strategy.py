@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from logging import getLogger
 
 from ninja_taisen.objects.types import CompletedMoves
@@ -10,3 +11,12 @@ class IStrategy(ABC):
     @abstractmethod
     def choose_moves(self, all_permitted_moves: list[CompletedMoves]) -> CompletedMoves:
         pass
+
+    def choose_moves_streaming(self, permitted_moves: Iterable[CompletedMoves]) -> CompletedMoves | None:
+        """
+        As choose_moves, but consuming the candidates as they are generated, e.g. by iter_permitted_moves. Strategies
+        which can decide without seeing every candidate should override this to stop consuming early
+        :return: the chosen moves, or None if there were no candidates
+        """
+        all_permitted_moves = list(permitted_moves)
+        return self.choose_moves(all_permitted_moves) if all_permitted_moves else None
@@ -1,7 +1,11 @@
 from collections import defaultdict
+from collections.abc import Iterable
 from logging import getLogger
 
+import numpy as np
+
 from ninja_taisen.algos import board_inspector
+from ninja_taisen.algos.candidate_batch import CandidateBatch
 from ninja_taisen.objects.safe_random import SafeRandom
 from ninja_taisen.objects.types import CompletedMoves
 from ninja_taisen.strategy.metric import IMetric
@@ -29,13 +33,41 @@ class RandomSpotWinStrategy(IStrategy):
 
         return self.random.choice(all_permitted_moves)
 
+    def choose_moves_streaming(self, permitted_moves: Iterable[CompletedMoves]) -> CompletedMoves | None:
+        """
+        Returns as soon as a winning move is generated. Otherwise every candidate is kept, since the random choice
+        between them needs to know how many there are, so memory grows with the number of candidates as in choose_moves
+        """
+        all_permitted_moves = []
+        for completed_moves in permitted_moves:
+            if board_inspector.is_winning_move(completed_moves):
+                return completed_moves
+            all_permitted_moves.append(completed_moves)
+        return self.random.choice(all_permitted_moves) if all_permitted_moves else None
+
+
+# Below this many candidates, the fixed cost of packing a CandidateBatch outweighs the saving from vectorised scoring
+BATCH_SCORING_THRESHOLD = 64
+
 
 class MetricStrategy(IStrategy):
-    def __init__(self, metric: IMetric, random: SafeRandom) -> None:
+    def __init__(
+        self,
+        metric: IMetric,
+        random: SafeRandom,
+        batch_scoring_threshold: int = BATCH_SCORING_THRESHOLD,
+    ) -> None:
+        """
+        :param batch_scoring_threshold: turns with at least this many candidate moves are scored as a CandidateBatch
+        """
         self.metric = metric
         self.random = random
+        self.batch_scoring_threshold = batch_scoring_threshold
 
     def choose_moves(self, all_permitted_moves: list[CompletedMoves]) -> CompletedMoves:
+        if len(all_permitted_moves) >= self.batch_scoring_threshold:
+            return self.__choose_moves_batch(all_permitted_moves)
+
         winning_move = board_inspector.find_first_winning_move(all_permitted_moves)
         if winning_move:
             return winning_move
@@ -48,3 +80,64 @@ class MetricStrategy(IStrategy):
         max_metric = max(metric_to_moves.keys())
         max_metrics_boards = metric_to_moves[max_metric]
         return self.random.choice(max_metrics_boards)
+
+    def choose_moves_streaming(self, permitted_moves: Iterable[CompletedMoves]) -> CompletedMoves | None:
+        """
+        Scores the candidates as they are generated, keeping only those tied for the best metric so far, and returns as
+        soon as a winning move is generated. Candidates are scored a batch_scoring_threshold at a time with a
+        CandidateBatch, so memory is not constant: it is bounded by the number of ties for the best metric, plus at
+        most batch_scoring_threshold pending candidates. The ties are all kept so that the random choice between them
+        is the same as choose_moves makes
+        """
+        best_metric = 0.0
+        best_moves: list[CompletedMoves] = []
+        pending_moves: list[CompletedMoves] = []
+        for completed_moves in permitted_moves:
+            pending_moves.append(completed_moves)
+            if len(pending_moves) < self.batch_scoring_threshold:
+                continue
+
+            batch = CandidateBatch.from_moves(pending_moves)
+            team = pending_moves[0].team
+            winning_indices = np.flatnonzero(batch.victorious_teams() == team)
+            if winning_indices.size:
+                return pending_moves[winning_indices[0]]
+
+            metrics = self.metric.calculate_batch(batch, team)
+            max_metric = metrics.max()
+            if not best_moves or max_metric > best_metric:
+                best_metric = float(max_metric)
+                best_moves = []
+            if max_metric == best_metric:
+                best_moves.extend(pending_moves[i] for i in np.flatnonzero(metrics == max_metric))
+            pending_moves = []
+
+        # Too few candidates remain to be worth packing into a CandidateBatch
+        winning_move = board_inspector.find_first_winning_move(pending_moves)
+        if winning_move:
+            return winning_move
+        for completed_moves in pending_moves:
+            metric = self.metric.calculate(completed_moves.board, completed_moves.team)
+            if not best_moves or metric > best_metric:
+                best_metric = metric
+                best_moves = [completed_moves]
+            elif metric == best_metric:
+                best_moves.append(completed_moves)
+
+        return self.random.choice(best_moves) if best_moves else None
+
+    def __choose_moves_batch(self, all_permitted_moves: list[CompletedMoves]) -> CompletedMoves:
+        """
+        As choose_moves, but scoring every candidate in one vectorised pass. The candidates all belong to the same team,
+        and ties are broken by the same single random choice, so the chosen move is identical
+        """
+        batch = CandidateBatch.from_moves(all_permitted_moves)
+        team = all_permitted_moves[0].team
+
+        winning_indices = np.flatnonzero(batch.victorious_teams() == team)
+        if winning_indices.size:
+            return all_permitted_moves[winning_indices[0]]
+
+        metrics = self.metric.calculate_batch(batch, team)
+        max_metric_indices = np.flatnonzero(metrics == metrics.max())
+        return all_permitted_moves[self.random.choice(max_metric_indices.tolist())]
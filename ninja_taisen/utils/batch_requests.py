@@ -0,0 +1,19 @@
+from collections.abc import Callable
+
+
+def handle_each[Req, Resp](
+    handle: Callable[[Req], Resp], requests: list[Req], indices: list[int] | None = None
+) -> list[Resp]:
+    """
+    :param indices: the index of each request within the whole batch, used to name an invalid request. By default,
+    its position in requests
+    :return: the response to each request, in the same order. The first invalid request raises ValueError, naming its
+    index
+    """
+    responses = []
+    for index, request in zip(range(len(requests)) if indices is None else indices, requests, strict=True):
+        try:
+            responses.append(handle(request))
+        except ValueError as e:
+            raise ValueError(f"Invalid request at index {index}: {e}") from e
+    return responses
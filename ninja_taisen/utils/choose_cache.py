@@ -0,0 +1,90 @@
+import json
+from logging import getLogger
+from pathlib import Path
+from typing import NamedTuple
+
+from ninja_taisen.dtos import ChooseRequest, ChooseResponse
+from ninja_taisen.objects.types import TEAM_BY_DTO, Board, Team
+from ninja_taisen.utils.lru_cache import CacheStats, LruCache
+
+log = getLogger(__name__)
+
+CHOOSE_CACHE_SIZE = 1 << 16
+
+
+class ChooseKey(NamedTuple):
+    """
+    Everything a seeded choose_move depends on. The board is identified by its bytes, which do not depend on how its
+    BoardDto was written. Unlike its Zobrist hash, they cannot collide with another board's. The engines draw different
+    random numbers from the same seed, so rust is part of the key too
+    """
+
+    board: bytes
+    team: Team
+    rock: int
+    paper: int
+    scissors: int
+    strategy: str
+    seed: int
+    deduplicate: bool
+    rust: bool
+
+
+class ChooseCache:
+    """
+    A bounded cache of the responses to seeded choose_move requests, which are deterministic. If given a path, the
+    cache is loaded from it (if it exists) and save() writes the cache back to it
+    """
+
+    def __init__(self, max_size: int = CHOOSE_CACHE_SIZE, path: Path | None = None) -> None:
+        self.responses: LruCache[ChooseKey, ChooseResponse] = LruCache(max_size)
+        self.path = path
+        if path is not None and path.exists():
+            for entry in json.loads(path.read_text()):
+                # The board is saved as hex, since JSON has no bytes
+                board, *fields = entry["key"]
+                key = ChooseKey(bytes.fromhex(board), *fields)
+                self.responses.put(key._replace(team=Team(key.team)), ChooseResponse.model_validate(entry["response"]))
+            log.info(f"Loaded {len(self.responses.entries)} cached choose responses from {path}")
+
+    @staticmethod
+    def key(request: ChooseRequest, rust: bool) -> ChooseKey | None:
+        """
+        :return: the key for the request, or None if it has no seed and so cannot be cached
+        """
+        if request.seed is None:
+            return None
+        return ChooseKey(
+            board=bytes(Board.from_dto(request.board).data),
+            team=TEAM_BY_DTO[request.team],
+            rock=request.dice.rock,
+            paper=request.dice.paper,
+            scissors=request.dice.scissors,
+            strategy=request.strategy,
+            seed=request.seed,
+            deduplicate=bool(request.deduplicate),
+            rust=rust,
+        )
+
+    def get(self, key: ChooseKey) -> ChooseResponse | None:
+        """
+        :return: a copy of the cached response, which the caller is free to modify, or None on a miss
+        """
+        response = self.responses.get(key)
+        return None if response is None else response.model_copy(deep=True)
+
+    def put(self, key: ChooseKey, response: ChooseResponse) -> None:
+        self.responses.put(key, response.model_copy(deep=True))
+
+    def stats(self) -> CacheStats:
+        return self.responses.stats()
+
+    def save(self) -> None:
+        if self.path is None:
+            raise ValueError("This ChooseCache has no path to save to")
+        entries = [
+            {"key": [key.board.hex(), *key[1:]], "response": response.model_dump(mode="json", by_alias=True)}
+            for key, response in self.responses.entries.items()
+        ]
+        self.path.write_text(json.dumps(entries))
+        log.info(f"Saved {len(entries)} cached choose responses to {self.path}")
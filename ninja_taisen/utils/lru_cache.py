@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import NamedTuple, cast
+
+_MISSING = object()
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.hit_rate:.1%} of {self.hits + self.misses} lookups hit, {self.size} entries"
+
+
+class LruCache[K: Hashable, V]:
+    """
+    A bounded cache which evicts the least recently used entry once full, counting its hits and misses
+    """
+
+    def __init__(self, max_size: int) -> None:
+        assert max_size > 0
+        self.max_size = max_size
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> V | None:
+        """
+        Counts a hit, marking the entry as most recently used, or else a miss
+        :return: the cached value for key, or None if there is none
+        """
+        value = self.entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return cast(V, value)
+
+    def put(self, key: K, value: V) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, size=len(self.entries))
@@ -0,0 +1,164 @@
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from enum import IntEnum
+from time import perf_counter
+from typing import Any
+
+
+class Phase(IntEnum):
+    """
+    The phases of a simulation which PhaseStats times. Battles are resolved while generating moves, so the time spent
+    generating moves is recorded including them, but reported without them
+    """
+
+    move_generation = 0
+    battle_resolution = 1
+    strategy_scoring = 2
+    dto_conversion = 3
+    result_writing = 4
+
+
+class PhaseStats:
+    """
+    Counters, and the seconds spent in each Phase, accumulated by one worker while simulating
+    """
+
+    __slots__ = ("games", "turns", "candidates", "card_moves", "battles", "seconds")
+
+    def __init__(self) -> None:
+        self.games = 0
+        self.turns = 0
+        # The candidate moves generated (and so scored) for each turn. A strategy which stops at a winning move
+        # generates no more candidates that turn, except in the lockstep engine, which generates them all up front
+        self.candidates = 0
+        # The cards moved by a dice roll while generating candidates, and the card battles which followed
+        self.card_moves = 0
+        self.battles = 0
+        self.seconds = [0.0] * len(Phase)
+
+    @staticmethod
+    def from_counts(
+        games: int, turns: int, candidates: int, card_moves: int, battles: int, seconds: list[float]
+    ) -> PhaseStats:
+        """
+        :param seconds: the seconds spent in each Phase, recorded as by PhaseStats
+        """
+        stats = PhaseStats()
+        stats.games = games
+        stats.turns = turns
+        stats.candidates = candidates
+        stats.card_moves = card_moves
+        stats.battles = battles
+        stats.seconds = list(seconds)
+        return stats
+
+    def merge(self, other: PhaseStats) -> None:
+        self.games += other.games
+        self.turns += other.turns
+        self.candidates += other.candidates
+        self.card_moves += other.card_moves
+        self.battles += other.battles
+        self.seconds = [a + b for a, b in zip(self.seconds, other.seconds, strict=True)]
+
+    def to_row(self) -> dict[str, Any]:
+        """
+        :return: the counters, their ratios and the seconds spent in each phase, as a row of the stats table
+        """
+        return {
+            "games": self.games,
+            "turns": self.turns,
+            "candidates": self.candidates,
+            "card_moves": self.card_moves,
+            "battles": self.battles,
+            "turns_per_game": self.turns / self.games if self.games else 0.0,
+            "candidates_per_turn": self.candidates / self.turns if self.turns else 0.0,
+            "battles_per_move": self.battles / self.card_moves if self.card_moves else 0.0,
+            "move_generation_s": self.seconds[Phase.move_generation] - self.seconds[Phase.battle_resolution],
+            "battle_resolution_s": self.seconds[Phase.battle_resolution],
+            "strategy_scoring_s": self.seconds[Phase.strategy_scoring],
+            "dto_conversion_s": self.seconds[Phase.dto_conversion],
+            "result_writing_s": self.seconds[Phase.result_writing],
+        }
+
+    def record_turns(self, turns: int, candidates: int, generation_s: float, scoring_s: float) -> None:
+        """
+        :param generation_s: the time spent generating the turns' candidates, including resolving battles
+        """
+        self.turns += turns
+        self.candidates += candidates
+        self.seconds[Phase.move_generation] += generation_s
+        self.seconds[Phase.strategy_scoring] += scoring_s
+
+    def time_turn[T](self, choose: Callable[[Iterator[T]], T | None], candidates: Iterator[T]) -> T | None:
+        """
+        Choose between a turn's candidates, which are generated lazily as choose consumes them, counting them and
+        timing their generation separately from choose's scoring of them
+        :return: the choice
+        """
+        generation_s = 0.0
+        candidate_count = 0
+
+        def timed_candidates() -> Iterator[T]:
+            nonlocal generation_s, candidate_count
+            while True:
+                start = perf_counter()
+                candidate = next(candidates, None)
+                generation_s += perf_counter() - start
+                if candidate is None:
+                    return
+                candidate_count += 1
+                yield candidate
+
+        start = perf_counter()
+        choice = choose(timed_candidates())
+        turn_s = perf_counter() - start
+        self.record_turns(1, candidate_count, generation_s, turn_s - generation_s)
+        return choice
+
+
+# Collection is off unless enabled by collect_phase_stats, so that the hot paths only pay for checking this
+__phase_stats: PhaseStats | None = None
+
+
+def phase_stats() -> PhaseStats | None:
+    """
+    :return: the stats being collected in this process, or None if collection is not enabled
+    """
+    return __phase_stats
+
+
+@contextmanager
+def collect_phase_stats(enabled: bool = True) -> Iterator[PhaseStats | None]:
+    """
+    Collect stats in this process for the duration of the block. Any stats already being collected (e.g. by the parent
+    of a forked worker process) are set aside until the block is complete
+    :param enabled: if False, nothing is collected and None is yielded
+    :return: the PhaseStats which is filled in as the block runs
+    """
+    global __phase_stats
+    if not enabled:
+        yield None
+        return
+    previous = __phase_stats
+    stats = __phase_stats = PhaseStats()
+    try:
+        yield stats
+    finally:
+        __phase_stats = previous
+
+
+@contextmanager
+def timed(phase: Phase) -> Iterator[None]:
+    """
+    Add the time taken by the block to the phase, if collecting stats. This costs around a microsecond, so is for
+    timing work done once per game or per chunk rather than once per move
+    """
+    stats = __phase_stats
+    if stats is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        stats.seconds[phase] += perf_counter() - start
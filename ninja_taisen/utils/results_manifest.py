@@ -0,0 +1,91 @@
+import json
+from logging import getLogger
+from pathlib import Path
+from typing import NamedTuple
+
+import polars as pl
+
+log = getLogger(__name__)
+
+
+class ManifestEntry(NamedTuple):
+    results_file: str
+    # Half-open [start, stop) ranges of the instruction ids whose results are in results_file
+    id_ranges: list[tuple[int, int]]
+
+
+class ResultsManifest:
+    """
+    Records which instructions have completed, and which chunk file holds their results, so that an interrupted
+    simulation can be resumed. The manifest is a json-lines file with one ManifestEntry per completed chunk, appended
+    only once the chunk's results file is complete
+    """
+
+    def __init__(self, chunk_results_dir: Path, resume: bool) -> None:
+        self.chunk_results_dir = chunk_results_dir
+        self.manifest_file = chunk_results_dir / "manifest.jsonl"
+        self.entries: list[ManifestEntry] = []
+
+        chunk_results_dir.mkdir(parents=True, exist_ok=True)
+        if resume and self.manifest_file.exists():
+            self.entries = self.__read_entries()
+            log.info(f"Resuming with {len(self.entries)} completed chunks from {self.manifest_file}")
+        # Rewrite the manifest with only the valid entries, so that we never append after an incomplete line
+        self.manifest_file.write_text("".join(self.__format(e) for e in self.entries))
+
+    def __read_entries(self) -> list[ManifestEntry]:
+        entries = []
+        for line in self.manifest_file.read_text().splitlines():
+            try:
+                content = json.loads(line)
+            except json.JSONDecodeError:
+                # We may have been interrupted part way through appending the final line
+                log.warning(f"Ignoring incomplete line in {self.manifest_file}: '{line}'")
+                continue
+            entry = ManifestEntry(
+                results_file=content["results_file"], id_ranges=[(a, b) for a, b in content["id_ranges"]]
+            )
+            if (self.chunk_results_dir / entry.results_file).exists():
+                entries.append(entry)
+            else:
+                log.warning(f"Ignoring manifest entry for missing file {entry.results_file}")
+        return entries
+
+    def record(self, entry: ManifestEntry) -> None:
+        with self.manifest_file.open("a") as f:
+            f.write(self.__format(entry))
+        self.entries.append(entry)
+
+    @staticmethod
+    def __format(entry: ManifestEntry) -> str:
+        return json.dumps(entry._asdict()) + "\n"
+
+    def remaining(self, instructions: pl.DataFrame) -> pl.DataFrame:
+        """
+        :return: the instructions whose ids are not covered by any completed chunk
+        """
+        if not self.entries:
+            return instructions
+        ranges = [r for e in self.entries for r in e.id_ranges]
+        completed_ids = pl.DataFrame(ranges, schema=["start", "stop"], orient="row").select(
+            pl.int_ranges("start", "stop").explode()
+        )
+        remaining = instructions.filter(~pl.col("id").is_in(completed_ids.to_series().implode()))
+        log.info(f"{instructions.height - remaining.height} instructions already completed; {remaining.height} remain")
+        return remaining
+
+    def results_files(self) -> list[Path]:
+        return [self.chunk_results_dir / e.results_file for e in self.entries]
+
+
+def id_ranges(ids: pl.Series) -> list[tuple[int, int]]:
+    """
+    Compress ids into sorted, half-open [start, stop) ranges of consecutive values
+    """
+    ranges: list[tuple[int, int]] = []
+    for id_ in ids.sort():
+        if ranges and ranges[-1][1] == id_:
+            ranges[-1] = (ranges[-1][0], id_ + 1)
+        elif not ranges or ranges[-1][1] < id_:
+            ranges.append((id_, id_ + 1))
+    return ranges
@@ -0,0 +1,107 @@
+import datetime
+import struct
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+from typing import Literal, Self
+
+import polars as pl
+import pyarrow as pa  # type: ignore[import-untyped]
+
+# The fixed-width result columns, with their struct format. The 8-byte columns come first to keep them aligned
+SHARED_COLUMN_FORMATS: dict[str, Literal["q", "B"]] = {
+    "turn_count": "q",
+    "monkey_cards_left": "q",
+    "wolf_cards_left": "q",
+    "start_time": "q",
+    "end_time": "q",
+    "winner": "B",
+}
+ARROW_TYPE_BY_FORMAT = {"q": pa.int64(), "B": pa.uint8()}
+WINNERS = ("none", "monkey", "wolf")
+WINNER_CODES = {winner: code for code, winner in enumerate(WINNERS)}
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+
+
+class SharedResultColumns:
+    """
+    The fixed-width result columns of a simulation, held in a shared memory block which worker processes write into
+    directly, each at the row positions of its own instructions. The parent creates the block and reads it back as a
+    DataFrame; workers attach to it by name
+    """
+
+    def __init__(self, row_count: int, name: str | None = None) -> None:
+        self.row_count = row_count
+        self.owner = name is None
+        size = row_count * sum(struct.calcsize(f) for f in SHARED_COLUMN_FORMATS.values())
+        if name is None:
+            self.shared_memory = SharedMemory(create=True, size=max(size, 1))
+        else:
+            # The parent owns the block; workers must not let the resource tracker unlink it when they exit
+            self.shared_memory = SharedMemory(name=name, track=False)
+
+        buffer = self.shared_memory.buf
+        assert buffer is not None
+        self.columns: dict[str, memoryview[int]] = {}
+        offset = 0
+        for column, fmt in SHARED_COLUMN_FORMATS.items():
+            width = row_count * struct.calcsize(fmt)
+            self.columns[column] = buffer[offset : offset + width].cast(fmt)
+            offset += width
+
+    @property
+    def name(self) -> str:
+        return self.shared_memory.name
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in self.columns.values():
+            view.release()
+        self.columns.clear()
+        self.shared_memory.close()
+        if self.owner:
+            self.shared_memory.unlink()
+
+    def write(
+        self,
+        row: int,
+        winner: str,
+        turn_count: int,
+        monkey_cards_left: int,
+        wolf_cards_left: int,
+        start_time: datetime.datetime,
+        end_time: datetime.datetime,
+    ) -> None:
+        self.columns["winner"][row] = WINNER_CODES[winner]
+        self.columns["turn_count"][row] = turn_count
+        self.columns["monkey_cards_left"][row] = monkey_cards_left
+        self.columns["wolf_cards_left"][row] = wolf_cards_left
+        self.columns["start_time"][row] = (start_time - EPOCH) // datetime.timedelta(microseconds=1)
+        self.columns["end_time"][row] = (end_time - EPOCH) // datetime.timedelta(microseconds=1)
+
+    def to_df(self) -> pl.DataFrame:
+        """
+        Copy the columns out of shared memory - a single memcpy each - so the block can be released afterwards
+        """
+        series = {}
+        for column, fmt in SHARED_COLUMN_FORMATS.items():
+            buffer = pa.py_buffer(self.columns[column].tobytes())
+            array = pa.Array.from_buffers(ARROW_TYPE_BY_FORMAT[fmt], self.row_count, [None, buffer])
+            series[column] = pl.Series(column, array)
+
+        return pl.DataFrame(
+            {
+                "winner": pl.Series(WINNERS).gather(series["winner"]),
+                "turn_count": series["turn_count"],
+                "monkey_cards_left": series["monkey_cards_left"],
+                "wolf_cards_left": series["wolf_cards_left"],
+                "start_time": series["start_time"].cast(pl.Datetime("us")),
+                "end_time": series["end_time"].cast(pl.Datetime("us")),
+            }
+        )
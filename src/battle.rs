@@ -1,5 +1,6 @@
 use crate::card::cards;
 
+#[derive(Clone, Copy)]
 pub struct BattleResult {
     // The winner of the battle. Either NULL, or one of the original two cards
     pub winner: u8,
@@ -17,7 +18,45 @@ pub struct BattleResult {
     pub card_b_residual: u8
 }
 
+// Every card fits in 6 bits once the NON_NULL bit and the (always zero) top strength bit are dropped:
+// team, 2 category bits and 3 strength bits. So every battle outcome fits in a 64 x 64 table, computed at compile time
+const CARD_INDEX_BITS: usize = 6;
+const BATTLE_TABLE_SIZE: usize = 1 << (2 * CARD_INDEX_BITS);
+static BATTLE_TABLE: [BattleResult; BATTLE_TABLE_SIZE] = build_battle_table();
+
+const fn card_index(card: u8) -> usize {
+    (((card >> 1) & 0b0_0_11_1000) | (card & 0b0_0_00_0111)) as usize
+}
+
+const fn card_from_index(index: usize) -> u8 {
+    cards::BIT_NON_NULL | (((index as u8) & 0b0_0_11_1000) << 1) | ((index as u8) & 0b0_0_00_0111)
+}
+
+const fn build_battle_table() -> [BattleResult; BATTLE_TABLE_SIZE] {
+    let null_result = BattleResult {
+        winner: cards::NULL,
+        card_a_residual: cards::NULL,
+        card_b_residual: cards::NULL
+    };
+    let mut table = [null_result; BATTLE_TABLE_SIZE];
+    let mut index_a = 0;
+    while index_a < 1 << CARD_INDEX_BITS {
+        let mut index_b = 0;
+        while index_b < 1 << CARD_INDEX_BITS {
+            table[(index_a << CARD_INDEX_BITS) | index_b] =
+                compute_battle_winner(card_from_index(index_a), card_from_index(index_b));
+            index_b += 1;
+        }
+        index_a += 1;
+    }
+    table
+}
+
 pub fn battle_winner(card_a: u8, card_b: u8) -> BattleResult {
+    BATTLE_TABLE[(card_index(card_a) << CARD_INDEX_BITS) | card_index(card_b)]
+}
+
+const fn compute_battle_winner(card_a: u8, card_b: u8) -> BattleResult {
     let card_a_team = card_a & cards::CHECK_TEAM;
     let card_b_team = card_b & cards::CHECK_TEAM;
 
@@ -183,9 +222,40 @@ pub fn battle_winner(card_a: u8, card_b: u8) -> BattleResult {
 
 #[cfg(test)]
 mod tests {
-    use crate::battle::battle_winner;
+    use crate::battle::{battle_winner, card_from_index, card_index, compute_battle_winner};
     use crate::card::cards;
 
+    #[test]
+    fn test_table_matches_computed_battles() {
+        let teams = [cards::BIT_TEAM_MONKEY, cards::BIT_TEAM_WOLF];
+        let categories = [
+            cards::BITS_CATEGORY_ROCK,
+            cards::BITS_CATEGORY_PAPER,
+            cards::BITS_CATEGORY_SCISSORS,
+            cards::BITS_CATEGORY_JOKER,
+        ];
+        let mut all_cards = Vec::new();
+        for team in teams {
+            for category in categories {
+                for strength in 0..=4 {
+                    let card = cards::BIT_NON_NULL | team | category | strength;
+                    assert_eq!(card, card_from_index(card_index(card)));
+                    all_cards.push(card);
+                }
+            }
+        }
+
+        for &card_a in &all_cards {
+            for &card_b in &all_cards {
+                let expected = compute_battle_winner(card_a, card_b);
+                let actual = battle_winner(card_a, card_b);
+                assert_eq!(expected.winner, actual.winner);
+                assert_eq!(expected.card_a_residual, actual.card_a_residual);
+                assert_eq!(expected.card_b_residual, actual.card_b_residual);
+            }
+        }
+    }
+
     #[test]
     fn test_rock_paper_scissors_1() {
         let card_a = cards::MP1;
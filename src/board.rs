@@ -1,16 +1,87 @@
 use std::collections::BTreeMap;
+use std::hash::{Hash, Hasher};
 use rand::prelude::SliceRandom;
 use crate::battle::battle_winner;
 use crate::card;
 use crate::card::cards;
 use crate::dto::*;
+use crate::phase_stats;
 
-#[derive(Clone, Debug, PartialEq)]
+// Each team has at most 10 cards, spread over 11 piles of at most 10. Rather than a 110-slot array per team, the
+// board holds each team's cards in pile order (pile 0 bottom to top, then pile 1, ...) with the unused tail NULL,
+// plus the 11 pile heights packed 4 bits apiece into one word. The whole board is then 44 bytes, and pile offsets,
+// card counts and victory checks are a handful of word operations
+#[derive(Clone, Debug, PartialEq, Eq)]
 pub struct Board {
-    pub monkey_cards: [u8; 110],
-    pub wolf_cards: [u8; 110],
-    pub monkey_heights: [u8; 11],
-    pub wolf_heights: [u8; 11]
+    // Indexed by team_index()
+    cards: [[u8; TEAM_CARDS]; 2],
+    heights: [u64; 2],
+    // The XOR of zobrist_key() over every card on the board, where a card's index is pile_index * 10 + card_index.
+    // Kept up to date by every method which changes a card
+    pub zobrist: u64
+}
+
+pub const PILE_COUNT: u8 = 11;
+pub const TEAM_CARDS: usize = 10;
+const HEIGHT_BITS: u32 = 4;
+const HEIGHT_MASK: u64 = (1 << HEIGHT_BITS) - 1;
+const LOW_NIBBLES: u64 = 0x0F0F_0F0F_0F0F_0F0F;
+
+#[inline]
+fn team_index(is_monkey: bool) -> usize {
+    if is_monkey { 0 } else { 1 }
+}
+
+// The sum of the 4-bit heights packed into a word: add adjacent nibbles into bytes, then sum the bytes by multiplying
+#[inline]
+const fn sum_heights(packed_heights: u64) -> u8 {
+    let pairs = (packed_heights & LOW_NIBBLES) + ((packed_heights >> HEIGHT_BITS) & LOW_NIBBLES);
+    (pairs.wrapping_mul(0x0101_0101_0101_0101) >> 56) as u8
+}
+
+const fn pack_heights(heights: [u8; PILE_COUNT as usize]) -> u64 {
+    let mut packed_heights = 0;
+    let mut pile_index = 0;
+    while pile_index < heights.len() {
+        packed_heights |= (heights[pile_index] as u64) << (HEIGHT_BITS * pile_index as u32);
+        pile_index += 1;
+    }
+    packed_heights
+}
+
+// Boards which are equal have equal Zobrist hashes, and the hash is already well mixed
+impl Hash for Board {
+    fn hash<H: Hasher>(&self, state: &mut H) {
+        state.write_u64(self.zobrist)
+    }
+}
+
+// Zobrist hashing: a random 64-bit key for every card in every slot, where slots 0-109 are monkey and 110-219 are wolf.
+// Cards are indexed by the same 6 bits as the battle table (team, category, strength 0-7). Index 0 would be a
+// monkey rock of strength 0, which never exists, so it doubles as the key of a NULL card and is 0
+static ZOBRIST_KEYS: [u64; 220 * 64] = build_zobrist_keys();
+
+const fn build_zobrist_keys() -> [u64; 220 * 64] {
+    let mut keys = [0u64; 220 * 64];
+    let mut state: u64 = 0;
+    let mut index = 0;
+    while index < keys.len() {
+        // splitmix64
+        state = state.wrapping_add(0x9E3779B97F4A7C15);
+        let mut z = state;
+        z = (z ^ (z >> 30)).wrapping_mul(0xBF58476D1CE4E5B9);
+        z = (z ^ (z >> 27)).wrapping_mul(0x94D049BB133111EB);
+        keys[index] = if index % 64 == 0 { 0 } else { z ^ (z >> 31) };
+        index += 1;
+    }
+    keys
+}
+
+#[inline]
+pub fn zobrist_key(is_monkey: bool, index: usize, card: u8) -> u64 {
+    let slot = if is_monkey { index } else { 110 + index };
+    let card_index = (((card >> 1) & 0b0_0_11_1000) | (card & 0b0_0_00_0111)) as usize;
+    ZOBRIST_KEYS[(slot << 6) | card_index]
 }
 
 pub struct CardLocation {
@@ -18,7 +89,7 @@ pub struct CardLocation {
     pub card_index: u8
 }
 
-#[derive(Clone)]
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
 pub struct Move {
     pub dice_category: u8,
     pub card: u8
@@ -37,8 +108,40 @@ impl Move {
     }
 }
 
+// A turn is at most one move per dice, so the moves are held inline rather than in a Vec, and a CompletedMoves can
+// be copied without touching the heap
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub struct MoveSequence {
+    moves: [Move; 3],
+    len: u8
+}
+
+impl MoveSequence {
+    pub fn push(&mut self, a_move: Move) {
+        self.moves[self.len as usize] = a_move;
+        self.len += 1;
+    }
+
+    pub fn as_slice(&self) -> &[Move] {
+        &self.moves[..self.len as usize]
+    }
+
+    pub fn iter(&self) -> std::slice::Iter<'_, Move> {
+        self.as_slice().iter()
+    }
+
+    pub fn len(&self) -> usize {
+        self.len as usize
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+}
+
+#[derive(Clone)]
 pub struct CompletedMoves {
-    pub moves: Vec<Move>,
+    pub moves: MoveSequence,
     pub board: Board,
     pub is_monkey: bool
 }
@@ -64,82 +167,93 @@ impl Board {
         monkey.shuffle(rng);
         wolf.shuffle(rng);
 
-        let mut monkey_cards = [cards::NULL; 110];
-        monkey_cards[0] = cards::MJ4;
-        monkey_cards[1] = monkey[0];
-        monkey_cards[2] = monkey[1];
-        monkey_cards[3] = monkey[2];
-        monkey_cards[10] = monkey[3];
-        monkey_cards[11] = monkey[4];
-        monkey_cards[12] = monkey[5];
-        monkey_cards[20] = monkey[6];
-        monkey_cards[21] = monkey[7];
-        monkey_cards[30] = monkey[8];
-
-        let mut wolf_cards = [cards::NULL; 110];
-        wolf_cards[70] = wolf[0];
-        wolf_cards[80] = wolf[1];
-        wolf_cards[81] = wolf[2];
-        wolf_cards[90] = wolf[3];
-        wolf_cards[91] = wolf[4];
-        wolf_cards[92] = wolf[5];
-        wolf_cards[100] = cards::WJ4;
-        wolf_cards[101] = wolf[6];
-        wolf_cards[102] = wolf[7];
-        wolf_cards[103] = wolf[8];
-
-        Self {
-            monkey_cards,
-            monkey_heights: [4, 3, 2, 1, 0, 0, 0, 0, 0, 0, 0],
-            wolf_cards,
-            wolf_heights: [0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4]
-        }
+        // The monkey joker is at the bottom of pile 0, and the wolf joker at the bottom of pile 10
+        let mut board = Self {
+            cards: [
+                [
+                    cards::MJ4, monkey[0], monkey[1], monkey[2],
+                    monkey[3], monkey[4], monkey[5],
+                    monkey[6], monkey[7],
+                    monkey[8]
+                ],
+                [
+                    wolf[0],
+                    wolf[1], wolf[2],
+                    wolf[3], wolf[4], wolf[5],
+                    cards::WJ4, wolf[6], wolf[7], wolf[8]
+                ]
+            ],
+            heights: [
+                pack_heights([4, 3, 2, 1, 0, 0, 0, 0, 0, 0, 0]),
+                pack_heights([0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4])
+            ],
+            zobrist: 0
+        };
+        board.zobrist = board.compute_zobrist();
+        board
     }
 
-    pub fn from_dto(board_dto: &BoardDto) -> Self {
-        let mut board = Board{
-            monkey_cards: [0; 110],
-            wolf_cards: [0; 110],
-            monkey_heights: [0; 11],
-            wolf_heights: [0; 11]
-        };
-        for (&pile_index, cards) in board_dto.monkey.iter() {
-            for card_index in 0..cards.len() {
-                let card = card::from_string(&cards[card_index]);
-                board.set_card(true, pile_index, card_index as u8, card);
+    pub fn empty() -> Self {
+        Board{cards: [[cards::NULL; TEAM_CARDS]; 2], heights: [0; 2], zobrist: 0}
+    }
+
+    pub fn compute_zobrist(&self) -> u64 {
+        let mut zobrist = 0;
+        for is_monkey in [true, false] {
+            for pile_index in 0..PILE_COUNT {
+                for card_index in 0..self.get_height(is_monkey, pile_index) {
+                    let index = (pile_index * 10 + card_index) as usize;
+                    zobrist ^= zobrist_key(is_monkey, index, self.get_card(is_monkey, pile_index, card_index));
+                }
             }
-            board.set_height(true, pile_index, cards.len() as u8);
         }
-        for (&pile_index, cards) in board_dto.wolf.iter() {
-            for card_index in 0..cards.len() {
-                let card = card::from_string(&cards[card_index]);
-                board.set_card(false, pile_index, card_index as u8, card);
+        zobrist
+    }
+
+    // Build the board, or describe why the BoardDto does not hold a valid board
+    pub fn from_dto(board_dto: &BoardDto) -> Result<Self, String> {
+        let mut board = Board::empty();
+        for (is_monkey, piles) in [(true, &board_dto.monkey), (false, &board_dto.wolf)] {
+            let team_bit = if is_monkey { cards::BIT_TEAM_MONKEY } else { cards::BIT_TEAM_WOLF };
+            for (&pile_index, card_strings) in piles.iter() {
+                if pile_index >= PILE_COUNT {
+                    return Err(format!("Unexpected pile index {}", pile_index));
+                }
+                for card_string in card_strings {
+                    let card = card::from_string(card_string)?;
+                    if card & cards::CHECK_TEAM != team_bit {
+                        return Err(format!("Unexpected card {} in pile {} of the other team", card_string, pile_index));
+                    }
+                    if board.count(is_monkey) as usize == TEAM_CARDS {
+                        return Err(format!("Expected at most {} cards per team", TEAM_CARDS));
+                    }
+                    board.push_card(is_monkey, pile_index, card);
+                }
             }
-            board.set_height(false, pile_index, cards.len() as u8);
         }
-        board
+        Ok(board)
     }
 
     pub fn to_dto(&self) -> BoardDto {
         let mut dto = BoardDto{monkey: BTreeMap::new(), wolf: BTreeMap::new()};
 
-        for pile_index in 0usize..11 {
-            if self.monkey_heights[pile_index] > 0 {
+        for pile_index in 0..PILE_COUNT {
+            if self.get_height(true, pile_index) > 0 {
                 let mut card_strings = Vec::new();
-                for card_index in 0..self.monkey_heights[pile_index] {
-                    let card = self.get_card(true, pile_index as u8, card_index);
+                for card_index in 0..self.get_height(true, pile_index) {
+                    let card = self.get_card(true, pile_index, card_index);
                     card_strings.push(card::to_string(card));
                 }
-                dto.monkey.insert(pile_index as u8, card_strings);
+                dto.monkey.insert(pile_index, card_strings);
             }
 
-            if self.wolf_heights[pile_index] > 0 {
+            if self.get_height(false, pile_index) > 0 {
                 let mut card_strings = Vec::new();
-                for card_index in 0..self.wolf_heights[pile_index] {
-                    let card = self.get_card(false, pile_index as u8, card_index);
+                for card_index in 0..self.get_height(false, pile_index) {
+                    let card = self.get_card(false, pile_index, card_index);
                     card_strings.push(card::to_string(card));
                 }
-                dto.wolf.insert(pile_index as u8, card_strings);
+                dto.wolf.insert(pile_index, card_strings);
             }
         }
 
@@ -150,6 +264,10 @@ impl Board {
         let mut remaining_battles = Vec::new();
         self.move_card(is_monkey, dice_roll, pile_index, card_index, &mut remaining_battles);
 
+        // Reading the clock costs about as much as moving a card, so only time the battles if there are any
+        let battle_index = remaining_battles[0];
+        let timer = if self.get_height(!is_monkey, battle_index) > 0 { phase_stats::start_timer() } else { None };
+        let mut battle_count = 0;
         loop {
             let optional_next_battle = remaining_battles.last();
             if optional_next_battle.is_none() {
@@ -157,45 +275,61 @@ impl Board {
             }
 
             let next_battle = *optional_next_battle.unwrap();
-            self.resolve_battle(is_monkey, next_battle, &mut remaining_battles);
+            battle_count += self.resolve_battle(is_monkey, next_battle, &mut remaining_battles);
             remaining_battles.retain(|&x| x != next_battle);
         }
 
         // Restore jokers
         self.restore_joker_strengths();
+        phase_stats::record_card_move(battle_count, timer);
     }
 
+    // Move the card at card_index, and every card above it, onto the top of the pile dice_roll away. The cards keep
+    // their order, so in the packed representation this is a rotation of the cards between the two positions
     fn move_card(&mut self, is_monkey: bool, dice_roll: i8, pile_index: u8, card_index: u8, remaining_battles: &mut Vec<u8>) {
         let new_pile_index = Self::new_pile_index(is_monkey, dice_roll, pile_index);
         let old_pile_height = self.get_height(is_monkey, pile_index);
         let new_pile_starting_height = self.get_height(is_monkey, new_pile_index);
+        let moved_count = old_pile_height - card_index;
+
+        if new_pile_index != pile_index {
+            let team = team_index(is_monkey);
+            let old_start = self.pile_start(is_monkey, pile_index) + card_index as usize;
+            for offset in 0..moved_count {
+                let card = self.cards[team][old_start + offset as usize];
+                let old_index = (pile_index * 10 + card_index + offset) as usize;
+                let new_index = (new_pile_index * 10 + new_pile_starting_height + offset) as usize;
+                self.zobrist ^= zobrist_key(is_monkey, old_index, card) ^ zobrist_key(is_monkey, new_index, card);
+            }
 
-        for old_index in card_index..old_pile_height {
-            let card = self.get_card(is_monkey, pile_index, old_index);
-            let new_card_index = new_pile_starting_height + old_index - card_index;
+            let old_end = old_start + moved_count as usize;
+            let new_start = self.pile_start(is_monkey, new_pile_index) + new_pile_starting_height as usize;
+            if new_pile_index > pile_index {
+                self.cards[team][old_start..new_start].rotate_left(moved_count as usize);
+            }
+            else {
+                self.cards[team][new_start..old_end].rotate_right(moved_count as usize);
+            }
 
-            self.set_card(is_monkey, new_pile_index, new_card_index, card);
-            self.set_card(is_monkey, pile_index, old_index, cards::NULL);
+            self.set_height(is_monkey, pile_index, card_index);
+            self.set_height(is_monkey, new_pile_index, new_pile_starting_height + moved_count);
         }
 
-        self.set_height(is_monkey, pile_index, card_index);
-        self.set_height(is_monkey, new_pile_index, new_pile_starting_height + old_pile_height - card_index);
-
         // Add the new_pile_index to the list of battles to be resolved
         remaining_battles.push(new_pile_index)
     }
 
     pub fn victorious_team(&self) -> u8 {
-        if self.monkey_heights[10] > 0 {
-            assert_eq!(self.wolf_heights[0], 0);
+        if self.get_height(true, PILE_COUNT - 1) > 0 {
+            assert_eq!(self.get_height(false, 0), 0);
             return cards::BIT_NON_NULL | cards::BIT_TEAM_MONKEY
         }
-        if self.wolf_heights[0] > 0 {
+        if self.get_height(false, 0) > 0 {
             return cards::BIT_NON_NULL | cards::BIT_TEAM_WOLF
         }
 
-        let monkey_alive = self.monkey_heights.iter().any(|&x| x > 0);
-        let wolf_alive = self.wolf_heights.iter().any(|&x| x > 0);
+        let monkey_alive = self.heights[team_index(true)] != 0;
+        let wolf_alive = self.heights[team_index(false)] != 0;
 
         if monkey_alive {
             if wolf_alive {
@@ -217,18 +351,23 @@ impl Board {
 
     fn new_pile_index(is_monkey: bool, dice_roll: i8, pile_index: u8) -> u8 {
         let pile_index_i8 = pile_index as i8;
-        let unsnapped_index = if is_monkey { pile_index_i8 + dice_roll } else { pile_index_i8 - dice_roll };
+        // Saturating, so that an out of range dice roll from a request snaps to the end of the board like any other
+        let unsnapped_index =
+            if is_monkey { pile_index_i8.saturating_add(dice_roll) } else { pile_index_i8.saturating_sub(dice_roll) };
         unsnapped_index.clamp(0, 10) as u8
     }
 
-    fn resolve_battle(&mut self, is_monkey: bool, battle_index: u8, remaining_battles: &mut Vec<u8>) {
+    // Fight the top cards of the pile until one team has none left there. Returns the number of card battles fought
+    fn resolve_battle(&mut self, is_monkey: bool, battle_index: u8, remaining_battles: &mut Vec<u8>) -> u64 {
+        let mut battle_count = 0;
         loop {
             let monkey_height = self.get_height(true, battle_index);
             let wolf_height = self.get_height(false, battle_index);
 
             if monkey_height == 0 || wolf_height == 0 {
-                break
+                return battle_count
             }
+            battle_count += 1;
 
             let monkey_card_index = monkey_height - 1;
             let wolf_card_index = wolf_height - 1;
@@ -236,18 +375,20 @@ impl Board {
             let monkey_card = self.get_card(true, battle_index, monkey_card_index);
             let wolf_card = self.get_card(false, battle_index, wolf_card_index);
 
+            // The loser's residual is NULL, and it is removed from the top of its pile
             let battle_result = battle_winner(monkey_card, wolf_card);
-            self.set_card(true, battle_index, monkey_card_index, battle_result.card_a_residual);
-            self.set_card(false, battle_index, wolf_card_index, battle_result.card_b_residual);
-
             if battle_result.winner == cards::NULL {
+                self.set_card(true, battle_index, monkey_card_index, battle_result.card_a_residual);
+                self.set_card(false, battle_index, wolf_card_index, battle_result.card_b_residual);
                 self.resolve_draw(is_monkey, battle_index, monkey_card_index, wolf_card_index, remaining_battles)
             }
             else if battle_result.winner == monkey_card {
-                self.set_height(false, battle_index, wolf_card_index)
+                self.set_card(true, battle_index, monkey_card_index, battle_result.card_a_residual);
+                self.remove_top_card(false, battle_index)
             }
             else if battle_result.winner == wolf_card {
-                self.set_height(true, battle_index, monkey_card_index)
+                self.set_card(false, battle_index, wolf_card_index, battle_result.card_b_residual);
+                self.remove_top_card(true, battle_index)
             }
             else {
                 panic!("Unexpected battle_result winner")
@@ -265,8 +406,7 @@ impl Board {
     ) {
         if is_monkey {
             if battle_index == 10 {
-                self.set_card(false, battle_index, wolf_card_index, cards::NULL);
-                self.set_height(false, battle_index, wolf_card_index);
+                self.remove_top_card(false, battle_index);
             }
             else {
                 self.move_card(false, -1, battle_index, wolf_card_index, remaining_battles);
@@ -275,8 +415,7 @@ impl Board {
         }
         else {
             if battle_index == 0 {
-                self.set_card(true, battle_index, monkey_card_index, cards::NULL);
-                self.set_height(true, battle_index, monkey_card_index);
+                self.remove_top_card(true, battle_index);
             }
             else {
                 self.move_card(true, -1, battle_index, monkey_card_index, remaining_battles);
@@ -286,78 +425,112 @@ impl Board {
     }
 
     fn restore_joker_strengths(&mut self) {
-        for i in 0..self.monkey_cards.len() {
-            if (self.monkey_cards[i] & cards::CHECK_CATEGORY) == cards::BITS_CATEGORY_JOKER
-            {
-                self.monkey_cards[i] = cards::MJ4
-            }
-        }
-        for i in 0..self.wolf_cards.len() {
-            if (self.wolf_cards[i] & cards::CHECK_CATEGORY) == cards::BITS_CATEGORY_JOKER
-            {
-                self.wolf_cards[i] = cards::WJ4
+        for (is_monkey, full_strength_joker) in [(true, cards::MJ4), (false, cards::WJ4)] {
+            let team = team_index(is_monkey);
+            let weakened_joker = self.cards[team].iter().position(|&card| {
+                (card & cards::CHECK_CATEGORY) == cards::BITS_CATEGORY_JOKER && card != full_strength_joker
+            });
+            if let Some(position) = weakened_joker {
+                let location = self.location_of_position(is_monkey, position);
+                self.set_card(is_monkey, location.pile_index, location.card_index, full_strength_joker);
             }
         }
     }
 
     pub fn get_height(&self, is_monkey: bool, pile_index: u8) -> u8 {
-        if is_monkey {
-            self.monkey_heights[pile_index as usize]
-        }
-        else {
-            self.wolf_heights[pile_index as usize]
-        }
+        ((self.heights[team_index(is_monkey)] >> (HEIGHT_BITS * pile_index as u32)) & HEIGHT_MASK) as u8
     }
 
-    pub fn set_height(&mut self, is_monkey: bool, pile_index: u8, height: u8) {
-        if is_monkey {
-            self.monkey_heights[pile_index as usize] = height
-        }
-        else {
-            self.wolf_heights[pile_index as usize] = height
+    fn set_height(&mut self, is_monkey: bool, pile_index: u8, height: u8) {
+        let shift = HEIGHT_BITS * pile_index as u32;
+        let packed_heights = &mut self.heights[team_index(is_monkey)];
+        *packed_heights = (*packed_heights & !(HEIGHT_MASK << shift)) | ((height as u64) << shift)
+    }
+
+    pub fn heights(&self, is_monkey: bool) -> [u8; PILE_COUNT as usize] {
+        std::array::from_fn(|pile_index| self.get_height(is_monkey, pile_index as u8))
+    }
+
+    // The number of cards the team has left
+    pub fn count(&self, is_monkey: bool) -> u8 {
+        sum_heights(self.heights[team_index(is_monkey)])
+    }
+
+    // Every card the team has left, in pile order
+    pub fn team_cards(&self, is_monkey: bool) -> &[u8] {
+        &self.cards[team_index(is_monkey)][..self.count(is_monkey) as usize]
+    }
+
+    // The position in team_cards() of the bottom card of the pile
+    pub fn pile_start(&self, is_monkey: bool, pile_index: u8) -> usize {
+        let below_mask = (1u64 << (HEIGHT_BITS * pile_index as u32)) - 1;
+        sum_heights(self.heights[team_index(is_monkey)] & below_mask) as usize
+    }
+
+    fn location_of_position(&self, is_monkey: bool, position: usize) -> CardLocation {
+        let mut pile_index = 0;
+        while self.pile_start(is_monkey, pile_index + 1) <= position {
+            pile_index += 1;
         }
+        CardLocation{pile_index, card_index: (position - self.pile_start(is_monkey, pile_index)) as u8}
     }
 
     pub fn get_card(&self, is_monkey: bool, pile_index: u8, card_index: u8) -> u8 {
-        let index = pile_index * 10 + card_index;
-        if is_monkey {
-            self.monkey_cards[index as usize]
-        }
-        else {
-            self.wolf_cards[index as usize]
-        }
+        debug_assert!(card_index < self.get_height(is_monkey, pile_index));
+        self.cards[team_index(is_monkey)][self.pile_start(is_monkey, pile_index) + card_index as usize]
     }
 
+    // Replace a card already on the board
     pub fn set_card(&mut self, is_monkey: bool, pile_index: u8, card_index: u8, card: u8) {
-        let index = pile_index * 10 + card_index;
-        if is_monkey {
-            self.monkey_cards[index as usize] = card
-        }
-        else {
-            self.wolf_cards[index as usize] = card
-        }
+        debug_assert!(card_index < self.get_height(is_monkey, pile_index));
+        let index = (pile_index * 10 + card_index) as usize;
+        let position = self.pile_start(is_monkey, pile_index) + card_index as usize;
+        let slot = &mut self.cards[team_index(is_monkey)][position];
+        self.zobrist ^= zobrist_key(is_monkey, index, *slot) ^ zobrist_key(is_monkey, index, card);
+        *slot = card
     }
 
-    pub fn locate_card(&self, is_monkey: bool, card: u8) -> CardLocation {
-        for pile_index in 0u8..11 {
-            for card_index in 0..self.get_height(is_monkey, pile_index) {
-                if self.get_card(is_monkey, pile_index, card_index) == card {
-                    return CardLocation{pile_index, card_index}
-                }
-            }
-        }
+    // Place a card on top of the pile
+    pub fn push_card(&mut self, is_monkey: bool, pile_index: u8, card: u8) {
+        let count = self.count(is_monkey) as usize;
+        assert!(count < TEAM_CARDS, "A team cannot have more than {} cards", TEAM_CARDS);
+        let height = self.get_height(is_monkey, pile_index);
+        let position = self.pile_start(is_monkey, pile_index) + height as usize;
+
+        let team_cards = &mut self.cards[team_index(is_monkey)];
+        team_cards[position..=count].rotate_right(1);
+        team_cards[position] = card;
+        self.zobrist ^= zobrist_key(is_monkey, (pile_index * 10 + height) as usize, card);
+        self.set_height(is_monkey, pile_index, height + 1);
+    }
+
+    fn remove_top_card(&mut self, is_monkey: bool, pile_index: u8) {
+        let count = self.count(is_monkey) as usize;
+        let height = self.get_height(is_monkey, pile_index);
+        let position = self.pile_start(is_monkey, pile_index) + height as usize - 1;
 
-        panic!("Failed to find card {}", card);
+        let team_cards = &mut self.cards[team_index(is_monkey)];
+        self.zobrist ^= zobrist_key(is_monkey, (pile_index * 10 + height - 1) as usize, team_cards[position]);
+        team_cards[position..count].rotate_left(1);
+        team_cards[count - 1] = cards::NULL;
+        self.set_height(is_monkey, pile_index, height - 1);
+    }
+
+    // The location of the card, or None if it is not on the team's side of the board
+    pub fn locate_card(&self, is_monkey: bool, card: u8) -> Option<CardLocation> {
+        let position = self.team_cards(is_monkey).iter().position(|&c| c == card)?;
+        Some(self.location_of_position(is_monkey, position))
     }
 }
 
 #[cfg(test)]
 mod tests {
-    use std::collections::HashSet;
+    use std::collections::{BTreeMap, HashSet};
     use rand::prelude::StdRng;
     use rand::SeedableRng;
     use crate::board::Board;
     use crate::cards;
+    use crate::dto::BoardDto;
 
     #[test]
     fn test_new_board() {
@@ -367,12 +540,13 @@ mod tests {
             let cloned = original.clone();
 
             for board in [original, cloned] {
-                assert_eq!(board.monkey_heights, [4, 3, 2, 1, 0, 0, 0, 0, 0, 0, 0]);
-                assert_eq!(board.wolf_heights, [0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4]);
-                assert_eq!(board.monkey_cards[0], cards::MJ4);
-                assert_eq!(board.wolf_cards[100], cards::WJ4);
-                assert_eq!(board.monkey_cards.len(), 110);
-                assert_eq!(board.wolf_cards.len(), 110);
+                assert_eq!(board.heights(true), [4, 3, 2, 1, 0, 0, 0, 0, 0, 0, 0]);
+                assert_eq!(board.heights(false), [0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4]);
+                assert_eq!(board.get_card(true, 0, 0), cards::MJ4);
+                assert_eq!(board.get_card(false, 10, 0), cards::WJ4);
+                assert_eq!(board.count(true), 10);
+                assert_eq!(board.count(false), 10);
+                assert_eq!(board.compute_zobrist(), board.zobrist);
 
                 {
                     let monkey_indices: [usize; 10] = [0, 1, 2, 3, 10, 11, 12, 20, 21, 30];
@@ -383,8 +557,8 @@ mod tests {
                         cards::MS1, cards::MS2, cards::MS3
                     ];
                     let mut seen_monkey_cards = HashSet::new();
-                    for i in 0..board.monkey_cards.len() {
-                        let card = board.monkey_cards[i];
+                    for i in 0..110 {
+                        let card = card_at(&board, true, i);
                         if monkey_indices.contains(&i) {
                             assert_ne!(cards::NULL, card);
                             assert!(monkey_cards.contains(&card));
@@ -392,7 +566,7 @@ mod tests {
                             seen_monkey_cards.insert(card);
                         }
                         else {
-                            assert_eq!(cards::NULL, board.monkey_cards[i]);
+                            assert_eq!(cards::NULL, card);
                         }
                     }
                 }
@@ -406,8 +580,8 @@ mod tests {
                         cards::WS1, cards::WS2, cards::WS3
                     ];
                     let mut seen_wolf_cards = HashSet::new();
-                    for i in 0..board.wolf_cards.len() {
-                        let card = board.wolf_cards[i];
+                    for i in 0..110 {
+                        let card = card_at(&board, false, i);
                         if wolf_indices.contains(&i) {
                             assert_ne!(cards::NULL, card);
                             assert!(wolf_cards.contains(&card));
@@ -415,7 +589,7 @@ mod tests {
                             seen_wolf_cards.insert(card);
                         }
                         else {
-                            assert_eq!(cards::NULL, board.wolf_cards[i]);
+                            assert_eq!(cards::NULL, card);
                         }
                     }
                 }
@@ -423,13 +597,24 @@ mod tests {
         }
     }
 
+    // The card in the slot at index pile_index * 10 + card_index, or NULL if the pile is not that high
+    fn card_at(board: &Board, is_monkey: bool, index: usize) -> u8 {
+        let (pile_index, card_index) = ((index / 10) as u8, (index % 10) as u8);
+        if card_index < board.get_height(is_monkey, pile_index) {
+            board.get_card(is_monkey, pile_index, card_index)
+        }
+        else {
+            cards::NULL
+        }
+    }
+
     #[test]
     fn test_dto_round_trip() {
         let mut rng = StdRng::seed_from_u64(42);
         let board_a = Board::new(&mut rng);
         let board_dto_a = board_a.to_dto();
 
-        let board_b = Board::from_dto(&board_dto_a);
+        let board_b = Board::from_dto(&board_dto_a).unwrap();
         assert_eq!(board_a, board_b);
 
         let board_dto_b = board_b.to_dto();
@@ -437,31 +622,43 @@ mod tests {
     }
 
     #[test]
-    fn test_complex_battle() {
-        let mut board = Board{
-            monkey_cards: [cards::NULL; 110],
-            wolf_cards: [cards::NULL; 110],
-            monkey_heights: [0, 1, 0, 0, 2, 3, 0, 0, 0, 0, 0],
-            wolf_heights: [0, 0, 0, 0, 0, 0, 2, 1, 1, 1, 0],
+    fn test_from_dto_rejects_invalid_boards() {
+        let board_dto = |monkey: Vec<(u8, Vec<&str>)>| BoardDto{
+            monkey: monkey.into_iter().map(|(i, cs)| (i, cs.into_iter().map(String::from).collect())).collect(),
+            wolf: BTreeMap::new()
         };
+        let from_dto_error = |monkey| Board::from_dto(&board_dto(monkey)).unwrap_err();
 
-        board.set_card(true, 1, 0, cards::MS2);
-        board.set_card(true, 4, 0, cards::MP2);
-        board.set_card(true, 4, 1, cards::MJ4);
-        board.set_card(true, 5, 0, cards::MR2);
-        board.set_card(true, 5, 1, cards::MS1);
-        board.set_card(true, 5, 2, cards::MS3);
-
-        board.set_card(false, 6, 0, cards::WS1);
-        board.set_card(false, 6, 1, cards::WP1);
-        board.set_card(false, 7, 0, cards::WJ4);
-        board.set_card(false, 8, 0, cards::WR3);
-        board.set_card(false, 9, 0, cards::WP3);
+        assert!(from_dto_error(vec![(11, vec!["MJ4"])]).contains("Unexpected pile index 11"));
+        assert!(from_dto_error(vec![(0, vec!["MX1"])]).contains("Invalid card string MX1"));
+        assert!(from_dto_error(vec![(0, vec!["WR1"])]).contains("Unexpected card WR1 in pile 0 of the other team"));
+        assert!(from_dto_error(vec![(0, vec!["MR1"; 6]), (1, vec!["MR1"; 5])]).contains("at most 10 cards per team"));
+        assert!(Board::from_dto(&board_dto(vec![(0, vec!["MR1"; 10])])).is_ok());
+    }
 
+    #[test]
+    fn test_complex_battle() {
+        let mut board = Board::empty();
+
+        board.push_card(true, 1, cards::MS2);
+        board.push_card(true, 4, cards::MP2);
+        board.push_card(true, 4, cards::MJ4);
+        board.push_card(true, 5, cards::MR2);
+        board.push_card(true, 5, cards::MS1);
+        board.push_card(true, 5, cards::MS3);
+
+        board.push_card(false, 6, cards::WS1);
+        board.push_card(false, 6, cards::WP1);
+        board.push_card(false, 7, cards::WJ4);
+        board.push_card(false, 8, cards::WR3);
+        board.push_card(false, 9, cards::WP3);
+
+        assert_eq!(board.heights(true), [0, 1, 0, 0, 2, 3, 0, 0, 0, 0, 0]);
+        assert_eq!(board.heights(false), [0, 0, 0, 0, 0, 0, 2, 1, 1, 1, 0]);
         board.move_card_and_resolve_battles(true, 2, 5, 0);
 
-        assert_eq!(board.monkey_heights, [0, 1, 0, 0, 2, 1, 0, 1, 0, 0, 0]);
-        assert_eq!(board.wolf_heights,   [0, 0, 0, 0, 0, 0, 0, 0, 2, 1, 0]);
+        assert_eq!(board.heights(true),  [0, 1, 0, 0, 2, 1, 0, 1, 0, 0, 0]);
+        assert_eq!(board.heights(false), [0, 0, 0, 0, 0, 0, 0, 0, 2, 1, 0]);
 
         assert_eq!(cards::MS2, board.get_card(true, 1, 0));
         assert_eq!(cards::MP2, board.get_card(true, 4, 0));
@@ -472,5 +669,21 @@ mod tests {
         assert_eq!(cards::WR3, board.get_card(false, 8, 0));
         assert_eq!(cards::WJ4, board.get_card(false, 8, 1));
         assert_eq!(cards::WP3, board.get_card(false, 9, 0));
+        assert_eq!(board.compute_zobrist(), board.zobrist);
+        assert_eq!(board.team_cards(true), [cards::MS2, cards::MP2, cards::MJ4, cards::MS1, cards::MR2]);
+        assert_eq!(board.team_cards(false), [cards::WR3, cards::WJ4, cards::WP3]);
+    }
+
+    #[test]
+    fn test_zobrist_maintained_through_moves() {
+        let mut rng = StdRng::seed_from_u64(42);
+        let mut board = Board::new(&mut rng);
+        assert_eq!(Board::from_dto(&board.to_dto()).unwrap().zobrist, board.zobrist);
+
+        for (is_monkey, dice_roll, pile_index) in [(true, 3, 0), (false, 2, 10), (true, 2, 1), (false, 3, 9), (true, 1, 3)] {
+            let card_index = board.get_height(is_monkey, pile_index) - 1;
+            board.move_card_and_resolve_battles(is_monkey, dice_roll, pile_index, card_index);
+            assert_eq!(board.compute_zobrist(), board.zobrist);
+        }
     }
 }
@@ -56,120 +56,116 @@ pub mod cards {
     pub const CHECK_STRENGTH: u8 = 0b0_0_00_1111;
 }
 
-pub fn from_string(card_string: &String) -> u8 {
-    if card_string.len() != 3 {
-        panic!("{}", format!("Invalid card_string {}, expected it to be length 3", card_string));
+// Interning tables between card strings and card codes. Each character of a card string maps independently to its bits
+// of the code, and each code maps back to its characters, so that conversion is a lookup per character
+const INVALID_BITS: u8 = 0xFF;
+
+const fn bits_by_char(chars: &[u8], bits: &[u8]) -> [u8; 256] {
+    let mut table = [INVALID_BITS; 256];
+    let mut i = 0;
+    while i < chars.len() {
+        table[chars[i] as usize] = bits[i];
+        i += 1;
     }
+    table
+}
 
-    let mut card = cards::BIT_NON_NULL;
-    let card_chars = Vec::from_iter(card_string.chars());
-    match card_chars[0] {
-        'M' => {
-            card |= cards::BIT_TEAM_MONKEY;
-        },
-        'W' => {
-            card |= cards::BIT_TEAM_WOLF;
-        }
-        _ => {
-            panic!("{}", format!("Invalid card_string {}, expected index 0 to be M or W", card_string));
-        }
+static TEAM_BITS_BY_CHAR: [u8; 256] = bits_by_char(b"MW", &[cards::BIT_TEAM_MONKEY, cards::BIT_TEAM_WOLF]);
+static CATEGORY_BITS_BY_CHAR: [u8; 256] = bits_by_char(
+    b"RPSJ",
+    &[cards::BITS_CATEGORY_ROCK, cards::BITS_CATEGORY_PAPER, cards::BITS_CATEGORY_SCISSORS, cards::BITS_CATEGORY_JOKER]
+);
+static STRENGTH_BITS_BY_CHAR: [u8; 256] = bits_by_char(
+    b"01234",
+    &[cards::BITS_STRENGTH_0, cards::BITS_STRENGTH_1, cards::BITS_STRENGTH_2, cards::BITS_STRENGTH_3, cards::BITS_STRENGTH_4]
+);
+
+// The characters of each card, indexed by code. Codes which are not cards have no characters
+const fn chars_by_code() -> [Option<[char; 3]>; 256] {
+    let mut table = [None; 256];
+    let team_chars = ['M', 'W'];
+    let category_chars = ['R', 'P', 'S', 'J'];
+    let strength_chars = ['0', '1', '2', '3', '4'];
+    let mut code = cards::BIT_NON_NULL as usize;
+    while code < 256 {
+        let strength = code & cards::CHECK_STRENGTH as usize;
+        if strength < strength_chars.len() {
+            table[code] = Some([
+                team_chars[(code & cards::CHECK_TEAM as usize) >> 6],
+                category_chars[(code & cards::CHECK_CATEGORY as usize) >> 4],
+                strength_chars[strength]
+            ]);
+        }
+        code += 1;
     }
+    table
+}
 
-    match card_chars[1] {
-        'R' => {
-            card |= cards::BITS_CATEGORY_ROCK;
-        }
-        'P' => {
-            card |= cards::BITS_CATEGORY_PAPER;
-        }
-        'S' => {
-            card |= cards::BITS_CATEGORY_SCISSORS;
-        }
-        'J' => {
-            card |= cards::BITS_CATEGORY_JOKER;
-        }
-        _ => {
-            panic!("{}", format!("Invalid card string {}, expected index 1 to be R, P S or J", card_string))
-        }
+static CHARS_BY_CODE: [Option<[char; 3]>; 256] = chars_by_code();
+
+pub fn from_string(card_string: &str) -> Result<u8, String> {
+    let card_bytes = card_string.as_bytes();
+    if card_bytes.len() != 3 {
+        return Err(format!("Invalid card_string {}, expected it to be length 3", card_string));
     }
 
-    match card_chars[2] {
-        '0' => {
-            card |= cards::BITS_STRENGTH_0;
-        }
-        '1' => {
-            card |= cards::BITS_STRENGTH_1;
-        }
-        '2' => {
-            card |= cards::BITS_STRENGTH_2;
-        }
-        '3' => {
-            card |= cards::BITS_STRENGTH_3;
-        }
-        '4' => {
-            card |= cards::BITS_STRENGTH_4;
-        }
-        _ => {
-            panic!("{}", format!("Invalid card string {}, expected index 2 to be in [0,1,2,3,4]", card_string))
-        }
+    let team_bits = TEAM_BITS_BY_CHAR[card_bytes[0] as usize];
+    if team_bits == INVALID_BITS {
+        return Err(format!("Invalid card_string {}, expected index 0 to be M or W", card_string));
+    }
+    let category_bits = CATEGORY_BITS_BY_CHAR[card_bytes[1] as usize];
+    if category_bits == INVALID_BITS {
+        return Err(format!("Invalid card string {}, expected index 1 to be R, P S or J", card_string));
+    }
+    let strength_bits = STRENGTH_BITS_BY_CHAR[card_bytes[2] as usize];
+    if strength_bits == INVALID_BITS {
+        return Err(format!("Invalid card string {}, expected index 2 to be in [0,1,2,3,4]", card_string));
     }
 
-    card
+    Ok(cards::BIT_NON_NULL | team_bits | category_bits | strength_bits)
 }
 
 pub fn to_string(card_u8: u8) -> String {
-    let mut components: Vec<char> = Vec::new();
-
-    match card_u8 & cards::CHECK_TEAM {
-        cards::BIT_TEAM_MONKEY => {
-            components.push('M');
-        }
-        cards::BIT_TEAM_WOLF => {
-            components.push('W');
-        }
-        _ => {
-            panic!("{}", format!("Unexpected card {}, cannot determine team", card_u8));
-        }
+    match CHARS_BY_CODE[card_u8 as usize] {
+        Some(card_chars) => String::from_iter(card_chars),
+        None => panic!("{}", format!("Unexpected card {}, it is not a valid card code", card_u8))
     }
+}
 
-    match card_u8 & cards::CHECK_CATEGORY {
-        cards::BITS_CATEGORY_ROCK => {
-            components.push('R');
-        }
-        cards::BITS_CATEGORY_PAPER => {
-            components.push('P');
-        }
-        cards::BITS_CATEGORY_SCISSORS => {
-            components.push('S');
-        }
-        cards::BITS_CATEGORY_JOKER => {
-            components.push('J');
-        }
-        _ => {
-            panic!("{}", format!("Unexpected card {}, cannot determine category", card_u8));
-        }
+#[cfg(test)]
+mod tests {
+    use crate::card::{cards, from_string, to_string};
+
+    #[test]
+    fn test_card_strings_round_trip() {
+        let mut card_count = 0;
+        for team in ['M', 'W'] {
+            for category in ['R', 'P', 'S', 'J'] {
+                for strength in ['0', '1', '2', '3', '4'] {
+                    let card_string = String::from_iter([team, category, strength]);
+                    let card = from_string(&card_string).unwrap();
+                    assert_eq!(card_string, to_string(card));
+                    card_count += 1;
+                }
+            }
+        }
+        assert_eq!(40, card_count);
+        assert_eq!(Ok(cards::MJ4), from_string("MJ4"));
+        assert_eq!(Ok(cards::WS2), from_string("WS2"));
+        assert_eq!("WR1", to_string(cards::WR1));
     }
 
-    match card_u8 & cards::CHECK_STRENGTH {
-        cards::BITS_STRENGTH_0 => {
-            components.push('0');
-        }
-        cards::BITS_STRENGTH_1 => {
-            components.push('1');
-        }
-        cards::BITS_STRENGTH_2 => {
-            components.push('2');
-        }
-        cards::BITS_STRENGTH_3 => {
-            components.push('3');
-        }
-        cards::BITS_STRENGTH_4 => {
-            components.push('4');
-        }
-        _ => {
-            panic!("{}", format!("Unexpected card {}, cannot determine strength", card_u8))
-        }
+    #[test]
+    fn test_from_string_rejects_invalid_cards() {
+        assert!(from_string("MX1").unwrap_err().contains("expected index 1 to be R, P S or J"));
+        assert!(from_string("XR1").unwrap_err().contains("expected index 0 to be M or W"));
+        assert!(from_string("MR9").unwrap_err().contains("expected index 2 to be in [0,1,2,3,4]"));
+        assert!(from_string("MR").unwrap_err().contains("expected it to be length 3"));
     }
 
-    String::from_iter(components)
+    #[test]
+    #[should_panic(expected = "it is not a valid card code")]
+    fn test_to_string_rejects_null() {
+        to_string(cards::NULL);
+    }
 }
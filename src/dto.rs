@@ -49,7 +49,16 @@ pub struct ChooseRequest {
     pub board: BoardDto,
     pub dice: DiceRollDto,
     pub team: String,
+    #[serde(default = "default_strategy")]
     pub strategy: String,
+    #[serde(default)]
+    pub seed: Option<u64>,
+    #[serde(default)]
+    pub deduplicate: bool,
+}
+
+fn default_strategy() -> String {
+    String::from("default")
 }
 
 #[derive(Serialize, Deserialize)]
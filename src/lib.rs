@@ -6,29 +6,38 @@ mod dice;
 mod move_gatherer;
 mod strategy;
 mod metric;
+mod phase_stats;
+mod wire;
 
+use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
 use csv::ReaderBuilder;
-use std::collections::HashMap;
-use std::fs::{create_dir_all, exists, File};
+use std::borrow::Cow;
+use std::collections::BTreeMap;
+use std::fs::File;
 use chrono::Utc;
 use rand::SeedableRng;
 use rand::rngs::StdRng;
 use std::path::{Path, PathBuf};
+use std::sync::mpsc::channel;
+use std::thread;
 use std::time::{SystemTime, UNIX_EPOCH};
 use polars::prelude::*;
+use rayon::prelude::*;
+use rayon::ThreadPoolBuilder;
 use threadpool::ThreadPool;
 use crate::board::*;
 use crate::card::cards;
 use crate::dice::{roll_dice_three_times, DiceRoll};
 use crate::dto::*;
 use crate::move_gatherer::gather_all_moves;
+use crate::phase_stats::{Phase, PhaseStats, WorkerStats, PHASE_COUNT};
 use crate::strategy::Strategy;
 
 fn simulate_one(instruction: &InstructionDto) -> ResultDto {
     let mut rng = StdRng::seed_from_u64(instruction.seed);
-    let monkey_strategy = Strategy::new(&instruction.monkey_strategy);
-    let wolf_strategy = Strategy::new(&instruction.wolf_strategy);
+    let monkey_strategy = Strategy::new(&instruction.monkey_strategy).unwrap();
+    let wolf_strategy = Strategy::new(&instruction.wolf_strategy).unwrap();
 
     let mut board = Board::new(&mut rng);
     let mut is_monkey = true;
@@ -50,21 +59,19 @@ fn simulate_one(instruction: &InstructionDto) -> ResultDto {
         }
 
         let dice_rolls = roll_dice_three_times(&mut rng);
-        let permitted_moves = gather_all_moves(&board, is_monkey, &dice_rolls);
-
-        if !permitted_moves.is_empty() {
-            if is_monkey {
-                board = monkey_strategy.choose_move(&permitted_moves, &mut rng).board.clone();
-            }
-            else {
-                board = wolf_strategy.choose_move(&permitted_moves, &mut rng).board.clone();
-            }
+        let strategy = if is_monkey { &monkey_strategy } else { &wolf_strategy };
+        let chosen_moves = phase_stats::time_turn(
+            || strategy.choose_move_streaming(&board, is_monkey, &dice_rolls, false, &mut rng)
+        );
+        if let Some(chosen_moves) = chosen_moves {
+            board = chosen_moves.board;
         }
 
         turn_count += 1;
         is_monkey = !is_monkey;
     }
 
+    phase_stats::record_game();
     ResultDto {
         id: instruction.id,
         seed: instruction.seed,
@@ -72,59 +79,156 @@ fn simulate_one(instruction: &InstructionDto) -> ResultDto {
         wolf_strategy: instruction.wolf_strategy.clone(),
         winner: winner.unwrap_or(String::from("none")),
         turn_count,
-        monkey_cards_left: board.monkey_heights.iter().sum(),
-        wolf_cards_left: board.wolf_heights.iter().sum(),
+        monkey_cards_left: board.count(true),
+        wolf_cards_left: board.count(false),
         start_time: start_time.to_rfc3339(),
         end_time: Utc::now().to_rfc3339(),
         process_name: String::from("main_process"),
     }
 }
 
+/// Results of many simulations laid out column by column, ready to be turned into a DataFrame
+#[pyclass(get_all)]
+#[derive(Default)]
+pub struct ResultColumns {
+    pub id: Vec<u64>,
+    pub seed: Vec<u64>,
+    pub monkey_strategy: Vec<String>,
+    pub wolf_strategy: Vec<String>,
+    pub winner: Vec<String>,
+    pub turn_count: Vec<u8>,
+    pub monkey_cards_left: Vec<u8>,
+    pub wolf_cards_left: Vec<u8>,
+    pub start_time: Vec<String>,
+    pub end_time: Vec<String>,
+    pub process_name: Vec<String>,
+}
+
+impl ResultColumns {
+    fn push(&mut self, result: ResultDto) {
+        self.id.push(result.id);
+        self.seed.push(result.seed);
+        self.monkey_strategy.push(result.monkey_strategy);
+        self.wolf_strategy.push(result.wolf_strategy);
+        self.winner.push(result.winner);
+        self.turn_count.push(result.turn_count);
+        self.monkey_cards_left.push(result.monkey_cards_left);
+        self.wolf_cards_left.push(result.wolf_cards_left);
+        self.start_time.push(result.start_time);
+        self.end_time.push(result.end_time);
+        self.process_name.push(result.process_name);
+    }
+
+    fn append(&mut self, other: &mut ResultColumns) {
+        self.id.append(&mut other.id);
+        self.seed.append(&mut other.seed);
+        self.monkey_strategy.append(&mut other.monkey_strategy);
+        self.wolf_strategy.append(&mut other.wolf_strategy);
+        self.winner.append(&mut other.winner);
+        self.turn_count.append(&mut other.turn_count);
+        self.monkey_cards_left.append(&mut other.monkey_cards_left);
+        self.wolf_cards_left.append(&mut other.wolf_cards_left);
+        self.start_time.append(&mut other.start_time);
+        self.end_time.append(&mut other.end_time);
+        self.process_name.append(&mut other.process_name);
+    }
+
+    fn to_data_frame(&self) -> DataFrame {
+        DataFrame::new(vec![
+            Series::new("id".into(), &self.id),
+            Series::new("seed".into(), &self.seed),
+            Series::new("monkey_strategy".into(), &self.monkey_strategy),
+            Series::new("wolf_strategy".into(), &self.wolf_strategy),
+            Series::new("winner".into(), &self.winner),
+            Series::new("turn_count".into(), &self.turn_count),
+            Series::new("monkey_cards_left".into(), &self.monkey_cards_left),
+            Series::new("wolf_cards_left".into(), &self.wolf_cards_left),
+            Series::new("start_time".into(), &self.start_time),
+            Series::new("end_time".into(), &self.end_time),
+            Series::new("process_name".into(), &self.process_name),
+        ]).unwrap()
+    }
+}
+
+/// The stats collected by each thread of a simulation, laid out column by column. seconds holds the seconds spent in
+/// each phase as recorded, with move generation including battle resolution, as ninja_taisen/utils/phase_stats.py
+#[pyclass(get_all)]
+#[derive(Default)]
+pub struct PhaseStatsColumns {
+    pub worker: Vec<String>,
+    pub games: Vec<u64>,
+    pub turns: Vec<u64>,
+    pub candidates: Vec<u64>,
+    pub card_moves: Vec<u64>,
+    pub battles: Vec<u64>,
+    pub seconds: Vec<[f64; PHASE_COUNT]>,
+}
+
+impl PhaseStatsColumns {
+    fn from_named(named_stats: Vec<(String, PhaseStats)>) -> PhaseStatsColumns {
+        let mut columns = PhaseStatsColumns::default();
+        for (worker, stats) in named_stats {
+            columns.worker.push(worker);
+            columns.games.push(stats.games);
+            columns.turns.push(stats.turns);
+            columns.candidates.push(stats.candidates);
+            columns.card_moves.push(stats.card_moves);
+            columns.battles.push(stats.battles);
+            columns.seconds.push(stats.seconds);
+        }
+        columns
+    }
+
+    // The stats table, with the same columns as ninja_taisen/algos/game_runner.py::STATS_SCHEMA
+    fn to_data_frame(&self) -> DataFrame {
+        let all_stats: Vec<PhaseStats> = (0..self.worker.len()).map(|i| PhaseStats{
+            games: self.games[i],
+            turns: self.turns[i],
+            candidates: self.candidates[i],
+            card_moves: self.card_moves[i],
+            battles: self.battles[i],
+            seconds: self.seconds[i],
+        }).collect();
+        let count_column = |name: &str, count: fn(&PhaseStats) -> u64| {
+            Series::new(name.into(), all_stats.iter().map(|stats| count(stats) as i64).collect::<Vec<i64>>())
+        };
+        let ratio_column = |name: &str, ratio: fn(&PhaseStats) -> f64| {
+            Series::new(name.into(), all_stats.iter().map(ratio).collect::<Vec<f64>>())
+        };
+        let seconds_column = |name: &str, phase: Phase| {
+            Series::new(
+                name.into(),
+                all_stats.iter().map(|stats| stats.reported_seconds()[phase as usize]).collect::<Vec<f64>>()
+            )
+        };
+        DataFrame::new(vec![
+            Series::new("worker".into(), &self.worker),
+            count_column("games", |stats| stats.games),
+            count_column("turns", |stats| stats.turns),
+            count_column("candidates", |stats| stats.candidates),
+            count_column("card_moves", |stats| stats.card_moves),
+            count_column("battles", |stats| stats.battles),
+            ratio_column("turns_per_game", PhaseStats::turns_per_game),
+            ratio_column("candidates_per_turn", PhaseStats::candidates_per_turn),
+            ratio_column("battles_per_move", PhaseStats::battles_per_move),
+            seconds_column("move_generation_s", Phase::MoveGeneration),
+            seconds_column("battle_resolution_s", Phase::BattleResolution),
+            seconds_column("strategy_scoring_s", Phase::StrategyScoring),
+            seconds_column("dto_conversion_s", Phase::DtoConversion),
+            seconds_column("result_writing_s", Phase::ResultWriting),
+        ]).unwrap()
+    }
+}
+
 pub fn simulate_many_single_thread(
     instructions: &[InstructionDto],
     results_file: &Path,
 ) {
-    let mut vec_id = Vec::new();
-    let mut vec_seed = Vec::new();
-    let mut vec_monkey_strategy = Vec::new();
-    let mut vec_wolf_strategy = Vec::new();
-    let mut vec_winner = Vec::new();
-    let mut vec_turn_count = Vec::new();
-    let mut vec_monkey_cards_left = Vec::new();
-    let mut vec_wolf_cards_left = Vec::new();
-    let mut vec_start_time = Vec::new();
-    let mut vec_end_time = Vec::new();
-    let mut vec_process_name = Vec::new();
-
+    let mut columns = ResultColumns::default();
     for instruction in instructions.iter() {
-        let result = simulate_one(instruction);
-
-        vec_id.push(result.id);
-        vec_seed.push(result.seed);
-        vec_monkey_strategy.push(result.monkey_strategy);
-        vec_wolf_strategy.push(result.wolf_strategy);
-        vec_winner.push(result.winner);
-        vec_turn_count.push(result.turn_count);
-        vec_monkey_cards_left.push(result.monkey_cards_left);
-        vec_wolf_cards_left.push(result.wolf_cards_left);
-        vec_start_time.push(result.start_time);
-        vec_end_time.push(result.end_time);
-        vec_process_name.push(result.process_name);
-    }
-
-    let mut df = DataFrame::new(vec![
-        Series::new("id".into(), &vec_id),
-        Series::new("seed".into(), &vec_seed),
-        Series::new("monkey_strategy".into(), &vec_monkey_strategy),
-        Series::new("wolf_strategy".into(), &vec_wolf_strategy),
-        Series::new("winner".into(), &vec_winner),
-        Series::new("turn_count".into(), &vec_turn_count),
-        Series::new("monkey_cards_left".into(), &vec_monkey_cards_left),
-        Series::new("wolf_cards_left".into(), &vec_wolf_cards_left),
-        Series::new("start_time".into(), &vec_start_time),
-        Series::new("end_time".into(), &vec_end_time),
-        Series::new("process_name".into(), &vec_process_name),
-    ]).unwrap();
+        columns.push(simulate_one(instruction));
+    }
+    let mut df = columns.to_data_frame();
 
     // Write the DataFrame to a Parquet file
     let file = File::create(&results_file).unwrap();
@@ -133,16 +237,170 @@ pub fn simulate_many_single_thread(
     println!("Wrote parquet results to {}", results_file.as_os_str().to_str().unwrap());
 }
 
-struct ThreadArgs {
-    instructions: Vec<InstructionDto>,
-    results_file: PathBuf,
+/// With per_thread of 0, the results of work-stealing are handed to on_chunk in rounds of this many instructions
+const WORK_STEALING_ROUND: usize = 10_000;
+
+/// Simulate the instructions in chunks of per_thread on a pool of max_threads threads. Each chunk's results are
+/// sent back over a channel and handed to on_chunk on the calling thread, in instruction order.
+/// If per_thread is 0, the games are shared out by work-stealing instead - see simulate_work_stealing.
+/// If collect_stats, returns the stats collected by each thread, including the calling thread's work in on_chunk
+fn simulate_chunks(
+    instructions: &[InstructionDto],
+    max_threads: usize,
+    per_thread: usize,
+    collect_stats: bool,
+    mut on_chunk: impl FnMut(ResultColumns),
+) -> Vec<(String, PhaseStats)> {
+    let main_thread = thread::current().id();
+    let (mut worker_stats, main_stats) = phase_stats::collect(collect_stats, || {
+        if per_thread == 0 {
+            return simulate_work_stealing(instructions, max_threads, collect_stats, on_chunk);
+        }
+
+        let (sender, receiver) = channel();
+        let pool = ThreadPool::new(max_threads);
+        for (chunk_index, chunk) in instructions.chunks(per_thread).enumerate() {
+            let chunk_instructions = chunk.to_vec();
+            let sender = sender.clone();
+            pool.execute(move || {
+                let (columns, stats) = phase_stats::collect(collect_stats, || {
+                    let mut columns = ResultColumns::default();
+                    for instruction in chunk_instructions.iter() {
+                        let result = simulate_one(instruction);
+                        phase_stats::timed(Phase::DtoConversion, || columns.push(result));
+                    }
+                    columns
+                });
+                sender.send((chunk_index, columns, thread::current().id(), stats)).unwrap();
+            });
+        }
+        drop(sender);
+
+        // The pool starts chunks in order, so only chunks which overtook a slower one are ever held back here
+        let mut worker_stats = WorkerStats::default();
+        let mut next_chunk_index = 0;
+        let mut pending_chunks = BTreeMap::new();
+        for (chunk_index, columns, worker, stats) in receiver.iter() {
+            if let Some(stats) = stats {
+                worker_stats.add(worker, &stats);
+            }
+            pending_chunks.insert(chunk_index, columns);
+            while let Some(columns) = pending_chunks.remove(&next_chunk_index) {
+                on_chunk(columns);
+                next_chunk_index += 1;
+            }
+        }
+        // A chunk whose thread panicked never arrives, whether or not a later chunk overtook it
+        assert_eq!(
+            next_chunk_index,
+            instructions.len().div_ceil(per_thread),
+            "A simulation thread panicked before sending its results"
+        );
+        worker_stats
+    });
+
+    if let Some(stats) = main_stats {
+        worker_stats.add(main_thread, &stats);
+    }
+    worker_stats.into_named(main_thread)
+}
+
+/// Simulate the instructions on a rayon pool of max_threads threads. Each round of instructions is split adaptively,
+/// and idle threads steal from busy ones, so there is no chunk size to tune and a run of long games (e.g. random vs
+/// random, which often lasts all 100 turns) is spread over every thread rather than left to finish on one.
+/// Each round's results are handed to on_chunk in instruction order.
+/// If collect_stats, each game's stats are collected on the thread which played it, and returned merged by thread
+fn simulate_work_stealing(
+    instructions: &[InstructionDto],
+    max_threads: usize,
+    collect_stats: bool,
+    mut on_chunk: impl FnMut(ResultColumns),
+) -> WorkerStats {
+    let pool = ThreadPoolBuilder::new().num_threads(max_threads).build().unwrap();
+    let mut worker_stats = WorkerStats::default();
+    for round in instructions.chunks(WORK_STEALING_ROUND) {
+        let results: Vec<_> = pool.install(|| round.par_iter().map(|instruction| {
+            let (result, stats) = phase_stats::collect(collect_stats, || simulate_one(instruction));
+            (result, thread::current().id(), stats)
+        }).collect());
+        let mut columns = ResultColumns::default();
+        for (result, worker, stats) in results {
+            if let Some(stats) = stats {
+                worker_stats.add(worker, &stats);
+            }
+            phase_stats::timed(Phase::DtoConversion, || columns.push(result));
+        }
+        on_chunk(columns);
+    }
+    worker_stats
+}
+
+pub fn simulate_many_in_memory(
+    instructions: &[InstructionDto],
+    max_threads: usize,
+    per_thread: usize,
+    collect_stats: bool,
+) -> (ResultColumns, PhaseStatsColumns) {
+    let mut columns = ResultColumns::default();
+    let named_stats = simulate_chunks(instructions, max_threads, per_thread, collect_stats, |mut chunk_columns| {
+        phase_stats::timed(Phase::DtoConversion, || columns.append(&mut chunk_columns))
+    });
+    (columns, PhaseStatsColumns::from_named(named_stats))
+}
+
+/// Simulate the instructions, given column by column, without touching the disk.
+/// A per_thread of 0 shares the games out by work-stealing. The GIL is released while the games are played.
+/// If collect_stats, the stats collected by each thread are returned too; otherwise the PhaseStatsColumns are empty
+#[pyfunction]
+#[pyo3(signature = (ids, seeds, monkey_strategies, wolf_strategies, max_threads, per_thread, collect_stats=false))]
+pub fn simulate_instructions(
+    py: Python<'_>,
+    ids: Vec<u64>,
+    seeds: Vec<u64>,
+    monkey_strategies: Vec<String>,
+    wolf_strategies: Vec<String>,
+    max_threads: usize,
+    per_thread: usize,
+    collect_stats: bool,
+) -> PyResult<(ResultColumns, PhaseStatsColumns)> {
+    let instruction_count = ids.len();
+    if seeds.len() != instruction_count
+        || monkey_strategies.len() != instruction_count
+        || wolf_strategies.len() != instruction_count {
+        return Err(PyValueError::new_err("ids, seeds, monkey_strategies and wolf_strategies must have equal lengths"));
+    }
+    if max_threads == 0 {
+        return Err(PyValueError::new_err("max_threads must be at least 1"));
+    }
+    for strategy_name in monkey_strategies.iter().chain(wolf_strategies.iter()) {
+        Strategy::new(strategy_name).map_err(PyValueError::new_err)?;
+    }
+
+    let instructions: Vec<InstructionDto> = ids.into_iter()
+        .zip(seeds)
+        .zip(monkey_strategies.into_iter().zip(wolf_strategies))
+        .map(|((id, seed), (monkey_strategy, wolf_strategy))| InstructionDto{id, seed, monkey_strategy, wolf_strategy})
+        .collect();
+
+    let (columns, stats_columns) =
+        py.allow_threads(|| simulate_many_in_memory(&instructions, max_threads, per_thread, collect_stats));
+    if columns.id.len() != instruction_count {
+        return Err(PyValueError::new_err(format!(
+            "Only {} of {} simulations completed - see the panic output above",
+            columns.id.len(),
+            instruction_count
+        )));
+    }
+    Ok((columns, stats_columns))
 }
 
 #[pyfunction]
+#[pyo3(signature = (instructions_csv_file, max_threads, per_thread, collect_stats=false))]
 pub fn simulate_instructions_from_csv_file(
     instructions_csv_file: String,
     max_threads: usize,
     per_thread: usize,
+    collect_stats: bool,
 ) {
     let file_path = PathBuf::from(&instructions_csv_file);
     let results_dir = file_path.parent().unwrap();
@@ -154,120 +412,200 @@ pub fn simulate_instructions_from_csv_file(
         instructions.push(instruction);
     }
 
-    simulate_many_multi_thread(&instructions, &results_dir, max_threads, per_thread);
+    simulate_many_multi_thread(&instructions, &results_dir, max_threads, per_thread, collect_stats);
 }
 
+/// Simulate the instructions on a pool of threads, streaming each chunk's results into results_dir/results.parquet
+/// as its own row group. Rows are written in instruction order, and only the chunks in flight are held in memory.
+/// If collect_stats, the stats collected by each thread are written to results_dir/stats.parquet
 pub fn simulate_many_multi_thread(
     instructions: &[InstructionDto],
     results_dir: &Path,
     max_threads: usize,
     per_thread: usize,
+    collect_stats: bool,
 ) {
-    let chunk_results_dir = results_dir.join("chunk_results");
-    if !exists(&chunk_results_dir).unwrap() {
-        create_dir_all(&chunk_results_dir).unwrap();
-    }
-
-    let mut chunks = Vec::new();
-    let mut results_filenames = Vec::new();
-    let mut min_index = 0;
-    while min_index < instructions.len() {
-        let mut chunk_instructions = Vec::new();
-        let max_index = std::cmp::min(min_index + per_thread, instructions.len());
-        for i in min_index..max_index {
-            chunk_instructions.push(instructions[i].clone());
-        }
+    let results_parquet = results_dir.join("results.parquet");
+    let file = File::create(&results_parquet).unwrap();
+    let mut writer = ParquetWriter::new(file)
+        .batched(&ResultColumns::default().to_data_frame().schema())
+        .unwrap();
 
-        let filename = format!(
-            "results_{}-{}.parquet",
-            chunk_instructions[0].id,
-            chunk_instructions[chunk_instructions.len() - 1].id,
-        );
+    let named_stats = simulate_chunks(instructions, max_threads, per_thread, collect_stats, |columns| {
+        let df = phase_stats::timed(Phase::DtoConversion, || columns.to_data_frame());
+        phase_stats::timed(Phase::ResultWriting, || writer.write_batch(&df).unwrap());
+    });
+    writer.finish().unwrap();
 
-        chunks.push(ThreadArgs{
-            instructions: chunk_instructions,
-            results_file: chunk_results_dir.join(&filename),
-        });
-        results_filenames.push(chunk_results_dir.join(&filename));
-        min_index += per_thread;
-    }
+    println!("Wrote parquet results to {}", results_parquet.as_os_str().to_str().unwrap());
 
-    let pool = ThreadPool::new(max_threads);
-    for thread_args in chunks {
-        pool.execute(move || { simulate_many_single_thread(&thread_args.instructions, &thread_args.results_file); });
+    if collect_stats {
+        let stats_parquet = results_dir.join("stats.parquet");
+        let mut stats_df = PhaseStatsColumns::from_named(named_stats).to_data_frame();
+        ParquetWriter::new(File::create(&stats_parquet).unwrap()).finish(&mut stats_df).unwrap();
+        println!("Wrote parquet stats to {}", stats_parquet.as_os_str().to_str().unwrap());
     }
-    pool.join();
-
-    let chunk_lazy_dfs: Vec<_> = results_filenames.iter()
-        .map(|p| LazyFrame::scan_parquet(p, Default::default()).unwrap())
-        .collect();
-    let mut full_df = concat(chunk_lazy_dfs, Default::default())
-        .unwrap()
-        .sort(["id"], Default::default())
-        .collect()
-        .unwrap();
+}
 
-    let results_parquet = results_dir.join("results.parquet");
-    let file = File::create(&results_parquet).unwrap();
-    ParquetWriter::new(file).finish(&mut full_df).unwrap();
+fn parse_team(team: &str) -> Result<bool, String> {
+    match team {
+        "monkey" => Ok(true),
+        "wolf" => Ok(false),
+        _ => Err(format!("Unexpected team {}", team))
+    }
 }
 
-pub fn choose_move(request: &ChooseRequest) -> ChooseResponse {
-    let board = Board::from_dto(&request.board);
-    let is_monkey =
-        if request.team == *"monkey" { true }
-        else if request.team == *"wolf" { false }
-        else { panic!("Unexpected team {}", request.team) };
+// Choose a move for the request, or describe why the request is invalid
+pub fn choose_move(request: &ChooseRequest) -> Result<ChooseResponse, String> {
+    let board = Board::from_dto(&request.board)?;
+    let is_monkey = parse_team(&request.team)?;
     let dice_roll = [
         DiceRoll{category: cards::BITS_CATEGORY_ROCK, roll: request.dice.rock},
         DiceRoll{category: cards::BITS_CATEGORY_PAPER, roll: request.dice.paper},
         DiceRoll{category: cards::BITS_CATEGORY_SCISSORS, roll: request.dice.scissors},
     ];
 
-    let all_permitted_moves = gather_all_moves(&board, is_monkey, &dice_roll);
+    let chosen_moves =
+        choose_moves_on_board(&board, is_monkey, &dice_roll, &request.strategy, request.seed, request.deduplicate)?;
+    Ok(ChooseResponse{moves: chosen_moves.iter().map(|a_move| a_move.to_dto()).collect()})
+}
+
+fn choose_moves_on_board(
+    board: &Board,
+    is_monkey: bool,
+    dice_roll: &[DiceRoll; 3],
+    strategy_name: &String,
+    seed: Option<u64>,
+    deduplicate: bool,
+) -> Result<Vec<Move>, String> {
+    let strategy = Strategy::new(strategy_name)?;
+    let all_permitted_moves = gather_all_moves(board, is_monkey, dice_roll, deduplicate);
     if all_permitted_moves.is_empty() {
-        return ChooseResponse{moves: Vec::new()};
+        return Ok(Vec::new());
     }
-    let strategy = Strategy::new(&request.strategy);
 
-    let start = SystemTime::now();
-    let since_epoch = start.duration_since(UNIX_EPOCH).expect("Time went backwards");
-    let seed = since_epoch.as_secs(); // Use seconds as the seed
+    let seed = seed.unwrap_or_else(|| {
+        let start = SystemTime::now();
+        let since_epoch = start.duration_since(UNIX_EPOCH).expect("Time went backwards");
+        since_epoch.as_secs() // Use seconds as the seed
+    });
     let mut rng = StdRng::seed_from_u64(seed);
 
     let chosen_move = strategy.choose_move(&all_permitted_moves, &mut rng);
-
-    let mut move_dtos = Vec::new();
-    for a_move in &chosen_move.moves {
-        move_dtos.push(a_move.to_dto())
-    }
-    ChooseResponse{moves: move_dtos}
+    Ok(chosen_move.moves.as_slice().to_vec())
 }
 
-pub fn execute_move(request: &ExecuteRequest) -> ExecuteResponse {
-    let is_monkey =
-        if request.team == "monkey" { true }
-        else if request.team == "wolf" { false }
-        else { panic!("Unexpected team {}", request.team) };
-
-    let mut dice_lookup = HashMap::new();
-    dice_lookup.insert(String::from("rock"), request.dice.rock);
-    dice_lookup.insert(String::from("paper"), request.dice.paper);
-    dice_lookup.insert(String::from("scissors"), request.dice.scissors);
+// Execute the request's moves, or describe why the request is invalid
+pub fn execute_move(request: &ExecuteRequest) -> Result<ExecuteResponse, String> {
+    let is_monkey = parse_team(&request.team)?;
 
-    let mut board = Board::from_dto(&request.board);
+    let mut board = Board::from_dto(&request.board)?;
     for a_move in &request.moves {
-        let card = card::from_string(&a_move.card);
-        let dice_roll = dice_lookup.get(&a_move.dice_category);
-        let card_location = board.locate_card(is_monkey, card);
+        let card = card::from_string(&a_move.card)?;
+        let dice_roll = match a_move.dice_category.as_str() {
+            "rock" => request.dice.rock,
+            "paper" => request.dice.paper,
+            "scissors" => request.dice.scissors,
+            dice_category => return Err(format!("Unexpected dice_category {}", dice_category))
+        };
+        let card_location = board.locate_card(is_monkey, card)
+            .ok_or_else(|| format!("Unable to find card {} in board", a_move.card))?;
         board.move_card_and_resolve_battles(
             is_monkey,
-            *dice_roll.unwrap(),
+            dice_roll,
             card_location.pile_index,
             card_location.card_index
         );
     }
-    ExecuteResponse { board: board.to_dto() }
+    Ok(ExecuteResponse { board: board.to_dto() })
+}
+
+// Handle the requests in parallel, in the same order. If any are invalid, describe the first of them, naming its index
+// within the whole batch: by default its position in requests, else the matching entry of indices
+fn handle_each<Req: Sync, Resp: Send>(
+    requests: &[Req],
+    indices: Option<&[usize]>,
+    handle: impl Fn(&Req) -> Result<Resp, String> + Sync + Send
+) -> Result<Vec<Resp>, String> {
+    if let Some(indices) = indices {
+        if indices.len() != requests.len() {
+            return Err(format!("Expected one index per request, but got {} for {}", indices.len(), requests.len()));
+        }
+    }
+    // Every result is kept, so that which invalid request is described does not depend on how the threads are scheduled
+    let results: Vec<Result<Resp, String>> = requests.par_iter().map(handle).collect();
+    results
+        .into_iter()
+        .enumerate()
+        .map(|(i, result)| {
+            let index = indices.map_or(i, |indices| indices[i]);
+            result.map_err(|e| format!("Invalid request at index {}: {}", index, e))
+        })
+        .collect()
+}
+
+/// Python entrypoint for choose_move: takes a ChooseRequest as JSON and returns a ChooseResponse as JSON.
+/// The GIL is released while the move is chosen. An invalid request raises ValueError
+#[pyfunction]
+#[pyo3(name = "choose_move")]
+pub fn choose_move_json(py: Python<'_>, request_json: String) -> PyResult<String> {
+    let request: ChooseRequest = serde_json::from_str(&request_json)
+        .map_err(|e| PyValueError::new_err(format!("Invalid ChooseRequest: {}", e)))?;
+    let response = py.allow_threads(|| choose_move(&request)).map_err(PyValueError::new_err)?;
+    serde_json::to_string(&response).map_err(|e| PyValueError::new_err(e.to_string()))
+}
+
+/// Python entrypoint for choose_move in the compact binary wire format of ninja_taisen/objects/wire_format.py: takes a
+/// request as bytes and returns a response as bytes. The GIL is released while the move is chosen. An invalid request
+/// raises ValueError
+#[pyfunction]
+#[pyo3(name = "choose_move_binary")]
+pub fn choose_move_binary(py: Python<'_>, request: &[u8]) -> PyResult<Cow<'static, [u8]>> {
+    let request = wire::decode_choose_request(request).map_err(PyValueError::new_err)?;
+    let chosen_moves = py.allow_threads(|| choose_moves_on_board(
+        &request.board,
+        request.is_monkey,
+        &request.dice_rolls,
+        &request.strategy,
+        request.seed,
+        request.deduplicate
+    )).map_err(PyValueError::new_err)?;
+    Ok(Cow::Owned(wire::encode_choose_response(&chosen_moves)))
+}
+
+/// Python entrypoint for choose_move on many requests: takes a JSON array of ChooseRequests and returns a JSON array
+/// of their ChooseResponses, in the same order. The requests are shared between threads, with the GIL released.
+/// An invalid request raises ValueError, naming its index, or if given, its entry in indices
+#[pyfunction]
+#[pyo3(name = "choose_moves", signature = (requests_json, indices=None))]
+pub fn choose_moves_json(py: Python<'_>, requests_json: String, indices: Option<Vec<usize>>) -> PyResult<String> {
+    let requests: Vec<ChooseRequest> = serde_json::from_str(&requests_json)
+        .map_err(|e| PyValueError::new_err(format!("Invalid ChooseRequest array: {}", e)))?;
+    let responses = py.allow_threads(|| handle_each(&requests, indices.as_deref(), choose_move)).map_err(PyValueError::new_err)?;
+    serde_json::to_string(&responses).map_err(|e| PyValueError::new_err(e.to_string()))
+}
+
+/// Python entrypoint for execute_move: takes an ExecuteRequest as JSON and returns an ExecuteResponse as JSON.
+/// The GIL is released while the moves are executed. An invalid request raises ValueError
+#[pyfunction]
+#[pyo3(name = "execute_move")]
+pub fn execute_move_json(py: Python<'_>, request_json: String) -> PyResult<String> {
+    let request: ExecuteRequest = serde_json::from_str(&request_json)
+        .map_err(|e| PyValueError::new_err(format!("Invalid ExecuteRequest: {}", e)))?;
+    let response = py.allow_threads(|| execute_move(&request)).map_err(PyValueError::new_err)?;
+    serde_json::to_string(&response).map_err(|e| PyValueError::new_err(e.to_string()))
+}
+
+/// Python entrypoint for execute_move on many requests: takes a JSON array of ExecuteRequests and returns a JSON array
+/// of their ExecuteResponses, in the same order. The requests are shared between threads, with the GIL released.
+/// An invalid request raises ValueError, naming its index, or if given, its entry in indices
+#[pyfunction]
+#[pyo3(name = "execute_moves", signature = (requests_json, indices=None))]
+pub fn execute_moves_json(py: Python<'_>, requests_json: String, indices: Option<Vec<usize>>) -> PyResult<String> {
+    let requests: Vec<ExecuteRequest> = serde_json::from_str(&requests_json)
+        .map_err(|e| PyValueError::new_err(format!("Invalid ExecuteRequest array: {}", e)))?;
+    let responses = py.allow_threads(|| handle_each(&requests, indices.as_deref(), execute_move)).map_err(PyValueError::new_err)?;
+    serde_json::to_string(&responses).map_err(|e| PyValueError::new_err(e.to_string()))
 }
 
 /// A Python module implemented in Rust. The name of this function must match
@@ -276,6 +614,14 @@ pub fn execute_move(request: &ExecuteRequest) -> ExecuteResponse {
 #[pymodule]
 fn ninja_taisen_rust(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(simulate_instructions_from_csv_file, m)?)?;
+    m.add_function(wrap_pyfunction!(simulate_instructions, m)?)?;
+    m.add_class::<ResultColumns>()?;
+    m.add_class::<PhaseStatsColumns>()?;
+    m.add_function(wrap_pyfunction!(choose_move_json, m)?)?;
+    m.add_function(wrap_pyfunction!(choose_move_binary, m)?)?;
+    m.add_function(wrap_pyfunction!(choose_moves_json, m)?)?;
+    m.add_function(wrap_pyfunction!(execute_move_json, m)?)?;
+    m.add_function(wrap_pyfunction!(execute_moves_json, m)?)?;
     Ok(())
 }
 
@@ -287,9 +633,13 @@ mod tests {
     use std::path::Path;
     use polars::prelude::{ParquetReader, SerReader};
     use tempfile::tempdir;
-    use crate::{card, choose_move, execute_move, simulate_many_multi_thread, simulate_many_single_thread, ExecuteRequest, InstructionDto};
+    use crate::{card, choose_move, choose_moves_on_board, execute_move, handle_each, simulate_many_in_memory, simulate_many_multi_thread, simulate_many_single_thread, ExecuteRequest, InstructionDto};
+    use rand::SeedableRng;
+    use rand::rngs::StdRng;
+    use crate::board::Board;
     use crate::card::cards;
-    use crate::dto::{BoardDto, ChooseRequest, ChooseResponse};
+    use crate::dice::roll_dice_three_times;
+    use crate::dto::{BoardDto, ChooseRequest, ChooseResponse, MoveDto};
 
     #[test]
     fn test_simulate_one() {
@@ -346,7 +696,7 @@ mod tests {
             });
         }
 
-        simulate_many_multi_thread(&instructions, &temp_dir.path(), 3, 12);
+        simulate_many_multi_thread(&instructions, &temp_dir.path(), 3, 12, false);
 
         let results_filename = temp_dir.path().join("results.parquet");
         let mut results_file = File::open(&results_filename).unwrap();
@@ -354,6 +704,112 @@ mod tests {
 
         assert_eq!(results_df.shape().0, instructions.len());
         assert_eq!(results_df.shape().1, 11);
+
+        let ids: Vec<u64> = results_df.column("id").unwrap().u64().unwrap().into_no_null_iter().collect();
+        assert_eq!(ids, (0..100).collect::<Vec<u64>>());
+        assert!(!temp_dir.path().join("chunk_results").exists());
+        assert!(!temp_dir.path().join("stats.parquet").exists());
+    }
+
+    #[test]
+    fn test_simulate_many_multi_thread_with_stats() {
+        let temp_dir = tempdir().expect("Failed to create temp dir");
+        let mut instructions = Vec::new();
+        for i in 0..100 {
+            instructions.push(InstructionDto{
+                id: i,
+                seed: i,
+                monkey_strategy: String::from("random_spot_win"),
+                wolf_strategy: String::from("metric_count")
+            });
+        }
+
+        simulate_many_multi_thread(&instructions, &temp_dir.path(), 3, 12, true);
+
+        let mut results_file = File::open(temp_dir.path().join("results.parquet")).unwrap();
+        let results_df = ParquetReader::new(&mut results_file).finish().unwrap();
+        let mut stats_file = File::open(temp_dir.path().join("stats.parquet")).unwrap();
+        let stats_df = ParquetReader::new(&mut stats_file).finish().unwrap();
+
+        // A row for each of the (up to 3) threads which played the games, and one for the main thread which wrote them
+        assert_eq!(stats_df.width(), 14);
+        assert!(stats_df.height() >= 2 && stats_df.height() <= 4);
+        let workers: Vec<&str> = stats_df.column("worker").unwrap().str().unwrap().into_no_null_iter().collect();
+        assert_eq!(workers.iter().filter(|&&worker| worker == "main_thread").count(), 1);
+        let games: i64 = stats_df.column("games").unwrap().i64().unwrap().sum().unwrap();
+        let turns: i64 = stats_df.column("turns").unwrap().i64().unwrap().sum().unwrap();
+        let turn_count: u64 = results_df.column("turn_count").unwrap().u8().unwrap()
+            .into_no_null_iter().map(|turn_count| turn_count as u64).sum();
+        assert_eq!(games, instructions.len() as i64);
+        assert_eq!(turns as u64, turn_count);
+    }
+
+    #[test]
+    #[should_panic(expected = "A simulation thread panicked before sending its results")]
+    fn test_simulate_many_fails_if_last_chunk_is_lost() {
+        let temp_dir = tempdir().expect("Failed to create temp dir");
+        let mut instructions = Vec::new();
+        for i in 0..10 {
+            instructions.push(InstructionDto{
+                id: i,
+                seed: i,
+                monkey_strategy: "random".to_string(),
+                // The last chunk's thread panics on the unknown strategy, so no chunk is left pending behind it
+                wolf_strategy: if i == 9 { "clairvoyant".to_string() } else { "random".to_string() },
+            });
+        }
+        simulate_many_multi_thread(&instructions, temp_dir.path(), 2, 5, false);
+    }
+
+    #[test]
+    fn test_simulate_many_in_memory() {
+        let mut instructions = Vec::new();
+        for i in 0..100 {
+            instructions.push(InstructionDto{
+                id: i,
+                seed: i,
+                monkey_strategy: String::from("random_spot_win"),
+                wolf_strategy: String::from("metric_count")
+            });
+        }
+
+        let (columns, stats_columns) = simulate_many_in_memory(&instructions, 3, 12, false);
+        let results_df = columns.to_data_frame();
+
+        assert_eq!(results_df.shape().0, instructions.len());
+        assert_eq!(results_df.shape().1, 11);
+        assert_eq!(columns.id, (0..100).collect::<Vec<u64>>());
+        assert!(stats_columns.worker.is_empty());
+
+        let (single_thread_columns, _) = simulate_many_in_memory(&instructions, 1, 100, false);
+        assert_eq!(columns.winner, single_thread_columns.winner);
+        assert_eq!(columns.turn_count, single_thread_columns.turn_count);
+    }
+
+    #[test]
+    fn test_simulate_many_work_stealing() {
+        // Random vs random games run much longer than the others, so the workload is skewed towards the start
+        let mut instructions = Vec::new();
+        for i in 0..100 {
+            let monkey_strategy = if i < 20 { "random" } else { "metric_strength" };
+            instructions.push(InstructionDto{
+                id: i,
+                seed: i,
+                monkey_strategy: String::from(monkey_strategy),
+                wolf_strategy: String::from("random")
+            });
+        }
+
+        let (columns, stats_columns) = simulate_many_in_memory(&instructions, 3, 0, true);
+        assert_eq!(columns.id, (0..100).collect::<Vec<u64>>());
+        assert_eq!(stats_columns.games.iter().sum::<u64>(), 100);
+        assert_eq!(stats_columns.turns.iter().sum::<u64>(), columns.turn_count.iter().map(|&t| t as u64).sum::<u64>());
+
+        let (single_thread_columns, _) = simulate_many_in_memory(&instructions, 1, 100, false);
+        assert_eq!(columns.winner, single_thread_columns.winner);
+        assert_eq!(columns.turn_count, single_thread_columns.turn_count);
+        assert_eq!(columns.monkey_cards_left, single_thread_columns.monkey_cards_left);
+        assert_eq!(columns.wolf_cards_left, single_thread_columns.wolf_cards_left);
     }
 
     #[test]
@@ -366,6 +822,69 @@ mod tests {
         test_each_request_response(false)
     }
 
+    #[test]
+    fn test_invalid_requests_are_rejected() {
+        let request_string = include_str!("../tests/regression/turn_by_turn/metric_count_vs_metric_count/request_0.json");
+        let request = || serde_json::from_str::<ChooseRequest>(request_string).unwrap();
+
+        let mut bad_team = request();
+        bad_team.team = "badger".to_string();
+        assert_eq!(choose_move(&bad_team).err().unwrap(), "Unexpected team badger");
+
+        let mut bad_strategy = request();
+        bad_strategy.strategy = "clairvoyant".to_string();
+        let requests = [request(), bad_team, request(), bad_strategy];
+        assert_eq!(handle_each(&requests[..1], None, choose_move).unwrap().len(), 1);
+        // Whichever thread fails first, the first invalid request is the one described
+        for _ in 0..20 {
+            assert_eq!(
+                handle_each(&requests, None, choose_move).err().unwrap(),
+                "Invalid request at index 1: Unexpected team badger"
+            );
+        }
+        assert_eq!(
+            handle_each(&requests[2..], Some(&[5, 7][..]), choose_move).err().unwrap(),
+            "Invalid request at index 7: Could not match strategy_name 'clairvoyant'"
+        );
+        assert_eq!(
+            handle_each(&requests[2..], Some(&[5][..]), choose_move).err().unwrap(),
+            "Expected one index per request, but got 1 for 2"
+        );
+
+        let mut bad_strategy = request();
+        bad_strategy.strategy = "clairvoyant".to_string();
+        assert_eq!(choose_move(&bad_strategy).err().unwrap(), "Could not match strategy_name 'clairvoyant'");
+
+        let mut bad_pile = request();
+        bad_pile.board.wolf.insert(11, vec!["WJ4".to_string()]);
+        assert_eq!(choose_move(&bad_pile).err().unwrap(), "Unexpected pile index 11");
+
+        let execute_request = |dice_category: &str, card: &str| {
+            let request = request();
+            ExecuteRequest{
+                board: request.board,
+                dice: request.dice,
+                team: request.team,
+                moves: vec![MoveDto{dice_category: dice_category.to_string(), card: card.to_string()}]
+            }
+        };
+        assert!(execute_move(&execute_request("rock", "MS1")).is_ok());
+        assert_eq!(execute_move(&execute_request("joker", "MS1")).err().unwrap(), "Unexpected dice_category joker");
+        assert_eq!(execute_move(&execute_request("rock", "WJ4")).err().unwrap(), "Unable to find card WJ4 in board");
+        assert!(execute_move(&execute_request("rock", "MX1")).err().unwrap().starts_with("Invalid card string MX1"));
+    }
+
+    #[test]
+    fn test_unknown_strategy_is_rejected_on_board() {
+        // As used by the binary entrypoint, whose decoder leaves the strategy name to be checked here
+        let mut rng = StdRng::seed_from_u64(0);
+        let board = Board::new(&mut rng);
+        let dice_rolls = roll_dice_three_times(&mut rng);
+        let strategy_name = "clairvoyant".to_string();
+        let chosen_moves = choose_moves_on_board(&board, true, &dice_rolls, &strategy_name, Some(0), false);
+        assert_eq!(chosen_moves.err().unwrap(), "Could not match strategy_name 'clairvoyant'");
+    }
+
     fn test_each_request_response(is_choose: bool) {
         let json_root = Path::new(file!())
             .canonicalize().unwrap()
@@ -417,7 +936,7 @@ mod tests {
             .unwrap();
         let request: ChooseRequest = serde_json::from_str(&request_string).unwrap();
 
-        let response = choose_move(&request);
+        let response = choose_move(&request).unwrap();
 
         let mut result = response.moves.len() <= 3;
         let mut seen_dice_categories: HashSet<String> = HashSet::new();
@@ -427,7 +946,7 @@ mod tests {
             let dice_category = &a_move.dice_category;
             let card = &a_move.card;
 
-            let card_u8 = card::from_string(card);
+            let card_u8 = card::from_string(card).unwrap();
             let card_category_u8 = card_u8 & cards::CHECK_CATEGORY;
             let dice_category_u8 =
                 if dice_category == "rock" { cards::BITS_CATEGORY_ROCK }
@@ -475,7 +994,7 @@ mod tests {
             team: request.team,
             moves: response.moves
         };
-        let execute_response = execute_move(&execute_request);
+        let execute_response = execute_move(&execute_request).unwrap();
 
         let next_request_filename = json_dir.join(format!("request_{}.json", turn_index + 1));
         if next_request_filename.exists() {
@@ -16,8 +16,8 @@ pub struct CountMetric {
 
 impl Metric for CountMetric {
     fn calculate(&self, completed_moves: &CompletedMoves) -> f32 {
-        let monkey_count = completed_moves.board.monkey_heights.iter().sum::<u8>() as f32;
-        let wolf_count = completed_moves.board.wolf_heights.iter().sum::<u8>() as f32;
+        let monkey_count = completed_moves.board.count(true) as f32;
+        let wolf_count = completed_moves.board.count(false) as f32;
         if completed_moves.is_monkey {
             Self::normalise(monkey_count, wolf_count)
         }
@@ -42,21 +42,15 @@ impl StrengthMetric {
         }
     }
 
-    fn team_metric(heights: &[u8; 11], cards: &[u8; 110]) -> f32 {
-        let mut metric = 0.0;
-        for pile_index in 0..heights.len() {
-            for card_index in 0..heights[pile_index] {
-                metric += StrengthMetric::card_metric(cards[pile_index * 10 + card_index as usize])
-            }
-        }
-        metric
+    fn team_metric(team_cards: &[u8]) -> f32 {
+        team_cards.iter().map(|&card| StrengthMetric::card_metric(card)).sum()
     }
 }
 
 impl Metric for StrengthMetric {
     fn calculate(&self, completed_moves: &CompletedMoves) -> f32 {
-        let monkey_metric = StrengthMetric::team_metric(&completed_moves.board.monkey_heights, &completed_moves.board.monkey_cards);
-        let wolf_metric = StrengthMetric::team_metric(&completed_moves.board.wolf_heights, &completed_moves.board.wolf_cards);
+        let monkey_metric = StrengthMetric::team_metric(completed_moves.board.team_cards(true));
+        let wolf_metric = StrengthMetric::team_metric(completed_moves.board.team_cards(false));
         if completed_moves.is_monkey {
             Self::normalise(monkey_metric, wolf_metric)
         }
@@ -87,8 +81,8 @@ impl PositionMetric {
 
 impl Metric for PositionMetric {
     fn calculate(&self, completed_moves: &CompletedMoves) -> f32 {
-        let monkey_metric = self.team_metric(&completed_moves.board.monkey_heights, completed_moves.is_monkey);
-        let wolf_metric = self.team_metric(&completed_moves.board.wolf_heights, completed_moves.is_monkey);
+        let monkey_metric = self.team_metric(&completed_moves.board.heights(true), completed_moves.is_monkey);
+        let wolf_metric = self.team_metric(&completed_moves.board.heights(false), completed_moves.is_monkey);
         if completed_moves.is_monkey {
             Self::normalise(monkey_metric, wolf_metric)
         }
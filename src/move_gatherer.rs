@@ -1,114 +1,241 @@
-use crate::board::{Board, CardLocation, CompletedMoves, Move};
+use std::cell::RefCell;
+use std::collections::HashSet;
+use std::ops::ControlFlow;
+use crate::board::{Board, CardLocation, CompletedMoves, Move, MoveSequence, PILE_COUNT};
 use crate::card::cards;
 use crate::dice::DiceRoll;
+use crate::phase_stats;
+
+// The states reached after one and two dice, plus the deduplication sets. Each thread keeps one of these and reuses
+// its capacity from turn to turn, so once warmed up, generating a turn's moves does not allocate
+#[derive(Default)]
+struct MoveArena {
+    states_a: Vec<CompletedMoves>,
+    states_b: Vec<CompletedMoves>,
+    expanded_states: HashSet<(Board, bool, u8)>,
+    distinct_boards: HashSet<Board>
+}
+
+thread_local! {
+    static MOVE_ARENA: RefCell<MoveArena> = RefCell::new(MoveArena::default());
+}
 
-pub fn gather_all_moves(board: &Board, is_monkey: bool, dice_rolls: &[DiceRoll; 3]) -> Vec<CompletedMoves> {
+// Many different orderings of the dice reach the same final board. If deduplicate is true, only the first
+// CompletedMoves found for each distinct board is returned, and states already expanded via another ordering
+// of the same dice are not expanded again
+pub fn gather_all_moves(board: &Board, is_monkey: bool, dice_rolls: &[DiceRoll; 3], deduplicate: bool) -> Vec<CompletedMoves> {
     let mut completed_moves = Vec::new();
-    let initial_states = vec![CompletedMoves {
-        moves: Vec::new(),
-        board: board.clone(),
-        is_monkey,
-    }];
+    for_each_move(board, is_monkey, dice_rolls, deduplicate, |completed| {
+        completed_moves.push(completed.clone());
+        ControlFlow::Continue(())
+    });
+    completed_moves
+}
+
+// Hand each permitted CompletedMoves to visit, in the order gather_all_moves would return them: for each first dice,
+// and each second dice, the three-move states and then the two-move states, and finally the one-move states.
+// The states visited are only valid for the duration of the call. If visit breaks, no further moves are generated
+pub fn for_each_move(
+    board: &Board,
+    is_monkey: bool,
+    dice_rolls: &[DiceRoll; 3],
+    deduplicate: bool,
+    mut visit: impl FnMut(&CompletedMoves) -> ControlFlow<()>
+) {
+    // Taken rather than borrowed, so that visit may itself generate moves (with a fresh arena)
+    let mut arena = MOVE_ARENA.take();
+    arena.expanded_states.clear();
+    arena.distinct_boards.clear();
+    let _ = visit_moves(&mut arena, board, is_monkey, dice_rolls, deduplicate, &mut visit);
+    MOVE_ARENA.set(arena);
+}
+
+fn visit_moves(
+    arena: &mut MoveArena,
+    board: &Board,
+    is_monkey: bool,
+    dice_rolls: &[DiceRoll; 3],
+    deduplicate: bool,
+    visit: &mut impl FnMut(&CompletedMoves) -> ControlFlow<()>
+) -> ControlFlow<()> {
+    let MoveArena{states_a, states_b, expanded_states, distinct_boards} = arena;
+    let mut emit = |completed: &CompletedMoves| {
+        if !deduplicate || distinct_boards.insert(completed.board.clone()) {
+            phase_stats::score_candidate(|| visit(completed))
+        } else {
+            ControlFlow::Continue(())
+        }
+    };
+    let initial_state = CompletedMoves{moves: MoveSequence::default(), board: board.clone(), is_monkey};
 
     for a in 0..dice_rolls.len() {
-        let mut new_moves_a = gather_moves_for_dice_roll(
-            &initial_states,
-            is_monkey,
-            dice_rolls[a].category,
-            dice_rolls[a].roll
-        );
+        states_a.clear();
+        for_each_move_for_dice_roll(&initial_state, is_monkey, &dice_rolls[a], |state| {
+            states_a.push(state.clone());
+            ControlFlow::Continue(())
+        })?;
+        if deduplicate {
+            retain_unexpanded_states(states_a, expanded_states);
+        }
 
         for b in 0..dice_rolls.len() {
             if a == b {
                 continue
             }
 
-            let mut new_moves_b = gather_moves_for_dice_roll(
-                &new_moves_a,
-                is_monkey,
-                dice_rolls[b].category,
-                dice_rolls[b].roll
-            );
+            states_b.clear();
+            for state_a in states_a.iter() {
+                for_each_move_for_dice_roll(state_a, is_monkey, &dice_rolls[b], |state| {
+                    states_b.push(state.clone());
+                    ControlFlow::Continue(())
+                })?;
+            }
+            if deduplicate {
+                retain_unexpanded_states(states_b, expanded_states);
+            }
 
             for c in 0..dice_rolls.len() {
                 if a == c || b == c {
                     continue
                 }
 
-                let mut new_moves_c = gather_moves_for_dice_roll(
-                    &new_moves_b,
-                    is_monkey,
-                    dice_rolls[c].category,
-                    dice_rolls[c].roll
-                );
-                completed_moves.append(&mut new_moves_c);
+                for state_b in states_b.iter() {
+                    for_each_move_for_dice_roll(state_b, is_monkey, &dice_rolls[c], &mut emit)?;
+                }
             }
-            completed_moves.append(&mut new_moves_b);
+            states_b.iter().try_for_each(&mut emit)?;
         }
-        completed_moves.append(&mut new_moves_a);
+        states_a.iter().try_for_each(&mut emit)?;
     }
+    ControlFlow::Continue(())
+}
 
-    completed_moves
+fn retain_unexpanded_states(states: &mut Vec<CompletedMoves>, expanded_states: &mut HashSet<(Board, bool, u8)>) {
+    states.retain(|state| {
+        let used_dice = state.moves.iter().fold(0u8, |acc, m| acc | (1 << (m.dice_category >> 4)));
+        expanded_states.insert((state.board.clone(), state.used_joker(), used_dice))
+    });
 }
 
-fn gather_moves_for_dice_roll(
-    initial_states: &Vec<CompletedMoves>,
+fn for_each_move_for_dice_roll(
+    initial_state: &CompletedMoves,
     is_monkey: bool,
-    dice_category: u8,
-    dice_roll: i8
-) -> Vec<CompletedMoves> {
-    let mut end_states = Vec::new();
-
-    for initial_state in initial_states {
-        if initial_state.board.victorious_team() != cards::NULL {
-            continue
-        }
-
-        let movable_card_locations = moveable_card_indices(
-            &initial_state.board, is_monkey, dice_category, initial_state.used_joker()
-        );
-        for card_location in movable_card_locations {
-            let mut board = initial_state.board.clone();
-            let card = board.get_card(is_monkey, card_location.pile_index, card_location.card_index);
-            board.move_card_and_resolve_battles(
-                is_monkey,
-                dice_roll,
-                card_location.pile_index,
-                card_location.card_index
-            );
-
-            let mut moves = initial_state.moves.clone();
-            moves.push(Move{ dice_category, card });
-
-            let end_state = CompletedMoves { moves, board, is_monkey };
-            end_states.push(end_state);
-        }
+    dice_roll: &DiceRoll,
+    mut visit: impl FnMut(&CompletedMoves) -> ControlFlow<()>
+) -> ControlFlow<()> {
+    if initial_state.board.victorious_team() != cards::NULL {
+        return ControlFlow::Continue(())
     }
 
-    end_states
+    let used_joker = initial_state.used_joker();
+    for_each_moveable_card(&initial_state.board, is_monkey, dice_roll.category, used_joker, |card_location| {
+        let mut end_state = initial_state.clone();
+        let card = end_state.board.get_card(is_monkey, card_location.pile_index, card_location.card_index);
+        end_state.board.move_card_and_resolve_battles(
+            is_monkey,
+            dice_roll.roll,
+            card_location.pile_index,
+            card_location.card_index
+        );
+        end_state.moves.push(Move{ dice_category: dice_roll.category, card });
+        visit(&end_state)
+    })
 }
 
-fn moveable_card_indices(board: &Board, is_monkey: bool, category: u8, used_joker: bool) -> Vec<CardLocation> {
-    let mut card_locations = Vec::new();
-    let heights = if is_monkey { board.monkey_heights } else { board.wolf_heights };
-    let cards = if is_monkey { board.monkey_cards } else { board.wolf_cards };
-
-    for pile_index in 0..heights.len() {
-        let pile_height = heights[pile_index] as i8;
-        let accessible_start = std::cmp::max(0, pile_height - 3);
-
-        for card_index_i8 in accessible_start..pile_height {
-            let card_index = card_index_i8 as usize;
-            let card = cards[pile_index * 10 + card_index];
+fn for_each_moveable_card(
+    board: &Board,
+    is_monkey: bool,
+    category: u8,
+    used_joker: bool,
+    mut visit: impl FnMut(CardLocation) -> ControlFlow<()>
+) -> ControlFlow<()> {
+    let team_cards = board.team_cards(is_monkey);
+    let mut pile_start = 0;
+
+    for pile_index in 0..PILE_COUNT {
+        let pile_height = board.get_height(is_monkey, pile_index);
+        let accessible_start = pile_height.saturating_sub(3);
+
+        for card_index in accessible_start..pile_height {
+            let card = team_cards[pile_start + card_index as usize];
             let card_category = card & cards::CHECK_CATEGORY;
             if card_category == category || ((card_category == cards::BITS_CATEGORY_JOKER) && !used_joker) {
-                card_locations.push(CardLocation{
-                    pile_index: pile_index as u8,
-                    card_index: card_index as u8
-                })
+                visit(CardLocation{pile_index, card_index})?;
             }
         }
+
+        pile_start += pile_height as usize;
+        if pile_start == team_cards.len() {
+            break
+        }
     }
+    ControlFlow::Continue(())
+}
 
-    card_locations
+#[cfg(test)]
+mod tests {
+    use std::collections::HashSet;
+    use std::ops::ControlFlow;
+    use rand::prelude::StdRng;
+    use rand::SeedableRng;
+    use crate::board::Board;
+    use crate::card::cards;
+    use crate::dice::DiceRoll;
+    use crate::move_gatherer::{for_each_move, gather_all_moves};
+
+    #[test]
+    fn test_deduplicate_keeps_every_distinct_board() {
+        for seed in 42..45 {
+            let mut rng = StdRng::seed_from_u64(seed);
+            let board = Board::new(&mut rng);
+            let dice_rolls = [
+                DiceRoll{category: cards::BITS_CATEGORY_ROCK, roll: 1},
+                DiceRoll{category: cards::BITS_CATEGORY_PAPER, roll: 2},
+                DiceRoll{category: cards::BITS_CATEGORY_SCISSORS, roll: 3},
+            ];
+
+            let all_moves = gather_all_moves(&board, true, &dice_rolls, false);
+            let distinct_moves = gather_all_moves(&board, true, &dice_rolls, true);
+
+            let all_boards: HashSet<Board> = all_moves.iter().map(|m| m.board.clone()).collect();
+            let distinct_boards: HashSet<Board> = distinct_moves.iter().map(|m| m.board.clone()).collect();
+            assert_eq!(all_boards, distinct_boards);
+            assert_eq!(distinct_boards.len(), distinct_moves.len());
+            assert!(distinct_moves.len() < all_moves.len());
+        }
+    }
+
+    #[test]
+    fn test_for_each_move_visits_gathered_moves_in_order() {
+        let mut rng = StdRng::seed_from_u64(42);
+        let board = Board::new(&mut rng);
+        let dice_rolls = [
+            DiceRoll{category: cards::BITS_CATEGORY_ROCK, roll: 1},
+            DiceRoll{category: cards::BITS_CATEGORY_PAPER, roll: 2},
+            DiceRoll{category: cards::BITS_CATEGORY_SCISSORS, roll: 3},
+        ];
+        let all_moves = gather_all_moves(&board, true, &dice_rolls, false);
+
+        let mut visit_count = 0;
+        for_each_move(&board, true, &dice_rolls, false, |completed_moves| {
+            let expected = &all_moves[visit_count];
+            assert_eq!(expected.board, completed_moves.board);
+            assert_eq!(expected.moves, completed_moves.moves);
+            visit_count += 1;
+
+            // The visitor may generate moves itself, e.g. to look ahead, without disturbing the outer generation
+            if visit_count == 1 {
+                assert_eq!(all_moves.len(), gather_all_moves(&board, true, &dice_rolls, false).len());
+            }
+            ControlFlow::Continue(())
+        });
+        assert_eq!(all_moves.len(), visit_count);
+
+        let mut visit_count = 0;
+        for_each_move(&board, true, &dice_rolls, false, |_| {
+            visit_count += 1;
+            if visit_count == 5 { ControlFlow::Break(()) } else { ControlFlow::Continue(()) }
+        });
+        assert_eq!(5, visit_count);
+    }
 }
@@ -0,0 +1,274 @@
+use std::cell::RefCell;
+use std::thread::ThreadId;
+use std::time::Instant;
+
+// Counters, and the seconds spent in each phase of a simulation, as in ninja_taisen/utils/phase_stats.py. Each thread
+// collects its own, and only while inside collect, so that otherwise the hot paths only pay for checking a thread local
+#[derive(Clone, Copy)]
+pub enum Phase {
+    MoveGeneration,
+    BattleResolution,
+    StrategyScoring,
+    DtoConversion,
+    ResultWriting,
+}
+
+pub const PHASE_COUNT: usize = 5;
+
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub struct PhaseStats {
+    pub games: u64,
+    pub turns: u64,
+    // The candidate moves generated (and so scored) for each turn. A strategy which stops at a winning move generates
+    // no more candidates that turn
+    pub candidates: u64,
+    // The cards moved by a dice roll while generating candidates, and the card battles which followed
+    pub card_moves: u64,
+    pub battles: u64,
+    // Indexed by Phase. Battles are resolved while generating moves, so the time spent generating moves is recorded
+    // including them, but reported without them
+    pub seconds: [f64; PHASE_COUNT]
+}
+
+impl PhaseStats {
+    pub fn merge(&mut self, other: &PhaseStats) {
+        self.games += other.games;
+        self.turns += other.turns;
+        self.candidates += other.candidates;
+        self.card_moves += other.card_moves;
+        self.battles += other.battles;
+        for (seconds, other_seconds) in self.seconds.iter_mut().zip(other.seconds) {
+            *seconds += other_seconds;
+        }
+    }
+
+    pub fn turns_per_game(&self) -> f64 {
+        ratio(self.turns, self.games)
+    }
+
+    pub fn candidates_per_turn(&self) -> f64 {
+        ratio(self.candidates, self.turns)
+    }
+
+    pub fn battles_per_move(&self) -> f64 {
+        ratio(self.battles, self.card_moves)
+    }
+
+    // The seconds spent in each phase as reported, with move generation excluding battle resolution
+    pub fn reported_seconds(&self) -> [f64; PHASE_COUNT] {
+        let mut seconds = self.seconds;
+        seconds[Phase::MoveGeneration as usize] -= seconds[Phase::BattleResolution as usize];
+        seconds
+    }
+}
+
+fn ratio(numerator: u64, denominator: u64) -> f64 {
+    if denominator == 0 { 0.0 } else { numerator as f64 / denominator as f64 }
+}
+
+thread_local! {
+    static PHASE_STATS: RefCell<Option<PhaseStats>> = const { RefCell::new(None) };
+}
+
+// Collect stats on this thread while running f, if enabled. Any stats already being collected on this thread are set
+// aside until f is complete
+pub fn collect<T>(enabled: bool, f: impl FnOnce() -> T) -> (T, Option<PhaseStats>) {
+    if !enabled {
+        return (f(), None);
+    }
+    let previous = PHASE_STATS.replace(Some(PhaseStats::default()));
+    let result = f();
+    (result, PHASE_STATS.replace(previous))
+}
+
+// The time now, if collecting stats on this thread
+#[inline]
+pub fn start_timer() -> Option<Instant> {
+    PHASE_STATS.with_borrow(|stats| stats.is_some()).then(Instant::now)
+}
+
+#[inline]
+fn record(f: impl FnOnce(&mut PhaseStats)) {
+    PHASE_STATS.with_borrow_mut(|stats| {
+        if let Some(stats) = stats {
+            f(stats)
+        }
+    });
+}
+
+// Add the time taken by f to the phase, if collecting stats
+pub fn timed<T>(phase: Phase, f: impl FnOnce() -> T) -> T {
+    let timer = start_timer();
+    let result = f();
+    if let Some(start) = timer {
+        record(|stats| stats.seconds[phase as usize] += start.elapsed().as_secs_f64());
+    }
+    result
+}
+
+pub fn record_game() {
+    record(|stats| stats.games += 1);
+}
+
+// Play a turn with choose, which generates the candidates and hands each to score_candidate as it goes. Whatever time
+// is not spent scoring the candidates is spent generating them
+pub fn time_turn<T>(choose: impl FnOnce() -> T) -> T {
+    let Some(start) = start_timer() else {
+        return choose();
+    };
+    let mut scoring_s = 0.0;
+    record(|stats| scoring_s = stats.seconds[Phase::StrategyScoring as usize]);
+    let result = choose();
+    record(|stats| {
+        scoring_s = stats.seconds[Phase::StrategyScoring as usize] - scoring_s;
+        stats.seconds[Phase::MoveGeneration as usize] += start.elapsed().as_secs_f64() - scoring_s;
+        stats.turns += 1;
+    });
+    result
+}
+
+// Scoring a candidate takes about as long as reading the clock twice, so only one in this many is timed, and its time
+// scaled up accordingly
+const SCORING_SAMPLE_INTERVAL: u64 = 16;
+
+// Hand a candidate to score, counting it and (for a sample of candidates) timing how long it takes to score
+#[inline]
+pub fn score_candidate<T>(score: impl FnOnce() -> T) -> T {
+    let mut sampled = false;
+    record(|stats| {
+        stats.candidates += 1;
+        sampled = stats.candidates % SCORING_SAMPLE_INTERVAL == 0;
+    });
+    if !sampled {
+        return score();
+    }
+    let start = Instant::now();
+    let result = score();
+    let scoring_s = start.elapsed().as_secs_f64() * SCORING_SAMPLE_INTERVAL as f64;
+    record(|stats| stats.seconds[Phase::StrategyScoring as usize] += scoring_s);
+    result
+}
+
+// Record a card move, and the battles which followed it. If timer is given, the battles have taken the time since it
+// was started
+#[inline]
+pub fn record_card_move(battles: u64, timer: Option<Instant>) {
+    record(|stats| {
+        stats.card_moves += 1;
+        stats.battles += battles;
+        if let Some(start) = timer {
+            stats.seconds[Phase::BattleResolution as usize] += start.elapsed().as_secs_f64();
+        }
+    });
+}
+
+// The stats collected by each thread taking part in a simulation, in the order the threads were first seen. A thread
+// may collect stats for several chunks of games, which are merged
+#[derive(Default)]
+pub struct WorkerStats {
+    workers: Vec<(ThreadId, PhaseStats)>
+}
+
+impl WorkerStats {
+    pub fn add(&mut self, worker: ThreadId, stats: &PhaseStats) {
+        match self.workers.iter_mut().find(|(id, _)| *id == worker) {
+            Some((_, worker_stats)) => worker_stats.merge(stats),
+            None => self.workers.push((worker, *stats)),
+        }
+    }
+
+    // Name each worker: main_thread for main, and thread_1, thread_2 and so on for the others
+    pub fn into_named(self, main: ThreadId) -> Vec<(String, PhaseStats)> {
+        let mut thread_count = 0;
+        self.workers.into_iter().map(|(id, stats)| {
+            if id == main {
+                return (String::from("main_thread"), stats);
+            }
+            thread_count += 1;
+            (format!("thread_{}", thread_count), stats)
+        }).collect()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::ops::ControlFlow;
+    use std::thread;
+    use rand::SeedableRng;
+    use rand::rngs::StdRng;
+    use crate::board::Board;
+    use crate::dice::roll_dice_three_times;
+    use crate::move_gatherer::{for_each_move, gather_all_moves};
+    use crate::phase_stats::*;
+    use crate::strategy::Strategy;
+
+    #[test]
+    fn test_nothing_is_collected_unless_enabled() {
+        let (_, stats) = collect(false, || {
+            assert!(start_timer().is_none());
+            record_game();
+        });
+        assert_eq!(None, stats);
+
+        let (_, stats) = collect(true, || record_game());
+        assert_eq!(1, stats.unwrap().games);
+        assert!(start_timer().is_none());
+    }
+
+    #[test]
+    fn test_turn_counts() {
+        let mut rng = StdRng::seed_from_u64(3);
+        let board = Board::new(&mut rng);
+        let dice_rolls = roll_dice_three_times(&mut rng);
+        let gathered_count = gather_all_moves(&board, true, &dice_rolls, false).len() as u64;
+
+        let (visited_count, stats) = collect(true, || time_turn(|| {
+            let mut visited_count = 0;
+            for_each_move(&board, true, &dice_rolls, false, |_| {
+                visited_count += 1;
+                ControlFlow::Continue(())
+            });
+            visited_count
+        }));
+        let stats = stats.unwrap();
+        assert_eq!(1, stats.turns);
+        assert_eq!(gathered_count, visited_count);
+        assert_eq!(gathered_count, stats.candidates);
+        // Each candidate moves between one and three cards, depending on how many dice it uses
+        assert!(stats.card_moves >= stats.candidates && stats.card_moves <= 3 * stats.candidates);
+        assert!(stats.reported_seconds().iter().all(|&seconds| seconds >= 0.0));
+    }
+
+    #[test]
+    fn test_collecting_does_not_change_choices() {
+        let strategy = Strategy::new(&String::from("metric_strength")).unwrap();
+        let choose = || {
+            let mut rng = StdRng::seed_from_u64(7);
+            let board = Board::new(&mut rng);
+            let dice_rolls = roll_dice_three_times(&mut rng);
+            strategy.choose_move_streaming(&board, false, &dice_rolls, false, &mut rng).map(|moves| moves.board)
+        };
+        let (chosen, stats) = collect(true, || time_turn(choose));
+        assert_eq!(choose(), chosen);
+        assert!(stats.unwrap().candidates > 0);
+    }
+
+    #[test]
+    fn test_worker_stats_are_merged_by_thread() {
+        let main = thread::current().id();
+        let other = thread::spawn(|| thread::current().id()).join().unwrap();
+        let stats = PhaseStats{games: 1, turns: 20, candidates: 400, card_moves: 900, battles: 90, ..Default::default()};
+
+        let mut worker_stats = WorkerStats::default();
+        worker_stats.add(other, &stats);
+        worker_stats.add(main, &stats);
+        worker_stats.add(other, &stats);
+
+        let named = worker_stats.into_named(main);
+        assert_eq!(vec!["thread_1", "main_thread"], named.iter().map(|(name, _)| name.as_str()).collect::<Vec<_>>());
+        assert_eq!(2, named[0].1.games);
+        assert_eq!(20.0, named[0].1.turns_per_game());
+        assert_eq!(20.0, named[0].1.candidates_per_turn());
+        assert_eq!(0.1, named[0].1.battles_per_move());
+    }
+}
@@ -1,8 +1,11 @@
 use std::collections::HashMap;
+use std::ops::ControlFlow;
 use rand::prelude::StdRng;
 use rand::Rng;
-use crate::board::CompletedMoves;
+use crate::board::{Board, CompletedMoves};
 use crate::card::cards;
+use crate::dice::DiceRoll;
+use crate::move_gatherer::for_each_move;
 use crate::metric::{CountMetric,PositionMetric,StrengthMetric,Metric};
 use ordered_float::OrderedFloat;
 
@@ -20,32 +23,22 @@ pub struct Strategy {
 }
 
 impl Strategy {
-    pub fn new(strategy_name: &String) -> Self {
+    pub fn new(strategy_name: &String) -> Result<Self, String> {
         match strategy_name.as_str() {
-            "random" => { Strategy{name: StrategyName::Random} },
-            "random_spot_win" => { Strategy{name: StrategyName::RandomSpotWin} },
-            "metric_count" => { Strategy{name: StrategyName::MetricCount} },
-            "metric_position" => { Strategy{name: StrategyName::MetricPosition} },
-            "metric_strength" => { Strategy{name: StrategyName::MetricStrength} },
-            _ => panic!("{}", format!("Could not match strategy_name '{}'", strategy_name)),
+            "random" => Ok(Strategy{name: StrategyName::Random}),
+            "random_spot_win" => Ok(Strategy{name: StrategyName::RandomSpotWin}),
+            "metric_count" => Ok(Strategy{name: StrategyName::MetricCount}),
+            "metric_position" => Ok(Strategy{name: StrategyName::MetricPosition}),
+            "default" | "metric_strength" => Ok(Strategy{name: StrategyName::MetricStrength}),
+            _ => Err(format!("Could not match strategy_name '{}'", strategy_name)),
         }
     }
 
     pub fn choose_move<'a>(&self, all_permitted_moves: &'a Vec<CompletedMoves>, rng: &mut StdRng) -> &'a CompletedMoves {
         if self.name != StrategyName::Random {
             for moves in all_permitted_moves {
-                let victorious_team = moves.board.victorious_team();
-                if victorious_team == cards::NULL {
-                    continue
-                }
-                if moves.is_monkey {
-                    if (victorious_team & cards::CHECK_TEAM) == cards::BIT_TEAM_MONKEY {
-                        return moves;
-                    }
-                } else {
-                    if (victorious_team & cards::CHECK_TEAM) == cards::BIT_TEAM_WOLF {
-                        return moves;
-                    }
+                if Self::is_winning_move(moves) {
+                    return moves;
                 }
             }
         }
@@ -68,11 +61,74 @@ impl Strategy {
         }
     }
 
+    // As choose_move, but scoring each candidate as it is generated rather than gathering them all first. Only the
+    // running choice is kept: ties for the best metric (and for the random strategies, every candidate) are
+    // reservoir sampled, and generation stops as soon as a winning move is found. Each candidate is still chosen
+    // with the same probability as by choose_move, though not by the same draws from rng
+    pub fn choose_move_streaming(
+        &self,
+        board: &Board,
+        is_monkey: bool,
+        dice_rolls: &[DiceRoll; 3],
+        deduplicate: bool,
+        rng: &mut StdRng
+    ) -> Option<CompletedMoves> {
+        let mut chosen_moves = None;
+        let mut best_metric = f32::NEG_INFINITY;
+        let mut tie_count: u32 = 0;
+
+        for_each_move(board, is_monkey, dice_rolls, deduplicate, |completed_moves| {
+            if self.name != StrategyName::Random && Self::is_winning_move(completed_moves) {
+                chosen_moves = Some(completed_moves.clone());
+                return ControlFlow::Break(());
+            }
+
+            let metric_value = self.metric_value(completed_moves);
+            if metric_value > best_metric {
+                best_metric = metric_value;
+                tie_count = 0;
+            }
+            else if metric_value < best_metric {
+                return ControlFlow::Continue(());
+            }
+
+            tie_count += 1;
+            if tie_count == 1 || rng.gen_range(0..tie_count) == 0 {
+                chosen_moves = Some(completed_moves.clone());
+            }
+            ControlFlow::Continue(())
+        });
+        chosen_moves
+    }
+
+    fn is_winning_move(completed_moves: &CompletedMoves) -> bool {
+        let victorious_team = completed_moves.board.victorious_team();
+        if victorious_team == cards::NULL {
+            return false;
+        }
+        let winning_team = if completed_moves.is_monkey { cards::BIT_TEAM_MONKEY } else { cards::BIT_TEAM_WOLF };
+        (victorious_team & cards::CHECK_TEAM) == winning_team
+    }
+
+    // The strategy's metric of the candidate. The random strategies score every candidate equally
+    fn metric_value(&self, completed_moves: &CompletedMoves) -> f32 {
+        match self.name {
+            StrategyName::Random | StrategyName::RandomSpotWin => { 0.0 }
+            StrategyName::MetricCount => { CountMetric{}.calculate(completed_moves) }
+            StrategyName::MetricPosition => { PositionMetric{}.calculate(completed_moves) }
+            StrategyName::MetricStrength => { StrengthMetric{}.calculate(completed_moves) }
+        }
+    }
+
     fn random_move<'a>(all_permitted_moves: &'a [CompletedMoves], rng: &mut StdRng) -> &'a CompletedMoves {
         &all_permitted_moves[rng.gen_range(0..all_permitted_moves.len())]
     }
 
-    fn random_best_metric<'a>(all_permitted_moves: &'a Vec<CompletedMoves>, metric: &impl Metric, rng: &mut StdRng) -> &'a CompletedMoves {
+    fn random_best_metric<'a>(
+        all_permitted_moves: &'a Vec<CompletedMoves>,
+        metric: &impl Metric,
+        rng: &mut StdRng
+    ) -> &'a CompletedMoves {
         let mut metric_to_moves: HashMap<OrderedFloat<f32>, Vec<&CompletedMoves>> = HashMap::new();
         for completed_moves in all_permitted_moves {
             let metric_value = OrderedFloat(metric.calculate(completed_moves));
@@ -92,3 +148,47 @@ impl Strategy {
         moves_with_max_metric[rng.gen_range(0..moves_with_max_metric.len())]
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use rand::prelude::StdRng;
+    use rand::SeedableRng;
+    use crate::board::Board;
+    use crate::dice::roll_dice_three_times;
+    use crate::move_gatherer::gather_all_moves;
+    use crate::strategy::Strategy;
+    use crate::card::cards;
+
+    #[test]
+    fn test_streaming_chooses_permitted_move() {
+        for strategy_name in ["random", "random_spot_win", "metric_count", "metric_position", "metric_strength"] {
+            let strategy = Strategy::new(&strategy_name.to_string()).unwrap();
+            let mut rng = StdRng::seed_from_u64(7);
+            let mut board = Board::new(&mut rng);
+            let mut is_monkey = true;
+
+            while board.victorious_team() == cards::NULL {
+                let dice_rolls = roll_dice_three_times(&mut rng);
+                let all_permitted_moves = gather_all_moves(&board, is_monkey, &dice_rolls, false);
+                let chosen_moves = strategy.choose_move_streaming(&board, is_monkey, &dice_rolls, false, &mut rng);
+                if all_permitted_moves.is_empty() {
+                    assert!(chosen_moves.is_none());
+                    is_monkey = !is_monkey;
+                    continue;
+                }
+
+                // Metric and spot-win strategies must agree with choose_move on everything but the tie-break
+                let chosen_moves = chosen_moves.unwrap();
+                let expected_moves = strategy.choose_move(&all_permitted_moves, &mut rng);
+                assert!(all_permitted_moves.iter().any(|m| m.moves == chosen_moves.moves));
+                if strategy_name != "random" {
+                    assert_eq!(strategy.metric_value(expected_moves), strategy.metric_value(&chosen_moves));
+                    assert_eq!(Strategy::is_winning_move(expected_moves), Strategy::is_winning_move(&chosen_moves));
+                }
+
+                board = chosen_moves.board;
+                is_monkey = !is_monkey;
+            }
+        }
+    }
+}
@@ -0,0 +1,187 @@
+use crate::board::{Board, Move, PILE_COUNT, TEAM_CARDS};
+use crate::card::cards;
+use crate::dice::DiceRoll;
+
+// The compact binary wire format of ninja_taisen/objects/wire_format.py. A request holds the board as a Board holds it
+// (each team's cards in pile order, padded with NULL to TEAM_CARDS, then the heights of each team's piles), then a
+// footer of the dice rolls, team, flags, seed and strategy name length, then the strategy name. A response holds the
+// number of moves, then the dice category and card code of each move
+const HEIGHTS_OFFSET: usize = 2 * TEAM_CARDS;
+const BOARD_BYTES: usize = HEIGHTS_OFFSET + 2 * PILE_COUNT as usize;
+const FOOTER_BYTES: usize = 14;
+const REQUEST_HEADER_BYTES: usize = BOARD_BYTES + FOOTER_BYTES;
+
+const FLAG_SEED: u8 = 0b01;
+const FLAG_DEDUPLICATE: u8 = 0b10;
+
+pub struct BinaryChooseRequest {
+    pub board: Board,
+    pub is_monkey: bool,
+    pub dice_rolls: [DiceRoll; 3],
+    pub strategy: String,
+    pub seed: Option<u64>,
+    pub deduplicate: bool
+}
+
+pub fn decode_choose_request(bytes: &[u8]) -> Result<BinaryChooseRequest, String> {
+    if bytes.len() < REQUEST_HEADER_BYTES {
+        return Err(format!(
+            "Expected a binary ChooseRequest of at least {} bytes, got {}", REQUEST_HEADER_BYTES, bytes.len()
+        ));
+    }
+    let footer = &bytes[BOARD_BYTES..REQUEST_HEADER_BYTES];
+    let strategy_length = footer[13] as usize;
+    if bytes.len() != REQUEST_HEADER_BYTES + strategy_length {
+        return Err(format!(
+            "Expected a strategy name of {} bytes, got {}", strategy_length, bytes.len() - REQUEST_HEADER_BYTES
+        ));
+    }
+
+    let is_monkey = match footer[3] {
+        0 => true,
+        1 => false,
+        team => return Err(format!("Unexpected team {}", team))
+    };
+    let flags = footer[4];
+    let seed = u64::from_le_bytes(footer[5..13].try_into().unwrap());
+    let strategy = std::str::from_utf8(&bytes[REQUEST_HEADER_BYTES..])
+        .map_err(|e| format!("Invalid strategy name: {}", e))?;
+
+    Ok(BinaryChooseRequest {
+        board: decode_board(&bytes[..BOARD_BYTES])?,
+        is_monkey,
+        dice_rolls: [
+            DiceRoll{category: cards::BITS_CATEGORY_ROCK, roll: footer[0] as i8},
+            DiceRoll{category: cards::BITS_CATEGORY_PAPER, roll: footer[1] as i8},
+            DiceRoll{category: cards::BITS_CATEGORY_SCISSORS, roll: footer[2] as i8},
+        ],
+        strategy: String::from(strategy),
+        seed: if flags & FLAG_SEED != 0 { Some(seed) } else { None },
+        deduplicate: flags & FLAG_DEDUPLICATE != 0
+    })
+}
+
+fn decode_board(bytes: &[u8]) -> Result<Board, String> {
+    let mut board = Board::empty();
+    for (team_index, is_monkey) in [true, false].into_iter().enumerate() {
+        let team_bit = if is_monkey { cards::BIT_TEAM_MONKEY } else { cards::BIT_TEAM_WOLF };
+        let team_cards = &bytes[team_index * TEAM_CARDS..][..TEAM_CARDS];
+        let heights = &bytes[HEIGHTS_OFFSET + team_index * PILE_COUNT as usize..][..PILE_COUNT as usize];
+        let count: usize = heights.iter().map(|&h| h as usize).sum();
+        if count > TEAM_CARDS {
+            return Err(format!("Expected at most {} cards per team, got {}", TEAM_CARDS, count));
+        }
+
+        let is_team_card = |&card: &u8| {
+            card & cards::BIT_NON_NULL != 0
+                && card & cards::CHECK_TEAM == team_bit
+                && card & cards::CHECK_STRENGTH <= cards::BITS_STRENGTH_4
+        };
+        if !team_cards[..count].iter().all(is_team_card) || team_cards[count..].iter().any(|&card| card != cards::NULL) {
+            return Err(format!("Unexpected card codes {:?}", team_cards));
+        }
+
+        let mut team_cards = team_cards.iter();
+        for pile_index in 0..PILE_COUNT {
+            for &card in team_cards.by_ref().take(heights[pile_index as usize] as usize) {
+                board.push_card(is_monkey, pile_index, card);
+            }
+        }
+    }
+    Ok(board)
+}
+
+pub fn encode_choose_response(moves: &[Move]) -> Vec<u8> {
+    let mut bytes = Vec::with_capacity(1 + 2 * moves.len());
+    bytes.push(moves.len() as u8);
+    for a_move in moves {
+        bytes.push((a_move.dice_category & cards::CHECK_CATEGORY) >> 4);
+        bytes.push(a_move.card);
+    }
+    bytes
+}
+
+#[cfg(test)]
+mod tests {
+    use crate::board::{Board, Move, PILE_COUNT};
+    use crate::card::cards;
+    use crate::wire::*;
+    use rand::SeedableRng;
+    use rand::rngs::StdRng;
+
+    fn encode_board(board: &Board) -> Vec<u8> {
+        let mut bytes = vec![cards::NULL; BOARD_BYTES];
+        for (team_index, is_monkey) in [true, false].into_iter().enumerate() {
+            let mut position = team_index * TEAM_CARDS;
+            for pile_index in 0..PILE_COUNT {
+                let height = board.get_height(is_monkey, pile_index);
+                bytes[HEIGHTS_OFFSET + team_index * PILE_COUNT as usize + pile_index as usize] = height;
+                for card_index in 0..height {
+                    bytes[position] = board.get_card(is_monkey, pile_index, card_index);
+                    position += 1;
+                }
+            }
+        }
+        bytes
+    }
+
+    fn encode_request(board: &Board, footer: [u8; FOOTER_BYTES], strategy: &str) -> Vec<u8> {
+        let mut bytes = encode_board(board);
+        bytes.extend_from_slice(&footer);
+        bytes.extend_from_slice(strategy.as_bytes());
+        bytes
+    }
+
+    #[test]
+    fn test_decode_choose_request() {
+        let mut rng = StdRng::seed_from_u64(0);
+        let board = Board::new(&mut rng);
+        let strategy = "metric_strength";
+        let mut footer = [3, 1, 2, 1, FLAG_SEED | FLAG_DEDUPLICATE, 0, 0, 0, 0, 0, 0, 0, 0, strategy.len() as u8];
+        footer[5..13].copy_from_slice(&42u64.to_le_bytes());
+
+        let request = decode_choose_request(&encode_request(&board, footer, strategy)).unwrap();
+        assert_eq!(board, request.board);
+        assert!(!request.is_monkey);
+        assert_eq!([3, 1, 2], request.dice_rolls.map(|d| d.roll));
+        assert_eq!(strategy, request.strategy);
+        assert_eq!(Some(42), request.seed);
+        assert!(request.deduplicate);
+
+        footer[4] = 0;
+        let request = decode_choose_request(&encode_request(&board, footer, strategy)).unwrap();
+        assert_eq!(None, request.seed);
+        assert!(!request.deduplicate);
+    }
+
+    #[test]
+    fn test_decode_rejects_invalid_board() {
+        let mut board = Board::empty();
+        board.push_card(true, 0, cards::MR1);
+        let footer = [1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0];
+        assert!(decode_choose_request(&encode_request(&board, footer, "")).is_ok());
+
+        // A wolf card in a monkey pile
+        let mut bytes = encode_request(&board, footer, "");
+        bytes[0] = cards::WR1;
+        assert!(decode_choose_request(&bytes).is_err());
+
+        // A card beyond the team's pile heights
+        let mut bytes = encode_request(&board, footer, "");
+        bytes[1] = cards::MR2;
+        assert!(decode_choose_request(&bytes).is_err());
+
+        // A truncated strategy name
+        let bytes = encode_request(&board, [1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 5], "abc");
+        assert!(decode_choose_request(&bytes).is_err());
+    }
+
+    #[test]
+    fn test_encode_choose_response() {
+        let moves = [
+            Move{dice_category: cards::BITS_CATEGORY_PAPER, card: cards::MP1},
+            Move{dice_category: cards::BITS_CATEGORY_SCISSORS, card: cards::MJ4},
+        ];
+        assert_eq!(vec![2, 1, cards::MP1, 2, cards::MJ4], encode_choose_response(&moves));
+    }
+}
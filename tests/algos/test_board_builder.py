@@ -1,4 +1,3 @@
-from collections import defaultdict
 from itertools import chain
 
 from more_itertools import unique_everseen
@@ -43,31 +42,34 @@ def test_make_board_shuffled() -> None:
     non_shuffled_board = make_non_shuffled_board()
     assert non_shuffled_board != shuffled_board
 
-    monkey_lengths = [len(non_shuffled_board.monkey_cards[i]) for i in range(BOARD_LENGTH)]
-    wolf_lengths = [len(non_shuffled_board.wolf_cards[i]) for i in range(BOARD_LENGTH)]
+    monkey_lengths = [non_shuffled_board.height(Team.monkey, i) for i in range(BOARD_LENGTH)]
+    wolf_lengths = [non_shuffled_board.height(Team.wolf, i) for i in range(BOARD_LENGTH)]
 
     assert monkey_lengths == [4, 3, 2, 1, 0, 0, 0, 0, 0, 0, 0]
     assert wolf_lengths == [0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4]
 
-    unique_monkey_cards = sorted(unique_everseen(chain.from_iterable(shuffled_board.monkey_cards.values())))
-    unique_wolf_cards = sorted(unique_everseen(chain.from_iterable(shuffled_board.wolf_cards.values())))
+    unique_monkey_cards = sorted(unique_everseen(chain.from_iterable(shuffled_board.piles(Team.monkey).values())))
+    unique_wolf_cards = sorted(unique_everseen(chain.from_iterable(shuffled_board.piles(Team.wolf).values())))
 
     assert unique_monkey_cards == make_ordered_cards(team=Team.monkey)
     assert unique_wolf_cards == make_ordered_cards(team=Team.wolf)
 
 
 def make_non_shuffled_board() -> Board:
-    board = Board(monkey_cards=defaultdict(list), wolf_cards=defaultdict(list))
-    board.monkey_cards[0] = [MJ4, MR1, MR2, MR3]
-    board.monkey_cards[1] = [MP1, MP2, MP3]
-    board.monkey_cards[2] = [MS1, MS2]
-    board.monkey_cards[3] = [MS3]
-
-    board.wolf_cards[7] = [WS3]
-    board.wolf_cards[8] = [WS1, WS2]
-    board.wolf_cards[9] = [WP1, WP2, WP3]
-    board.wolf_cards[10] = [WJ4, WR1, WR2, WR3]
-    return board
+    return Board.from_piles(
+        monkey_cards={
+            0: [MJ4, MR1, MR2, MR3],
+            1: [MP1, MP2, MP3],
+            2: [MS1, MS2],
+            3: [MS3],
+        },
+        wolf_cards={
+            7: [WS3],
+            8: [WS1, WS2],
+            9: [WP1, WP2, WP3],
+            10: [WJ4, WR1, WR2, WR3],
+        },
+    )
 
 
 def make_ordered_cards(team: Team) -> list[Card]:
@@ -0,0 +1,106 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from ninja_taisen.algos import board_inspector
+from ninja_taisen.algos.candidate_batch import NO_VICTOR, CandidateBatch
+from ninja_taisen.algos.move_gatherer import gather_all_permitted_moves, iter_permitted_moves
+from ninja_taisen.dtos import ChooseRequest
+from ninja_taisen.objects.safe_random import SafeRandom
+from ninja_taisen.objects.types import TEAM_BY_DTO, Board, Category, CompletedMoves, Team
+from ninja_taisen.strategy.metric import CountMetric, IMetric, PositionMetric, StrengthMetric
+from ninja_taisen.strategy.strategy import IStrategy
+from ninja_taisen.strategy.strategy_impl import MetricStrategy, RandomSpotWinStrategy, RandomStrategy
+
+TURN_BY_TURN_DIR = Path(__file__).resolve().parent.parent / "regression" / "turn_by_turn"
+
+
+def __request_jsons() -> list[Path]:
+    return sorted(TURN_BY_TURN_DIR.glob("*/request_*.json"))
+
+
+def __all_permitted_moves(request_json: Path) -> list[CompletedMoves]:
+    return gather_all_permitted_moves(*__gatherer_args(request_json))
+
+
+def __gatherer_args(request_json: Path) -> tuple[Board, Team, dict[Category, int]]:
+    request = ChooseRequest.model_validate_json(request_json.read_text())
+    dice_rolls = {
+        Category.rock: request.dice.rock,
+        Category.paper: request.dice.paper,
+        Category.scissors: request.dice.scissors,
+    }
+    return Board.from_dto(request.board), TEAM_BY_DTO[request.team], dice_rolls
+
+
+@pytest.mark.parametrize("request_json", __request_jsons(), ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_batch_matches_each_board(request_json: Path) -> None:
+    all_permitted_moves = __all_permitted_moves(request_json)
+    batch = CandidateBatch.from_moves(all_permitted_moves)
+
+    expected_winners = [board_inspector.victorious_team(m.board) for m in all_permitted_moves]
+    actual_winners = [None if w == NO_VICTOR else w for w in batch.victorious_teams().tolist()]
+    assert expected_winners == actual_winners
+
+    metrics: list[IMetric] = [CountMetric(), PositionMetric(), StrengthMetric()]
+    for metric in metrics:
+        team = all_permitted_moves[0].team
+        expected_metrics = [metric.calculate(m.board, team) for m in all_permitted_moves]
+        assert expected_metrics == metric.calculate_batch(batch, team).tolist()
+
+
+@pytest.mark.parametrize("request_json", __request_jsons(), ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_batch_scoring_chooses_same_move(request_json: Path) -> None:
+    all_permitted_moves = __all_permitted_moves(request_json)
+    one_at_a_time = MetricStrategy(
+        StrengthMetric(), SafeRandom(0), batch_scoring_threshold=len(all_permitted_moves) + 1
+    )
+    batched = MetricStrategy(StrengthMetric(), SafeRandom(0), batch_scoring_threshold=1)
+
+    assert one_at_a_time.choose_moves(all_permitted_moves) is batched.choose_moves(all_permitted_moves)
+
+
+@pytest.mark.parametrize("request_json", __request_jsons(), ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_streaming_chooses_same_move(request_json: Path) -> None:
+    all_permitted_moves = __all_permitted_moves(request_json)
+    streamed_moves = list(iter_permitted_moves(*__gatherer_args(request_json)))
+    assert [m.moves for m in all_permitted_moves] == [m.moves for m in streamed_moves]
+
+    def strategies() -> list[IStrategy]:
+        return [
+            RandomStrategy(SafeRandom(0)),
+            RandomSpotWinStrategy(SafeRandom(0)),
+            MetricStrategy(StrengthMetric(), SafeRandom(0)),
+            MetricStrategy(CountMetric(), SafeRandom(0), batch_scoring_threshold=4),
+        ]
+
+    for listed, streamed in zip(strategies(), strategies(), strict=True):
+        expected = listed.choose_moves(all_permitted_moves)
+        actual = streamed.choose_moves_streaming(iter_permitted_moves(*__gatherer_args(request_json)))
+        assert actual is not None
+        assert expected.moves == actual.moves
+
+
+@pytest.mark.parametrize("request_json", __request_jsons(), ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_streaming_stops_at_winning_move(request_json: Path) -> None:
+    all_permitted_moves = __all_permitted_moves(request_json)
+    winning_indices = [
+        i for i, m in enumerate(all_permitted_moves) if board_inspector.victorious_team(m.board) == m.team
+    ]
+
+    consumed = 0
+
+    def counted_moves() -> Iterator[CompletedMoves]:
+        nonlocal consumed
+        for completed_moves in iter_permitted_moves(*__gatherer_args(request_json)):
+            consumed += 1
+            yield completed_moves
+
+    chosen = RandomSpotWinStrategy(SafeRandom(0)).choose_moves_streaming(counted_moves())
+    if winning_indices:
+        assert chosen is not None
+        assert chosen.moves == all_permitted_moves[winning_indices[0]].moves
+        assert consumed == winning_indices[0] + 1
+    else:
+        assert consumed == len(all_permitted_moves)
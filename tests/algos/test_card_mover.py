@@ -1,5 +1,3 @@
-from collections import defaultdict
-
 from ninja_taisen.algos.card_mover import CardMover
 from ninja_taisen.objects.cards import MJ4, MP2, MR2, MS1, MS2, MS3, WJ4, WP1, WP3, WR3, WS1
 from ninja_taisen.objects.types import Board, Team
@@ -127,16 +125,19 @@ from ninja_taisen.objects.types import Board, Team
 #                                 WJ4
 #
 def test_complex_battle() -> None:
-    board = Board(
-        monkey_cards=defaultdict(list, {1: [MS2], 4: [MP2, MJ4], 5: [MR2, MS1, MS3]}),
-        wolf_cards=defaultdict(list, {6: [WS1, WP1], 7: [WJ4], 8: [WR3], 9: [WP3]}),
+    board = Board.from_piles(
+        monkey_cards={1: [MS2], 4: [MP2, MJ4], 5: [MR2, MS1, MS3]},
+        wolf_cards={6: [WS1, WP1], 7: [WJ4], 8: [WR3], 9: [WP3]},
     )
     card_mover = CardMover(board=board)
     card_mover.move_card_and_resolve_battles(team=Team.monkey, dice_roll=2, pile_index=5, card_index=0)
 
-    final_board = Board(
-        monkey_cards=defaultdict(list, {1: [MS2], 4: [MP2, MJ4], 5: [MS1], 7: [MR2]}),
-        wolf_cards=defaultdict(list, {8: [WR3, WJ4], 9: [WP3]}),
+    final_board = Board.from_piles(
+        monkey_cards={1: [MS2], 4: [MP2, MJ4], 5: [MS1], 7: [MR2]},
+        wolf_cards={8: [WR3, WJ4], 9: [WP3]},
     )
 
     assert board == final_board
+    # The hash is updated incrementally by each move, so it must agree with the hash of the board built from scratch
+    assert board.zobrist_hash == final_board.zobrist_hash
+    assert board.totals == final_board.totals
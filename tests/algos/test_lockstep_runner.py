@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ninja_taisen.algos.lockstep_runner import gather_all_candidates
+from ninja_taisen.algos.move_gatherer import gather_all_permitted_moves
+from ninja_taisen.dtos import ChooseRequest
+from ninja_taisen.objects.types import TEAM_BY_DTO, Board, Category
+
+TURN_BY_TURN_DIR = Path(__file__).resolve().parent.parent / "regression" / "turn_by_turn"
+
+
+def __request_jsons() -> list[Path]:
+    return sorted(TURN_BY_TURN_DIR.glob("*/request_*.json"))
+
+
+@pytest.mark.parametrize("request_json", __request_jsons(), ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_candidates_match_move_gatherer(request_json: Path) -> None:
+    request = ChooseRequest.model_validate_json(request_json.read_text())
+    board = Board.from_dto(request.board)
+    team = TEAM_BY_DTO[request.team]
+    dice_rolls = {
+        Category.rock: request.dice.rock,
+        Category.paper: request.dice.paper,
+        Category.scissors: request.dice.scissors,
+    }
+    all_permitted_moves = gather_all_permitted_moves(starting_board=board, team=team, dice_rolls=dice_rolls)
+
+    # Gather for two copies of the game at once, to check that each game's candidates are kept together and in order
+    data = np.frombuffer(bytes(board.data) * 2, dtype=np.uint8).reshape(2, -1)
+    candidates = gather_all_candidates(data, team, np.array([list(dice_rolls.values())] * 2))
+
+    expected_boards = [bytes(m.board.data) for m in all_permitted_moves]
+    assert [bytes(row) for row in candidates.data] == expected_boards * 2
+    assert candidates.game.tolist() == [0] * len(expected_boards) + [1] * len(expected_boards)
+    assert candidates.used_joker.tolist() == [m.used_joker() for m in all_permitted_moves] * 2
@@ -0,0 +1,71 @@
+from copy import deepcopy
+from pathlib import Path
+
+import pytest
+
+from ninja_taisen.algos.card_mover import CardMover
+from ninja_taisen.algos.move_gatherer import gather_all_permitted_moves
+from ninja_taisen.dtos import ChooseRequest
+from ninja_taisen.objects.types import TEAM_BY_DTO, Board, Category, CompletedMoves
+
+TURN_BY_TURN_DIR = Path(__file__).resolve().parent.parent / "regression" / "turn_by_turn"
+
+
+def __request_jsons() -> list[Path]:
+    return sorted(TURN_BY_TURN_DIR.glob("*/request_*.json"))
+
+
+@pytest.mark.parametrize("request_json", __request_jsons(), ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_candidates_match_moves_replayed_on_fresh_board(request_json: Path) -> None:
+    request = ChooseRequest.model_validate_json(request_json.read_text())
+    starting_board = Board.from_dto(request.board)
+    untouched_board = deepcopy(starting_board)
+    team = TEAM_BY_DTO[request.team]
+    dice_rolls = {
+        Category.rock: request.dice.rock,
+        Category.paper: request.dice.paper,
+        Category.scissors: request.dice.scissors,
+    }
+
+    all_permitted_moves = gather_all_permitted_moves(starting_board=starting_board, team=team, dice_rolls=dice_rolls)
+
+    # Every candidate is gathered from a copy - none of them may leak edits back to the starting board
+    assert starting_board == untouched_board
+    for completed_moves in all_permitted_moves:
+        assert completed_moves.board == replay_moves(untouched_board, completed_moves)
+
+
+@pytest.mark.parametrize("request_json", __request_jsons(), ids=lambda p: f"{p.parent.name}/{p.stem}")
+def test_deduplicate_keeps_one_candidate_per_distinct_board(request_json: Path) -> None:
+    request = ChooseRequest.model_validate_json(request_json.read_text())
+    starting_board = Board.from_dto(request.board)
+    team = TEAM_BY_DTO[request.team]
+    dice_rolls = {
+        Category.rock: request.dice.rock,
+        Category.paper: request.dice.paper,
+        Category.scissors: request.dice.scissors,
+    }
+
+    all_permitted_moves = gather_all_permitted_moves(starting_board=starting_board, team=team, dice_rolls=dice_rolls)
+    distinct_moves = gather_all_permitted_moves(
+        starting_board=starting_board, team=team, dice_rolls=dice_rolls, deduplicate=True
+    )
+
+    distinct_boards = [bytes(m.board.data) for m in distinct_moves]
+    assert len(distinct_boards) == len(set(distinct_boards))
+    assert set(distinct_boards) == {bytes(m.board.data) for m in all_permitted_moves}
+
+    all_move_lists = [m.moves for m in all_permitted_moves]
+    for completed_moves in distinct_moves:
+        assert completed_moves.moves in all_move_lists
+
+
+def replay_moves(starting_board: Board, completed_moves: CompletedMoves) -> Board:
+    board = deepcopy(starting_board)
+    for move in completed_moves.moves:
+        pile_index, card_index = board.locate_card(move.card, completed_moves.team)
+        card_mover = CardMover(board=board)
+        card_mover.move_card_and_resolve_battles(
+            team=completed_moves.team, dice_roll=move.dice_roll, pile_index=pile_index, card_index=card_index
+        )
+    return board
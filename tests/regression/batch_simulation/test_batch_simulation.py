@@ -1,4 +1,5 @@
 import itertools
+import json
 from pathlib import Path
 from typing import get_args
 
@@ -50,3 +51,207 @@ def test_all_strategies(max_processes: int, results_format: ResultsFormat, regen
     else:
         df_expected = pl.read_csv(results_csv)
         assert_frame_equal(df_expected, df_actual)
+
+
+@pytest.mark.parametrize("stream", (False, True))
+@pytest.mark.parametrize("max_processes", (1, 2))
+@pytest.mark.parametrize("results_format", get_args(ResultsFormat))
+def test_all_strategies_from_dataframe(
+    stream: bool, max_processes: int, results_format: ResultsFormat, tmp_path: Path
+) -> None:
+    strategies = (Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength)
+    monkey_strategies, wolf_strategies = zip(*itertools.product(strategies, strategies), strict=True)
+    instructions = pl.DataFrame(
+        {
+            "id": range(len(monkey_strategies)),
+            "seed": range(len(monkey_strategies)),
+            "monkey_strategy": monkey_strategies,
+            "wolf_strategy": wolf_strategies,
+        }
+    )
+
+    simulate(
+        instructions=instructions,
+        results_dir=tmp_path,
+        results_format=results_format,
+        max_processes=max_processes,
+        per_process=5,
+        rust=False,
+        stream=stream,
+    )
+
+    __assert_results_match_regression_output(tmp_path, results_format)
+
+
+@pytest.mark.parametrize("max_processes", (1, 2))
+@pytest.mark.parametrize("results_format", get_args(ResultsFormat))
+def test_all_strategies_streaming(max_processes: int, results_format: ResultsFormat, tmp_path: Path) -> None:
+    strategies = (Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength)
+    instructions = (
+        InstructionDto(id=index, seed=index, monkey_strategy=monkey_strategy, wolf_strategy=wolf_strategy)
+        for index, (monkey_strategy, wolf_strategy) in enumerate(itertools.product(strategies, strategies))
+    )
+
+    simulate(
+        instructions=instructions,
+        results_dir=tmp_path,
+        results_format=results_format,
+        max_processes=max_processes,
+        per_process=5,
+        rust=False,
+        stream=True,
+    )
+
+    __assert_results_match_regression_output(tmp_path, results_format)
+
+
+@pytest.mark.parametrize("max_processes", (1, 2))
+@pytest.mark.parametrize("results_format", get_args(ResultsFormat))
+def test_all_strategies_resumed(max_processes: int, results_format: ResultsFormat, tmp_path: Path) -> None:
+    strategies = (Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength)
+    instructions = [
+        InstructionDto(id=index, seed=index, monkey_strategy=monkey_strategy, wolf_strategy=wolf_strategy)
+        for index, (monkey_strategy, wolf_strategy) in enumerate(itertools.product(strategies, strategies))
+    ]
+
+    # Emulate a run that was interrupted after completing the first two chunks, part way through the third
+    simulate(
+        instructions=instructions[:10],
+        results_dir=tmp_path,
+        results_format=results_format,
+        max_processes=max_processes,
+        per_process=5,
+        rust=False,
+        resume=True,
+    )
+    chunk_results = tmp_path / "chunk_results"
+    completed_chunks = {p: p.stat().st_mtime_ns for p in chunk_results.glob(f"results_*.{results_format}")}
+    assert len(completed_chunks) == 2
+    (tmp_path / f"results.{results_format}").unlink()
+    (chunk_results / f"results_10-14.{results_format}.partial").write_text("truncated")
+    with (chunk_results / "manifest.jsonl").open("a") as f:
+        f.write('{"results_file": "results_10-1')
+
+    simulate(
+        instructions=instructions,
+        results_dir=tmp_path,
+        results_format=results_format,
+        max_processes=max_processes,
+        per_process=5,
+        rust=False,
+        resume=True,
+    )
+
+    __assert_results_match_regression_output(tmp_path, results_format)
+    assert {p: p.stat().st_mtime_ns for p in completed_chunks} == completed_chunks
+    manifest_lines = (chunk_results / "manifest.jsonl").read_text().splitlines()
+    assert sorted(json.loads(line)["results_file"] for line in manifest_lines) == [
+        f"results_{chunk}.{results_format}" for chunk in ("0-4", "10-14", "15-15", "5-9")
+    ]
+
+
+@pytest.mark.parametrize("stream", (False, True))
+@pytest.mark.parametrize("max_processes", (1, 2))
+def test_all_strategies_lockstep(stream: bool, max_processes: int, tmp_path: Path) -> None:
+    strategies = (Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength)
+    instructions = [
+        InstructionDto(id=index, seed=index, monkey_strategy=monkey_strategy, wolf_strategy=wolf_strategy)
+        for index, (monkey_strategy, wolf_strategy) in enumerate(itertools.product(strategies, strategies))
+    ]
+
+    # Each game consumes its own random numbers exactly as when played alone, so lockstep reproduces the results
+    simulate(
+        instructions=instructions,
+        results_dir=tmp_path,
+        max_processes=max_processes,
+        per_process=8,
+        rust=False,
+        stream=stream,
+        lockstep=True,
+    )
+
+    __assert_results_match_regression_output(tmp_path, "parquet")
+
+
+@pytest.mark.parametrize(
+    "stream, resume, lockstep",
+    ((False, False, False), (True, False, False), (False, True, False), (False, False, True)),
+)
+def test_stats(stream: bool, resume: bool, lockstep: bool, tmp_path: Path) -> None:
+    strategies = (Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength)
+    instructions = [
+        InstructionDto(id=index, seed=index, monkey_strategy=monkey_strategy, wolf_strategy=wolf_strategy)
+        for index, (monkey_strategy, wolf_strategy) in enumerate(itertools.product(strategies, strategies))
+    ]
+
+    simulate(
+        instructions=instructions,
+        results_dir=tmp_path,
+        max_processes=2,
+        per_process=4,
+        rust=False,
+        stream=stream,
+        resume=resume,
+        lockstep=lockstep,
+        stats=True,
+    )
+
+    # Collecting stats does not change the results
+    __assert_results_match_regression_output(tmp_path, "parquet")
+    df_results = pl.read_parquet(tmp_path / "results.parquet")
+    df_stats = pl.read_parquet(tmp_path / "stats.parquet")
+
+    # A row for each of the worker processes which played the games, then one for the main process
+    assert 2 <= df_stats.height <= 3
+    assert df_stats["worker"][-1] == "MainProcess"
+    assert df_stats["games"].sum() == len(instructions)
+    assert df_stats["turns"].sum() == df_results["turn_count"].sum()
+
+    df_workers = df_stats.head(-1)
+    assert (df_workers["candidates"] >= df_workers["turns"]).all()
+    assert (df_workers["card_moves"] >= df_workers["candidates"]).all()
+    assert (df_workers["battles"] > 0).all()
+    assert (df_workers["move_generation_s"] > 0).all()
+    assert (df_workers["strategy_scoring_s"] > 0).all()
+    assert df_stats["result_writing_s"].sum() > 0
+    assert (df_stats.select(pl.col("^.*_s$")).min_horizontal() >= 0).all()
+
+
+def test_no_stats_by_default(tmp_path: Path) -> None:
+    instructions = [InstructionDto(id=0, seed=0, monkey_strategy=Strategy.random, wolf_strategy=Strategy.random)]
+    simulate(instructions=instructions, results_dir=tmp_path, max_processes=1, rust=False)
+    assert (tmp_path / "results.parquet").exists()
+    assert not (tmp_path / "stats.parquet").exists()
+
+
+def test_lockstep_rejects_rust(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Cannot use the lockstep engine"):
+        simulate(instructions=[], results_dir=tmp_path, rust=True, lockstep=True)
+
+
+def test_work_stealing_rejects_python(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="only the Rust engine supports"):
+        simulate(instructions=[], results_dir=tmp_path, per_process=0, rust=False)
+
+
+def test_resume_rejects_streaming(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Cannot resume"):
+        simulate(instructions=[], results_dir=tmp_path, rust=False, stream=True, resume=True)
+
+
+def test_rust_rejects_streaming(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Cannot stream"):
+        simulate(instructions=[], results_dir=tmp_path, rust=True, stream=True)
+
+
+def __assert_results_match_regression_output(tmp_path: Path, results_format: ResultsFormat) -> None:
+    df_lazy = (
+        pl.scan_parquet(tmp_path / "results.parquet")
+        if results_format == "parquet"
+        else pl.scan_csv(tmp_path / "results.csv")
+    )
+    df_actual = df_lazy.drop(["start_time", "end_time", "process_name"]).sort("id").collect()
+
+    # Streamed chunks are written in the order they complete, so sort before comparing with the regression output
+    df_expected = pl.read_csv(Path(__file__).resolve().parent / "results.csv")
+    assert_frame_equal(df_expected, df_actual)
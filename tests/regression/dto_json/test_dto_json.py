@@ -1,5 +1,7 @@
 from pathlib import Path
 
+import pytest
+
 from ninja_taisen import choose_move, execute_move
 from ninja_taisen.dtos import (
     BoardDto,
@@ -11,7 +13,7 @@ from ninja_taisen.dtos import (
     Strategy,
     TeamDto,
 )
-from ninja_taisen.objects.types import Board
+from ninja_taisen.objects.types import CARD_BY_CODE, CODE_BY_DTO, DTO_BY_CODE, Board, Card
 
 
 def sample_board_dto() -> BoardDto:
@@ -39,6 +41,41 @@ def test_board_round_trips_to_internal_type() -> None:
     assert board_dto == board_dto_2
 
 
+def test_card_strings_are_interned() -> None:
+    cards = [card for card in CARD_BY_CODE if card is not None]
+    assert len(cards) == len(CODE_BY_DTO) == len(DTO_BY_CODE)
+    for card in cards:
+        assert DTO_BY_CODE[card.to_code()] == str(card) == card.to_dto()
+        assert CODE_BY_DTO[str(card)] == card.to_code()
+        assert Card.from_dto(str(card)) is card
+
+
+@pytest.mark.parametrize("card", ["MX1", "MR9", "XR1", "MR", "MR11", ""])
+def test_unexpected_card_is_rejected(card: str) -> None:
+    with pytest.raises(ValueError, match="Unexpected card"):
+        Card.from_dto(card)
+
+    board_dto = sample_board_dto()
+    board_dto.wolf[6] = [card]
+    with pytest.raises(ValueError, match="Unexpected card"):
+        Board.from_dto(board_dto)
+
+
+@pytest.mark.parametrize("pile_index", [-1, 11, 100])
+def test_unexpected_pile_index_is_rejected(pile_index: int) -> None:
+    board_dto = sample_board_dto()
+    board_dto.monkey[pile_index] = board_dto.monkey.pop(3)
+    with pytest.raises(ValueError, match="Unexpected pile index"):
+        Board.from_dto(board_dto)
+
+
+def test_overfull_pile_is_rejected() -> None:
+    board_dto = sample_board_dto()
+    board_dto.monkey[4] = ["MR1"] * 11
+    with pytest.raises(ValueError, match="Unexpected pile of 11 cards"):
+        Board.from_dto(board_dto)
+
+
 def test_for_dto_json_changes(regen: bool) -> None:
     choose_request = ChooseRequest(
         board=sample_board_dto(),
@@ -3,8 +3,12 @@ from pathlib import Path
 import pytest
 
 from ninja_taisen import ExecuteResponse
-from ninja_taisen.api import choose_move, execute_move
-from ninja_taisen.dtos import BoardDto, ChooseRequest, ChooseResponse, ExecuteRequest
+from ninja_taisen.api import choose_move, choose_move_binary, choose_moves, execute_move, execute_moves
+from ninja_taisen.dtos import BoardDto, CategoryDto, ChooseRequest, ChooseResponse, ExecuteRequest, MoveDto
+from ninja_taisen.objects.types import TEAM_BY_DTO, Board
+from ninja_taisen.objects.wire_format import decode_choose_request, decode_choose_response, encode_choose_request
+from ninja_taisen.utils.choose_cache import ChooseCache
+from ninja_taisen.utils.lru_cache import CacheStats
 from tests.conftest import validate_choose_response
 
 TURN_BY_TURN_DIR = Path(__file__).resolve().parent / "regression" / "turn_by_turn"
@@ -49,3 +53,96 @@ def test_choose(game: str, turn_index: int) -> None:
 
     response = choose_move(request=request)
     validate_choose_response(response, request.team)
+
+
+@pytest.mark.parametrize("game,turn_index", __games_and_indices())
+def test_choose_binary(game: str, turn_index: int) -> None:
+    request_json = TURN_BY_TURN_DIR / game / f"request_{turn_index}.json"
+    request = ChooseRequest.model_validate_json(request_json.read_text())
+    request.seed = turn_index
+
+    binary_request = encode_choose_request(request)
+    decoded_request = decode_choose_request(binary_request)
+    assert decoded_request.board.data == Board.from_dto(request.board).data
+    assert decoded_request.team == TEAM_BY_DTO[request.team]
+    assert (decoded_request.strategy, decoded_request.seed) == (request.strategy, request.seed)
+
+    response = decode_choose_response(choose_move_binary(binary_request))
+    assert response == choose_move(request=request)
+
+
+@pytest.mark.parametrize(
+    "invalid_request", ["truncated", "wolf card in monkey pile", "card above top of pile", "unknown strategy"]
+)
+def test_choose_binary_rejects_invalid_request(invalid_request: str) -> None:
+    request_json = TURN_BY_TURN_DIR / "metric_count_vs_metric_count" / "request_0.json"
+    request = ChooseRequest.model_validate_json(request_json.read_text())
+    binary_request = encode_choose_request(request)
+
+    # Each team starts with all 10 of its cards, so replace the first monkey card, or remove one from the first pile
+    invalid_requests = {
+        "truncated": binary_request[:-1],
+        "wolf card in monkey pile": bytes([0b1_1_00_0001]) + binary_request[1:],
+        "card above top of pile": binary_request[:20] + bytes([binary_request[20] - 1]) + binary_request[21:],
+        "unknown strategy": encode_choose_request(request.model_copy(update={"strategy": "clairvoyant"})),
+    }
+    with pytest.raises(ValueError):
+        choose_move_binary(invalid_requests[invalid_request])
+
+
+def test_choose_and_execute_many_name_invalid_request() -> None:
+    choose_requests = [
+        ChooseRequest.model_validate_json(p.read_text()) for p in sorted(TURN_BY_TURN_DIR.glob("*/request_0.json"))
+    ]
+    choose_requests[2].strategy = "clairvoyant"
+    choose_requests[5].strategy = "psychic"
+    with pytest.raises(ValueError, match="Invalid request at index 2: Unexpected strategy 'clairvoyant'"):
+        choose_moves(choose_requests)
+    with pytest.raises(ValueError, match="Invalid request at index 9: Unexpected strategy 'psychic'"):
+        choose_moves(choose_requests[3:6], indices=[7, 8, 9])
+
+    execute_requests = [ExecuteRequest(board=r.board, dice=r.dice, team=r.team, moves=[]) for r in choose_requests]
+    execute_requests[1].moves = [MoveDto(dice_category=CategoryDto.rock, card="MJ3")]
+    with pytest.raises(ValueError, match="Invalid request at index 1: Unable to find card MJ3 in board"):
+        execute_moves(execute_requests)
+
+
+def test_choose_cache(tmp_path: Path) -> None:
+    request_json = TURN_BY_TURN_DIR / "metric_count_vs_metric_count" / "request_3.json"
+    request = ChooseRequest.model_validate_json(request_json.read_text())
+    request.seed = 3
+    cache = ChooseCache(max_size=2, path=tmp_path / "choose_cache.json")
+
+    response = choose_move(request, cache=cache)
+    assert response == choose_move(request)
+    assert cache.stats() == CacheStats(hits=0, misses=1, size=1)
+
+    # The key does not depend on the order the piles were written in, and callers may modify what they are given
+    reordered_request = request.model_copy(deep=True)
+    reordered_request.board.monkey = dict(reversed(request.board.monkey.items()))
+    cached_response = choose_move(reordered_request, cache=cache)
+    assert cached_response == response
+    cached_response.moves.clear()
+    assert choose_move(request, cache=cache) == response
+    assert cache.stats() == CacheStats(hits=2, misses=1, size=1)
+
+    # Unseeded requests are not deterministic, so are never cached
+    request.seed = None
+    choose_move(request, cache=cache)
+    assert cache.stats() == CacheStats(hits=2, misses=1, size=1)
+
+    cache.save()
+    request.seed = 3
+    loaded_cache = ChooseCache(max_size=2, path=cache.path)
+    assert choose_move(request, cache=loaded_cache) == response
+    assert loaded_cache.stats() == CacheStats(hits=1, misses=0, size=1)
+
+    # The key holds the whole board, not just its hash, so no other board can be answered from this entry
+    key = ChooseCache.key(request, rust=False)
+    assert key is not None and Board(bytearray(key.board)) == Board.from_dto(request.board)
+    other_request = request.model_copy(
+        update={"board": ChooseRequest.model_validate_json(request_json.with_name("request_4.json").read_text()).board}
+    )
+    other_key = ChooseCache.key(other_request, rust=False)
+    assert other_key is not None and other_key._replace(board=key.board) == key
+    assert loaded_cache.get(other_key) is None
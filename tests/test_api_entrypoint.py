@@ -1,6 +1,7 @@
+import pytest
 from fastapi.testclient import TestClient
 
-from ninja_taisen import ChooseRequest, execute_move
+from ninja_taisen import ChooseRequest, choose_move, execute_move
 from ninja_taisen.algos.board_builder import make_board
 from ninja_taisen.api_entrypoint import app
 from ninja_taisen.dtos import (
@@ -14,6 +15,7 @@ from ninja_taisen.dtos import (
     TeamDto,
 )
 from ninja_taisen.objects.safe_random import SafeRandom
+from ninja_taisen.objects.wire_format import BINARY_MEDIA_TYPE, decode_choose_response, encode_choose_request
 from tests.conftest import validate_choose_response
 
 client = TestClient(app)
@@ -37,6 +39,23 @@ def test_choose() -> None:
     validate_choose_response(choose_response, team)
 
 
+@pytest.mark.parametrize("seed", (None, 5))
+def test_choose_invalid_request(seed: int | None) -> None:
+    random = SafeRandom(0)
+    choose_request = ChooseRequest(
+        board=make_board(random=random, shuffle_cards=True).to_dto(),
+        dice=DiceRollDto(rock=random.roll_dice(), paper=random.roll_dice(), scissors=random.roll_dice()),
+        team=TeamDto.monkey,
+        seed=seed,
+    )
+    choose_request.board.monkey[0][0] = "MX1"
+
+    # A seeded request's cache key is computed from its board first, so that is where the card is rejected
+    response = client.post("/choose", json=choose_request.model_dump(by_alias=True, round_trip=True))
+    assert response.status_code == 422, f"status_code={response.status_code}, text={response.text}"
+    assert response.json()["detail"] == "Invalid request at index 0: Unexpected card MX1"
+
+
 def test_execute() -> None:
     random = SafeRandom(0)
     team = TeamDto.wolf
@@ -54,3 +73,145 @@ def test_execute() -> None:
     actual_response = ExecuteResponse.model_validate(response.json())
     expected_response = execute_move(execute_request)
     assert actual_response == expected_response
+
+
+def test_execute_invalid_move() -> None:
+    random = SafeRandom(0)
+    execute_request = ExecuteRequest(
+        board=make_board(random=random, shuffle_cards=True).to_dto(),
+        dice=DiceRollDto(rock=random.roll_dice(), paper=random.roll_dice(), scissors=random.roll_dice()),
+        team=TeamDto.wolf,
+        moves=[MoveDto(dice_category=CategoryDto.rock, card="MR2")],
+    )
+
+    response = client.post("/execute", json=execute_request.model_dump(by_alias=True, round_trip=True))
+    assert response.status_code == 422, f"status_code={response.status_code}, text={response.text}"
+    assert "Unable to find card" in response.json()["detail"]
+
+
+def test_choose_batch() -> None:
+    random = SafeRandom(0)
+    choose_requests = [
+        ChooseRequest(
+            board=make_board(random=random, shuffle_cards=True).to_dto(),
+            dice=DiceRollDto(rock=random.roll_dice(), paper=random.roll_dice(), scissors=random.roll_dice()),
+            team=team,
+            strategy=strategy,
+            seed=seed,
+        )
+        for seed, (team, strategy) in enumerate(
+            [
+                (TeamDto.monkey, Strategy.metric_strength),
+                (TeamDto.wolf, Strategy.random),
+                (TeamDto.wolf, Strategy.random),
+            ]
+        )
+    ]
+
+    response = client.post(
+        "/choose/batch", json=[r.model_dump(by_alias=True, round_trip=True) for r in choose_requests]
+    )
+    assert response.status_code == 200, f"status_code={response.status_code}, text={response.text}"
+
+    actual_responses = [ChooseResponse.model_validate(r) for r in response.json()]
+    assert actual_responses == [choose_move(r) for r in choose_requests]
+
+
+def test_execute_batch() -> None:
+    random = SafeRandom(0)
+    execute_requests = [
+        ExecuteRequest(
+            board=make_board(random=random, shuffle_cards=True).to_dto(),
+            dice=DiceRollDto(rock=random.roll_dice(), paper=random.roll_dice(), scissors=random.roll_dice()),
+            team=team,
+            moves=[MoveDto(dice_category=CategoryDto.rock, card=card)],
+        )
+        for team, card in [(TeamDto.wolf, "WR2"), (TeamDto.monkey, "MR1")]
+    ]
+
+    response = client.post(
+        "/execute/batch", json=[r.model_dump(by_alias=True, round_trip=True) for r in execute_requests]
+    )
+    assert response.status_code == 200, f"status_code={response.status_code}, text={response.text}"
+
+    actual_responses = [ExecuteResponse.model_validate(r) for r in response.json()]
+    assert actual_responses == [execute_move(r) for r in execute_requests]
+
+
+def test_batch_invalid_request() -> None:
+    random = SafeRandom(2)
+    choose_requests = [
+        ChooseRequest(
+            board=make_board(random=random, shuffle_cards=True).to_dto(),
+            dice=DiceRollDto(rock=random.roll_dice(), paper=random.roll_dice(), scissors=random.roll_dice()),
+            team=TeamDto.monkey,
+            strategy=strategy,
+            seed=13,
+        )
+        for strategy in (Strategy.metric_count, Strategy.random, "clairvoyant", Strategy.metric_strength, "psychic")
+    ]
+    request_jsons = [r.model_dump(by_alias=True, round_trip=True) for r in choose_requests]
+
+    # The first two requests are then answered from the cache, which must not change which invalid request is named,
+    # nor its index
+    for request_json in request_jsons[:2]:
+        assert client.post("/choose", json=request_json).status_code == 200
+    response = client.post("/choose/batch", json=request_jsons)
+    assert response.status_code == 422, f"status_code={response.status_code}, text={response.text}"
+    assert response.json()["detail"].startswith("Invalid request at index 2: ")
+
+    execute_requests = [ExecuteRequest(board=r.board, dice=r.dice, team=r.team, moves=[]) for r in choose_requests]
+    execute_requests[1].moves = [MoveDto(dice_category=CategoryDto.rock, card="WR2")]
+    response = client.post(
+        "/execute/batch", json=[r.model_dump(by_alias=True, round_trip=True) for r in execute_requests]
+    )
+    assert response.status_code == 422, f"status_code={response.status_code}, text={response.text}"
+    assert response.json()["detail"] == "Invalid request at index 1: Unable to find card WR2 in board"
+
+
+def test_empty_batch() -> None:
+    response = client.post("/choose/batch", json=[])
+    assert response.status_code == 200, f"status_code={response.status_code}, text={response.text}"
+    assert response.json() == []
+
+
+def test_choose_binary() -> None:
+    random = SafeRandom(0)
+    choose_request = ChooseRequest(
+        board=make_board(random=random, shuffle_cards=True).to_dto(),
+        dice=DiceRollDto(rock=random.roll_dice(), paper=random.roll_dice(), scissors=random.roll_dice()),
+        team=TeamDto.wolf,
+        strategy=Strategy.metric_count,
+        seed=7,
+    )
+
+    response = client.post(
+        "/choose/binary", content=encode_choose_request(choose_request), headers={"Content-Type": BINARY_MEDIA_TYPE}
+    )
+    assert response.status_code == 200, f"status_code={response.status_code}, text={response.text}"
+    assert response.headers["Content-Type"] == BINARY_MEDIA_TYPE
+    assert decode_choose_response(response.content) == choose_move(choose_request)
+
+    response = client.post("/choose/binary", content=b"\x00", headers={"Content-Type": BINARY_MEDIA_TYPE})
+    assert response.status_code == 422, f"status_code={response.status_code}, text={response.text}"
+
+
+def test_choose_cache_stats() -> None:
+    random = SafeRandom(1)
+    choose_request = ChooseRequest(
+        board=make_board(random=random, shuffle_cards=True).to_dto(),
+        dice=DiceRollDto(rock=random.roll_dice(), paper=random.roll_dice(), scissors=random.roll_dice()),
+        team=TeamDto.monkey,
+        strategy=Strategy.metric_position,
+        seed=11,
+    )
+    request_json = choose_request.model_dump(by_alias=True, round_trip=True)
+
+    stats_before = client.get("/cache/stats").json()
+    first_response = client.post("/choose", json=request_json)
+    second_response = client.post("/choose/batch", json=[request_json, request_json])
+    stats_after = client.get("/cache/stats").json()
+
+    assert [first_response.json(), first_response.json()] == second_response.json()
+    assert stats_after["misses"] - stats_before["misses"] == 1
+    assert stats_after["hits"] - stats_before["hits"] == 2
@@ -1,9 +1,28 @@
+import json
 from pathlib import Path
+from typing import Any
 
+import ninja_taisen_rust
 import polars as pl
+import pytest
 
-from ninja_taisen import InstructionDto, simulate
-from ninja_taisen.dtos import ResultDto, Strategy
+from ninja_taisen import (
+    ChooseRequest,
+    ExecuteRequest,
+    InstructionDto,
+    choose_move,
+    choose_move_binary,
+    choose_moves,
+    execute_move,
+    execute_moves,
+    simulate,
+    simulate_in_memory,
+)
+from ninja_taisen.dtos import CategoryDto, MoveDto, ResultDto, Strategy
+from ninja_taisen.objects.wire_format import decode_choose_response, encode_choose_request
+from tests.conftest import validate_choose_response
+
+TURN_BY_TURN_DIR = Path(__file__).resolve().parent / "regression" / "turn_by_turn"
 
 
 def test_simulate_rust(tmp_path: Path) -> None:
@@ -35,3 +54,204 @@ def test_simulate_rust(tmp_path: Path) -> None:
         time_taken_s = (result.end_time - result.start_time).total_seconds()
         assert 0.0 < time_taken_s < 100.0
         assert result.process_name
+
+
+def test_simulate_in_memory() -> None:
+    strategies = [Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength]
+    instructions = [
+        InstructionDto(id=i, seed=i, monkey_strategy=strategies[i % 4], wolf_strategy=strategies[i // 4 % 4])
+        for i in range(64)
+    ]
+
+    results_df = simulate_in_memory(instructions, max_processes=-1, per_process=3)
+    assert results_df.shape == (64, 11)
+    assert results_df["id"].to_list() == list(range(64))
+
+    instructions_df = pl.DataFrame([i.model_dump() for i in instructions])
+    results_df_2 = simulate_in_memory(instructions_df, max_processes=1, per_process=100)
+    deterministic_columns = ["id", "seed", "monkey_strategy", "wolf_strategy", "winner", "turn_count"]
+    assert results_df.select(deterministic_columns).equals(results_df_2.select(deterministic_columns))
+
+    results_df_3 = simulate_in_memory(instructions, max_processes=-1, per_process=0)
+    assert results_df.select(deterministic_columns).equals(results_df_3.select(deterministic_columns))
+
+
+def test_simulate_rust_resumed(tmp_path: Path) -> None:
+    strategies = [Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength]
+    instructions = [
+        InstructionDto(id=i, seed=i, monkey_strategy=strategies[i % 4], wolf_strategy=strategies[i // 4 % 4])
+        for i in range(64)
+    ]
+
+    simulate(
+        instructions=instructions[:20], results_dir=tmp_path, max_processes=2, per_process=5, rust=True, resume=True
+    )
+    simulate(instructions=instructions, results_dir=tmp_path, max_processes=2, per_process=5, rust=True, resume=True)
+
+    results_df = pl.read_parquet(tmp_path / "results.parquet")
+    assert results_df["id"].to_list() == list(range(64))
+    expected_df = simulate_in_memory(instructions, max_processes=2, per_process=5)
+    deterministic_columns = ["id", "seed", "monkey_strategy", "wolf_strategy", "winner", "turn_count"]
+    assert results_df.select(deterministic_columns).equals(expected_df.select(deterministic_columns))
+
+
+@pytest.mark.parametrize("per_process", (5, 0))
+def test_simulate_rust_stats(per_process: int, tmp_path: Path) -> None:
+    strategies = [Strategy.random, Strategy.random_spot_win, Strategy.metric_count, Strategy.metric_strength]
+    instructions = [
+        InstructionDto(id=i, seed=i, monkey_strategy=strategies[i % 4], wolf_strategy=strategies[i // 4 % 4])
+        for i in range(64)
+    ]
+
+    simulate(
+        instructions=instructions, results_dir=tmp_path, max_processes=2, per_process=per_process, rust=True, stats=True
+    )
+
+    results_df = pl.read_parquet(tmp_path / "results.parquet")
+    stats_df = pl.read_parquet(tmp_path / "stats.parquet")
+    assert "MainProcess" in stats_df["worker"].to_list()
+    assert stats_df["games"].sum() == 64
+    assert stats_df["turns"].sum() == results_df["turn_count"].sum()
+    assert stats_df["candidates"].sum() >= stats_df["turns"].sum()
+    assert stats_df["battles"].sum() > 0
+    assert (stats_df.select(pl.col("^.*_s$")).min_horizontal() >= 0).all()
+
+
+@pytest.mark.parametrize(
+    "request_json", sorted(TURN_BY_TURN_DIR.glob("*/request_0.json")), ids=lambda p: f"{p.parent.name}/{p.stem}"
+)
+def test_choose_and_execute_rust(request_json: Path) -> None:
+    choose_request = ChooseRequest.model_validate_json(request_json.read_text())
+    choose_request.seed = 0
+
+    choose_response = choose_move(choose_request, rust=True)
+    validate_choose_response(choose_response, choose_request.team)
+    assert choose_move(choose_request, rust=True) == choose_response
+
+    execute_request = ExecuteRequest(
+        board=choose_request.board, dice=choose_request.dice, team=choose_request.team, moves=choose_response.moves
+    )
+    assert execute_move(execute_request, rust=True) == execute_move(execute_request, rust=False)
+
+
+def test_choose_and_execute_many_rust() -> None:
+    choose_requests = [
+        ChooseRequest.model_validate_json(p.read_text()) for p in sorted(TURN_BY_TURN_DIR.glob("*/request_*.json"))
+    ]
+    for seed, choose_request in enumerate(choose_requests):
+        choose_request.seed = seed
+
+    choose_responses = choose_moves(choose_requests, rust=True)
+    assert choose_responses == [choose_move(r, rust=True) for r in choose_requests]
+
+    execute_requests = [
+        ExecuteRequest(board=c.board, dice=c.dice, team=c.team, moves=r.moves)
+        for c, r in zip(choose_requests, choose_responses, strict=True)
+    ]
+    assert execute_moves(execute_requests, rust=True) == execute_moves(execute_requests, rust=False)
+
+
+@pytest.mark.parametrize(
+    "request_json", sorted(TURN_BY_TURN_DIR.glob("*/request_*.json")), ids=lambda p: f"{p.parent.name}/{p.stem}"
+)
+def test_choose_binary_rust(request_json: Path) -> None:
+    choose_request = ChooseRequest.model_validate_json(request_json.read_text())
+    choose_request.seed = 0
+
+    binary_response = choose_move_binary(encode_choose_request(choose_request), rust=True)
+    assert decode_choose_response(binary_response) == choose_move(choose_request, rust=True)
+
+    with pytest.raises(ValueError):
+        choose_move_binary(encode_choose_request(choose_request)[:-1], rust=True)
+
+    choose_request.strategy = "clairvoyant"
+    with pytest.raises(ValueError, match="Could not match strategy_name 'clairvoyant'"):
+        choose_move_binary(encode_choose_request(choose_request), rust=True)
+
+
+def __request_0() -> dict[str, Any]:
+    request: dict[str, Any] = json.loads(
+        (TURN_BY_TURN_DIR / "metric_count_vs_metric_count" / "request_0.json").read_text()
+    )
+    return request
+
+
+INVALID_BOARDS = (
+    ({"monkey": {"0": ["MX1"]}, "wolf": {"10": ["WJ4"]}}, "Invalid card string MX1"),
+    ({"monkey": {"0": ["MJ4"]}, "wolf": {"11": ["WJ4"]}}, "Unexpected pile index 11"),
+    (
+        {
+            "monkey": {"0": ["MR1", "MR2", "MR3", "MP1", "MP2", "MP3"], "1": ["MS1", "MS2", "MS3", "MJ4", "MR1"]},
+            "wolf": {},
+        },
+        "Expected at most 10 cards per team",
+    ),
+)
+
+
+@pytest.mark.parametrize(
+    "field, value, error",
+    (
+        ("team", "badger", "Unexpected team badger"),
+        ("strategy", "clairvoyant", "Could not match strategy_name 'clairvoyant'"),
+        *(("board", board, error) for board, error in INVALID_BOARDS),
+    ),
+)
+def test_choose_rust_rejects_invalid_requests(field: str, value: Any, error: str) -> None:
+    request = __request_0()
+    request[field] = value
+
+    with pytest.raises(ValueError, match=error):
+        ninja_taisen_rust.choose_move(json.dumps(request))
+    with pytest.raises(ValueError, match=f"Invalid request at index 1: {error}"):
+        ninja_taisen_rust.choose_moves(json.dumps([__request_0(), request]))
+
+
+@pytest.mark.parametrize(
+    "field, value, error",
+    (
+        ("team", "badger", "Unexpected team badger"),
+        ("moves", [{"card": "MJ4", "diceCategory": "joker"}], "Unexpected dice_category joker"),
+        ("moves", [{"card": "WJ4", "diceCategory": "rock"}], "Unable to find card WJ4 in board"),
+        ("moves", [{"card": "MX1", "diceCategory": "rock"}], "Invalid card string MX1"),
+        *(("board", board, error) for board, error in INVALID_BOARDS),
+    ),
+)
+def test_execute_rust_rejects_invalid_requests(field: str, value: Any, error: str) -> None:
+    valid_request = __request_0()
+    valid_request.pop("strategy", None)
+    valid_request.pop("seed", None)
+    valid_request["moves"] = [{"card": "MS1", "diceCategory": "rock"}]
+    request = {**valid_request, field: value}
+
+    with pytest.raises(ValueError, match=error):
+        ninja_taisen_rust.execute_move(json.dumps(request))
+    with pytest.raises(ValueError, match=f"Invalid request at index 1: {error}"):
+        ninja_taisen_rust.execute_moves(json.dumps([valid_request, request]))
+
+
+def test_choose_rust_rejects_unknown_strategy() -> None:
+    choose_request = ChooseRequest.model_validate_json(
+        (TURN_BY_TURN_DIR / "metric_count_vs_metric_count" / "request_0.json").read_text()
+    )
+    choose_request.strategy = "clairvoyant"
+
+    with pytest.raises(ValueError, match="Could not match strategy_name 'clairvoyant'"):
+        choose_move(choose_request, rust=True)
+
+
+def test_choose_and_execute_many_rust_name_invalid_request() -> None:
+    choose_requests = [
+        ChooseRequest.model_validate_json(p.read_text()) for p in sorted(TURN_BY_TURN_DIR.glob("*/request_0.json"))
+    ]
+    choose_requests[2].strategy = "clairvoyant"
+    choose_requests[5].strategy = "psychic"
+    with pytest.raises(ValueError, match="Invalid request at index 2: Could not match strategy_name 'clairvoyant'"):
+        choose_moves(choose_requests, rust=True)
+    with pytest.raises(ValueError, match="Invalid request at index 9: Could not match strategy_name 'psychic'"):
+        choose_moves(choose_requests[3:6], rust=True, indices=[7, 8, 9])
+
+    execute_requests = [ExecuteRequest(board=r.board, dice=r.dice, team=r.team, moves=[]) for r in choose_requests]
+    execute_requests[1].moves = [MoveDto(dice_category=CategoryDto.rock, card="MJ3")]
+    with pytest.raises(ValueError, match="Invalid request at index 1: Unable to find card MJ3 in board"):
+        execute_moves(execute_requests, rust=True)
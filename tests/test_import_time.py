@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+TURN_BY_TURN_DIR = Path(__file__).resolve().parent / "regression" / "turn_by_turn"
+
+# Modules which are slow to import, and are only needed to simulate or to use the Rust engine
+SLOW_MODULES = ["polars", "pyarrow", "cProfile", "ninja_taisen_rust", "ninja_taisen.algos.game_runner"]
+
+
+def __run_python(code: str) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+
+
+def test_choose_move_does_not_import_slow_modules() -> None:
+    request_json = TURN_BY_TURN_DIR / "metric_count_vs_metric_count" / "request_0.json"
+    code = f"""
+import sys
+from pathlib import Path
+from ninja_taisen import ChooseRequest, choose_move
+choose_move(ChooseRequest.model_validate_json(Path({str(request_json)!r}).read_text()))
+print(",".join(m for m in {SLOW_MODULES!r} if m in sys.modules))
+"""
+    completed = __run_python(code)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == ""
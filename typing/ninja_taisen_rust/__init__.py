@@ -1 +0,0 @@
-def simulate_instructions_from_csv_file(instructions_csv_file: str, max_threads: int, per_thread: int) -> None: ...
@@ -0,0 +1,39 @@
+class ResultColumns:
+    id: list[int]
+    seed: list[int]
+    monkey_strategy: list[str]
+    wolf_strategy: list[str]
+    winner: list[str]
+    turn_count: list[int]
+    monkey_cards_left: list[int]
+    wolf_cards_left: list[int]
+    start_time: list[str]
+    end_time: list[str]
+    process_name: list[str]
+
+class PhaseStatsColumns:
+    worker: list[str]
+    games: list[int]
+    turns: list[int]
+    candidates: list[int]
+    card_moves: list[int]
+    battles: list[int]
+    seconds: list[list[float]]
+
+def simulate_instructions_from_csv_file(
+    instructions_csv_file: str, max_threads: int, per_thread: int, collect_stats: bool = False
+) -> None: ...
+def simulate_instructions(
+    ids: list[int],
+    seeds: list[int],
+    monkey_strategies: list[str],
+    wolf_strategies: list[str],
+    max_threads: int,
+    per_thread: int,
+    collect_stats: bool = False,
+) -> tuple[ResultColumns, PhaseStatsColumns]: ...
+def choose_move(request_json: str) -> str: ...
+def choose_move_binary(request: bytes) -> bytes: ...
+def choose_moves(requests_json: str, indices: list[int] | None = None) -> str: ...
+def execute_move(request_json: str) -> str: ...
+def execute_moves(requests_json: str, indices: list[int] | None = None) -> str: ...